@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the opsforge CLI.
+
+Nagios runs opsforge checks thousands of times an hour, so the time spent
+before a check does any work adds up. This script measures:
+
+* the cumulative import time of ``opsforge.cli``, from ``-X importtime``,
+  together with the slowest modules it pulled in, and
+* the wall-clock time of ``opsforge --help`` over several runs.
+
+Usage:
+    python benchmarks/startup.py [--runs 20] [--top 10] [--json] [--max-ms 150]
+
+With ``--max-ms`` the script exits 1 when the median ``--help`` time is
+above the budget, so it can run in CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Modules that must not be imported just to parse arguments
+HEAVY_MODULES = ("requests", "paramiko", "dns", "yaml", "dotenv", "aiohttp")
+
+
+def _environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Parses ``-X importtime`` output.
+
+    Args:
+        stderr: Standard error of a ``python -X importtime`` run.
+
+    Returns:
+        List of (module, self microseconds, cumulative microseconds,
+        nesting depth), in the order the imports finished.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return entries
+
+
+def measure_imports(module: str = "opsforge.cli") -> Dict[str, object]:
+    """Measures the import of a module in a fresh interpreter.
+
+    Args:
+        module: Module to import.
+
+    Returns:
+        Dict with the cumulative import time in milliseconds, the modules
+        imported (slowest first), and any heavy modules among them.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=_environment(), check=True,
+    )
+    entries = parse_importtime(result.stderr)
+    index = next((i for i, entry in enumerate(entries) if entry[0] == module), None)
+    if index is None:
+        raise RuntimeError(f"{module} was not imported (already imported at startup?)")
+
+    # A module's line follows the lines of everything it imported, which are
+    # nested deeper; anything else belongs to the interpreter's own startup
+    _, _, total, depth = entries[index]
+    first = index
+    while first > 0 and entries[first - 1][3] > depth:
+        first -= 1
+    imported = sorted(entries[first:index + 1], key=lambda entry: entry[1], reverse=True)
+    names = {name.split(".")[0] for name, _, _, _ in imported}
+    return {
+        "module": module,
+        "import_ms": total / 1000,
+        "imports": [{"module": name, "self_ms": own / 1000} for name, own, _, _ in imported],
+        "heavy_imports": sorted(names.intersection(HEAVY_MODULES)),
+    }
+
+
+def measure_help(runs: int) -> Dict[str, float]:
+    """Times ``opsforge --help`` in fresh interpreters.
+
+    Args:
+        runs: Number of runs.
+
+    Returns:
+        Dict with the minimum, median and maximum in milliseconds.
+    """
+    timings = []
+    env = _environment()
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "opsforge.cli", "--help"],
+                       stdout=subprocess.DEVNULL, env=env, check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"min_ms": min(timings), "median_ms": statistics.median(timings), "max_ms": max(timings)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure opsforge CLI startup time")
+    parser.add_argument("--runs", type=int, default=20, help="Timed '--help' runs (default: 20)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list (default: 10)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--max-ms", type=float, help="Fail if the median '--help' time exceeds this")
+    args = parser.parse_args()
+
+    imports = measure_imports()
+    results = {**imports, "imports": imports["imports"][:args.top], "help": measure_help(args.runs)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        help_times = results["help"]
+        print(f"import opsforge.cli: {results['import_ms']:.1f} ms")
+        print(f"opsforge --help over {args.runs} runs: min {help_times['min_ms']:.1f} ms, "
+              f"median {help_times['median_ms']:.1f} ms, max {help_times['max_ms']:.1f} ms")
+        print("Slowest imports:")
+        for entry in results["imports"]:
+            print(f"  {entry['self_ms']:8.2f} ms  {entry['module']}")
+        if results["heavy_imports"]:
+            print(f"Heavy modules imported: {', '.join(results['heavy_imports'])}")
+
+    failed = bool(results["heavy_imports"])
+    if args.max_ms is not None and results["help"]["median_ms"] > args.max_ms:
+        print(f"Median startup {results['help']['median_ms']:.1f} ms exceeds {args.max_ms:g} ms",
+              file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""
+Long-lived check agent and its command-line client.
+
+``opsforge agent`` keeps HTTP sessions, SSH connection pools and DNS
+caches warm and runs checks sent to it over a Unix-domain socket.
+``opsforge-check`` is the client Nagios invokes instead of starting a new
+interpreter per check; it prints the check's output and exits with its
+exit code.
+
+This package must stay free of heavy imports: the client is imported on
+every check.
+"""
@@ -0,0 +1,119 @@
+"""
+Client shim for the opsforge agent.
+
+Nagios runs this for every service check, so it only imports the standard
+library modules it needs::
+
+    opsforge-check readonly --host db1 --user nagios
+    opsforge-check http500 --url https://www.example.com
+
+It sends the check to the agent and prints the check's stdout and stderr
+and exits with its exit code, exactly as running the check directly
+would. If no agent is listening, the check is run directly instead
+(unless ``OPSFORGE_AGENT_FALLBACK=0``).
+
+Environment:
+    OPSFORGE_AGENT_SOCKET: Agent socket path (default: /run/opsforge/agent.sock).
+    OPSFORGE_AGENT_TIMEOUT: Seconds to wait for the check (default: 60).
+    OPSFORGE_AGENT_FALLBACK: Set to 0 to report UNKNOWN instead of running
+        the check directly when the agent is not running.
+
+Protocol:
+    One JSON object per line in each direction, UTF-8 encoded. A request
+    is ``{"command": "readonly", "argv": [...]}``; the response is
+    ``{"exit_code": 0, "stdout": "...", "stderr": "..."}``. The agent
+    also answers ``{"command": "ping"}`` and ``{"command": "stats"}``.
+"""
+
+import json
+import os
+import socket
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_SOCKET_PATH = "/run/opsforge/agent.sock"
+DEFAULT_TIMEOUT = 60.0  # seconds
+EXIT_UNKNOWN = 3  # Nagios UNKNOWN
+
+
+def socket_path() -> str:
+    """Returns the agent socket path from the environment or the default."""
+    return os.environ.get("OPSFORGE_AGENT_SOCKET") or DEFAULT_SOCKET_PATH
+
+
+def send_request(path: str, request: Dict[str, Any], timeout: Optional[float] = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    """Sends one request to the agent and returns its response.
+
+    Args:
+        path: Agent socket path.
+        request: Request object.
+        timeout: Seconds to wait for connecting and for the response.
+
+    Returns:
+        Dict: The decoded response.
+
+    Raises:
+        OSError: If the agent cannot be reached or times out.
+        ValueError: If the response is not a JSON object.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        chunks: List[bytes] = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if chunk.endswith(b"\n"):
+                break
+    response = json.loads(b"".join(chunks) or b"null")
+    if not isinstance(response, dict):
+        raise ValueError("agent closed the connection without a response")
+    return response
+
+
+def _run_directly(command: str, argv: Sequence[str]) -> None:
+    """Replaces this process with the check run by the opsforge CLI."""
+    os.execv(sys.executable, [sys.executable, "-m", "opsforge.cli", command, *argv])
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Runs a check through the agent.
+
+    Args:
+        argv: The command and its arguments (defaults to ``sys.argv[1:]``).
+
+    Returns:
+        int: The check's exit code, or 3 (UNKNOWN) if the agent failed.
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print("usage: opsforge-check COMMAND [ARGS...]", file=sys.stderr)
+        return EXIT_UNKNOWN
+
+    command, command_argv = argv[0], argv[1:]
+    path = socket_path()
+    try:
+        timeout = float(os.environ.get("OPSFORGE_AGENT_TIMEOUT") or DEFAULT_TIMEOUT)
+        response = send_request(path, {"command": command, "argv": command_argv}, timeout)
+    except (FileNotFoundError, ConnectionRefusedError):
+        if os.environ.get("OPSFORGE_AGENT_FALLBACK", "1") != "0":
+            _run_directly(command, command_argv)
+        print(f"UNKNOWN - opsforge agent is not running on {path}")
+        return EXIT_UNKNOWN
+    except socket.timeout:
+        print(f"UNKNOWN - opsforge agent did not answer within {timeout:g}s")
+        return EXIT_UNKNOWN
+    except (OSError, ValueError) as e:
+        print(f"UNKNOWN - opsforge agent error: {e}")
+        return EXIT_UNKNOWN
+
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return int(response.get("exit_code", EXIT_UNKNOWN))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,452 @@
+"""
+Long-lived opsforge check agent.
+
+Nagios normally starts a new Python interpreter for every service check,
+which then imports ``requests`` or ``paramiko`` and opens new HTTP and SSH
+connections. The agent does that once: it listens on a Unix-domain socket
+and runs the checks sent by ``opsforge-check`` in-process, sharing
+connection pools and caches between them.
+
+Run it with::
+
+    opsforge agent --socket /run/opsforge/agent.sock
+
+Checks run on one thread per connection, at most ``--max-concurrent`` at
+a time. Each thread's stdout and stderr are captured and returned to the
+client; the agent's own logging goes to its stdout or ``--log-file``.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional, Sequence, Set, Tuple
+
+from opsforge.agent.client import DEFAULT_SOCKET_PATH, EXIT_UNKNOWN
+from opsforge.common.exceptions import ConfigurationError, OpsForgeError
+from opsforge.common.logging import logging_stats, setup_logging, get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_CONCURRENT = 32  # checks run at the same time
+DEFAULT_SOCKET_MODE = 0o660  # owner and group (e.g. nagios) may connect
+DEFAULT_MAX_HTTP_CHECKERS = 32  # distinct HttpChecker settings kept warm
+MAX_REQUEST_BYTES = 1024 * 1024
+
+# Command -> (run function, keyword arguments it takes from WarmResources)
+AGENT_COMMANDS: Dict[str, Tuple[str, Callable[["WarmResources"], Dict[str, Any]]]] = {
+    "http500": ("opsforge.http.http500:run", lambda r: {"checker_factory": r.http_checker}),
+    "readonly": ("opsforge.filesystem.readonly:run", lambda r: {"pool_factory": r.ssh_pool}),
+    "dns": ("utility_scripts.dns.manager:run", lambda r: {"resolver_cache": r.resolver_cache}),
+}
+
+
+class _ThreadLocalStream:
+    """Sends writes to the current thread's buffer, if it has one.
+
+    Installed as ``sys.stdout``/``sys.stderr`` while the agent runs, so
+    checks running on different threads have their output kept apart.
+    """
+
+    def __init__(self, original: Any):
+        self._original = original
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def capture(self) -> Any:
+        """Captures this thread's writes in a StringIO for the block."""
+        buffer = io.StringIO()
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+    def _target(self) -> Any:
+        return getattr(self._local, "buffer", None) or self._original
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._original, name)
+
+
+class WarmResources:
+    """Connection pools and caches shared by the checks the agent runs.
+
+    Each accessor matches the keyword argument a command's ``run``
+    function takes and creates its resource on first use. At most
+    ``max_http_checkers`` HTTP checkers are kept; the least recently used
+    one is closed when another is needed, once no check is using it.
+    """
+
+    def __init__(self, dns_cache_file: Optional[str] = None, max_http_checkers: int = DEFAULT_MAX_HTTP_CHECKERS):
+        """
+        Initialize without opening anything.
+
+        Args:
+            dns_cache_file: Optional file the DNS cache is loaded from and
+                saved to on close.
+            max_http_checkers: HTTP checkers (one per distinct set of
+                settings) kept open.
+        """
+        self._dns_cache_file = dns_cache_file
+        self._max_http_checkers = max(1, max_http_checkers)
+        self._lock = threading.Lock()
+        self._http_checkers: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._checker_users: Dict[Any, int] = {}  # checker -> checks using it
+        self._retired_checkers: Set[Any] = set()  # evicted, closed when no longer used
+        self._ssh_pool: Any = None
+        self._resolver_cache: Any = None
+
+    def http_checker(self, **kwargs: Any) -> ContextManager[Any]:
+        """Returns the shared HttpChecker for these settings.
+
+        Args:
+            **kwargs: ``HttpChecker`` keyword arguments; checks with the
+                same settings share one checker and its sessions.
+
+        Returns:
+            A context manager giving the checker; it is left open for the
+            next check unless it was evicted in the meantime.
+        """
+        from opsforge.http.http500 import HttpChecker
+
+        key = tuple(sorted((name, tuple(value) if isinstance(value, (list, set)) else value)
+                           for name, value in kwargs.items()))
+        evicted = None
+        with self._lock:
+            checker = self._http_checkers.get(key)
+            if checker is None:
+                checker = self._http_checkers[key] = HttpChecker(**kwargs)
+                if len(self._http_checkers) > self._max_http_checkers:
+                    _, evicted = self._http_checkers.popitem(last=False)
+                    if self._checker_users.get(evicted):
+                        self._retired_checkers.add(evicted)
+                        evicted = None
+            else:
+                self._http_checkers.move_to_end(key)
+            self._checker_users[checker] = self._checker_users.get(checker, 0) + 1
+        if evicted is not None:
+            evicted.close()
+        return self._lease_checker(checker)
+
+    @contextlib.contextmanager
+    def _lease_checker(self, checker: Any) -> Iterator[Any]:
+        """Gives a checker to one check, closing it afterwards if it was evicted."""
+        try:
+            yield checker
+        finally:
+            with self._lock:
+                self._checker_users[checker] -= 1
+                retired = False
+                if not self._checker_users[checker]:
+                    del self._checker_users[checker]
+                    retired = checker in self._retired_checkers
+                    self._retired_checkers.discard(checker)
+            if retired:
+                checker.close()
+
+    def ssh_pool(self, **kwargs: Any) -> ContextManager[Any]:
+        """Returns the shared SSH connection pool.
+
+        Args:
+            **kwargs: ``SSHConnectionPool`` keyword arguments. The pool is
+                created once from the first call's; a later, larger
+                ``max_connections`` grows its limit.
+
+        Returns:
+            A context manager giving the pool without closing it.
+        """
+        from opsforge.filesystem.readonly import SSHConnectionPool
+
+        with self._lock:
+            if self._ssh_pool is None:
+                self._ssh_pool = SSHConnectionPool(**kwargs)
+            elif "max_connections" in kwargs:
+                self._ssh_pool.grow(kwargs["max_connections"])
+            pool = self._ssh_pool
+        return contextlib.nullcontext(pool)
+
+    @property
+    def resolver_cache(self) -> Any:
+        """The shared DNS ResolverCache."""
+        from utility_scripts.dns.manager import ResolverCache
+
+        with self._lock:
+            if self._resolver_cache is None:
+                self._resolver_cache = ResolverCache(self._dns_cache_file)
+        return self._resolver_cache
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns counters describing how much the resources were reused."""
+        with self._lock:
+            stats: Dict[str, Any] = {"http_checkers": len(self._http_checkers)}
+            pool, cache = self._ssh_pool, self._resolver_cache
+        if pool is not None:
+            stats["ssh"] = {"connects": pool.connects, "reuses": pool.reuses, "evictions": pool.evictions}
+        if cache is not None:
+            stats["dns_cache"] = cache.stats()
+        return stats
+
+    def close(self) -> None:
+        """Closes the pools and saves the DNS cache."""
+        with self._lock:
+            checkers = list(self._http_checkers.values()) + list(self._retired_checkers)
+            self._http_checkers.clear()
+            self._retired_checkers.clear()
+            pool, self._ssh_pool = self._ssh_pool, None
+            cache = self._resolver_cache
+        for checker in checkers:
+            checker.close()
+        if pool is not None:
+            pool.close()
+        if cache is not None:
+            try:
+                cache.save()
+            except OSError as e:
+                logger.warning(f"Could not save DNS cache {self._dns_cache_file}: {e}")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers JSON-lines requests on one client connection."""
+
+    def handle(self) -> None:
+        agent: OpsForgeAgent = self.server.agent  # type: ignore[attr-defined]
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES)
+            if not line:
+                return
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                response = {"exit_code": EXIT_UNKNOWN, "stdout": f"UNKNOWN - bad agent request: {e}\n",
+                            "stderr": ""}
+            else:
+                response = agent.execute(request)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class OpsForgeAgent:
+    """Runs checks received on a Unix-domain socket with warm resources.
+
+    The agent can be used as a context manager; ``start()`` serves on a
+    background thread and ``close()`` stops serving, removes the socket
+    and closes the shared resources.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        socket_mode: int = DEFAULT_SOCKET_MODE,
+        resources: Optional[WarmResources] = None,
+    ):
+        """
+        Initialize the agent.
+
+        Args:
+            socket_path: Path of the Unix-domain socket to listen on.
+            max_concurrent: Maximum number of checks run at the same time.
+            socket_mode: Permissions of the socket file.
+            resources: Shared resources; a new WarmResources by default.
+        """
+        self.socket_path = socket_path
+        self.socket_mode = socket_mode
+        self.resources = resources or WarmResources()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._server: Optional[_UnixServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._streams: Optional[Tuple[_ThreadLocalStream, _ThreadLocalStream]] = None
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.failures = 0
+
+    def __enter__(self) -> "OpsForgeAgent":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _remove_stale_socket(self) -> None:
+        """Removes a socket file left behind by an agent that has exited."""
+        if not os.path.exists(self.socket_path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self.socket_path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)
+                return
+        raise ConfigurationError(f"An agent is already listening on {self.socket_path}")
+
+    def start(self) -> None:
+        """Binds the socket and serves requests on a background thread."""
+        self._remove_stale_socket()
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._server = _UnixServer(self.socket_path, _RequestHandler)
+        self._server.agent = self  # type: ignore[attr-defined]
+        os.chmod(self.socket_path, self.socket_mode)
+
+        self._streams = (_ThreadLocalStream(sys.stdout), _ThreadLocalStream(sys.stderr))
+        sys.stdout, sys.stderr = self._streams
+        self._thread = threading.Thread(target=self._server.serve_forever, name="opsforge-agent", daemon=True)
+        self._thread.start()
+        logger.info(f"opsforge agent listening on {self.socket_path}")
+
+    def close(self) -> None:
+        """Stops serving, removes the socket and closes the resources."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
+        if self._streams is not None:
+            if sys.stdout is self._streams[0]:
+                sys.stdout = self._streams[0]._original
+            if sys.stderr is self._streams[1]:
+                sys.stderr = self._streams[1]._original
+            self._streams = None
+        self.resources.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns request counters and resource statistics."""
+        return {"uptime": time.time() - self.started, "requests": self.requests,
+                "failures": self.failures, "logging": logging_stats(), **self.resources.stats()}
+
+    def execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Runs one request and returns the response.
+
+        Args:
+            request: ``{"command": ..., "argv": [...]}``, ``ping`` or ``stats``.
+
+        Returns:
+            Dict: ``exit_code``, ``stdout`` and ``stderr`` of the check.
+        """
+        command = request.get("command")
+        argv = request.get("argv") or []
+        if command == "ping":
+            return {"exit_code": 0, "stdout": "pong\n", "stderr": ""}
+        if command == "stats":
+            return {"exit_code": 0, "stdout": json.dumps(self.stats()) + "\n", "stderr": ""}
+        if command not in AGENT_COMMANDS or not all(isinstance(arg, str) for arg in argv):
+            return {"exit_code": EXIT_UNKNOWN, "stdout": f"UNKNOWN - agent cannot run {command!r}\n", "stderr": ""}
+        if command == "http500" and argv[:1] == ["serve"]:
+            return {"exit_code": EXIT_UNKNOWN, "stdout": "UNKNOWN - 'serve' does not run in the agent\n",
+                    "stderr": ""}
+
+        target, resource_kwargs = AGENT_COMMANDS[command]
+        with self._slots:
+            exit_code, stdout, stderr = self._run(target, list(argv), resource_kwargs(self.resources))
+        with self._lock:
+            self.requests += 1
+            self.failures += exit_code != 0
+        return {"exit_code": exit_code, "stdout": stdout, "stderr": stderr}
+
+    def _run(self, target: str, argv: list, kwargs: Dict[str, Any]) -> Tuple[int, str, str]:
+        """Runs a command's run function with this thread's output captured.
+
+        Returns:
+            Tuple of the exit code, stdout and stderr.
+        """
+        stdout, stderr = self._streams or (_ThreadLocalStream(sys.stdout), _ThreadLocalStream(sys.stderr))
+        with stdout.capture() as out, stderr.capture() as err:
+            try:
+                module_name, _, function_name = target.partition(":")
+                run = getattr(importlib.import_module(module_name), function_name)
+                exit_code = run(argv, **kwargs) or 0
+            except SystemExit as e:
+                # argparse errors and --help
+                if isinstance(e.code, str):
+                    print(e.code, file=sys.stderr)
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except OpsForgeError as e:
+                print(f"Error: {str(e)}", file=sys.stderr)
+                exit_code = 1
+            except Exception as e:
+                logger.exception(f"Check {target} failed in the agent")
+                print(f"Unexpected error: {str(e)}", file=sys.stderr)
+                exit_code = 1
+        return exit_code, out.getvalue(), err.getvalue()
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parses the agent's command-line arguments.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+
+    Returns:
+        The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(prog="opsforge agent", description="Run opsforge checks for opsforge-check clients")
+    parser.add_argument("--socket", default=os.environ.get("OPSFORGE_AGENT_SOCKET") or DEFAULT_SOCKET_PATH,
+                        help=f"Unix socket to listen on (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--socket-mode", type=lambda value: int(value, 8), default=DEFAULT_SOCKET_MODE,
+                        help=f"Octal permissions of the socket (default: {DEFAULT_SOCKET_MODE:o})")
+    parser.add_argument("--max-concurrent", type=int, default=DEFAULT_MAX_CONCURRENT,
+                        help=f"Checks run at the same time (default: {DEFAULT_MAX_CONCURRENT})")
+    parser.add_argument("--dns-cache-file", help="JSON file the DNS cache is loaded from and saved to")
+    parser.add_argument("--log-file", help="Also write the agent's log to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Runs the agent until SIGTERM or SIGINT.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+
+    Returns:
+        Exit code (0 for success, non-zero for errors).
+    """
+    args = parse_args(argv)
+
+    # Handlers bind the real stdout before the checks' output is captured, so
+    # the agent's log never ends up in a check's output. Checks only enqueue
+    # records; a full queue drops them rather than stalling checks.
+    setup_logging(log_level=os.getenv("OPSFORGE_LOG_LEVEL", "INFO"), log_file=args.log_file, use_queue=True)
+
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    try:
+        agent = OpsForgeAgent(args.socket, args.max_concurrent, args.socket_mode,
+                              WarmResources(args.dns_cache_file))
+        with agent:
+            stop.wait()
+            logger.info(f"opsforge agent stopping after {agent.requests} checks")
+    except OpsForgeError as e:
+        logger.error(str(e))
+        return 1
+    except OSError as e:
+        logger.error(f"Could not listen on {args.socket}: {e}")
+        return 1
+    return 0
@@ -2,137 +2,151 @@
 
 This module provides the main CLI entry point for the OpsForge package,
 integrating all commands under a single interface.
+
+Commands are kept in a registry of cheap :class:`Command` descriptions.
+Building the parser and printing help only touches the registry. A
+command's own options are parsed by a small module without heavy imports,
+so its ``--help`` and argument errors are cheap too; the module
+implementing the command (and its ``requests``, ``paramiko`` or
+``dnspython`` imports) is loaded once the arguments are known to be good.
+Nagios runs these checks thousands of times an hour, so startup time
+matters; ``benchmarks/startup.py`` measures it.
 """
 
 import argparse
 import importlib
 import sys
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
 
 from opsforge.common.exceptions import OpsForgeError
-from opsforge.common.logging import setup_logging
 
 
-def main() -> int:
-    """Main entry point for the OpsForge CLI.
-    
+class Command(NamedTuple):
+    """A subcommand of the ``opsforge`` CLI.
+
+    A NamedTuple rather than a dataclass: importing ``dataclasses`` pulls
+    in ``inspect`` and roughly doubles the import time of this module.
+
+    Attributes:
+        name: Subcommand name.
+        help: One-line help shown by ``opsforge --help``.
+        target: Entry point as ``"module:function"``, imported only when
+            the command runs.
+        configure: Optional callable adding arguments to the subparser.
+            It must not import the target module.
+        forward_args: If True, everything after the command name is
+            passed untouched to the target, which parses it itself.
+            Otherwise the target receives the parsed namespace.
+        arguments: Optional ``"module:function"`` parsing the forwarded
+            arguments (exiting on ``--help`` or an error) before the target
+            is imported. Its module must not import the target module.
+    """
+    name: str
+    help: str
+    target: str
+    configure: Optional[Callable[[argparse.ArgumentParser], None]] = None
+    forward_args: bool = True
+    arguments: Optional[str] = None
+
+    def load(self) -> Callable[..., Any]:
+        """Imports the target module and returns its entry point."""
+        return _import_function(self.target)
+
+
+def _import_function(path: str) -> Callable[..., Any]:
+    """Imports ``"module:function"`` (``main`` if no function is given)."""
+    module_name, _, function_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), function_name or "main")
+
+
+COMMANDS: Dict[str, Command] = {}
+
+
+def register_command(command: Command) -> Command:
+    """Adds a command to the CLI registry.
+
+    Args:
+        command: Command to register; replaces one with the same name.
+
     Returns:
-        int: Exit code (0 for success, non-zero for errors).
+        Command: The registered command.
+    """
+    COMMANDS[command.name] = command
+    return command
+
+
+# Options (and the "serve" mode) are declared in opsforge.http.args
+register_command(Command(
+    "http500", "Monitor HTTP 500 errors (add 'serve' to run continuously)",
+    "opsforge.http.http500:main", arguments="opsforge.http.args:parse_args"))
+
+# Options (single host or --hosts-file fleet sweeps) are declared in
+# opsforge.filesystem.args
+register_command(Command(
+    "readonly", "Check for read-only filesystems on one host or a fleet",
+    "opsforge.filesystem.readonly:main", arguments="opsforge.filesystem.args:parse_args"))
+
+# get, transfer, search, tinydns and sheets are declared in
+# utility_scripts.dns.args
+register_command(Command(
+    "dns", "DNS management tools (get, transfer, search, tinydns, sheets)",
+    "utility_scripts.dns.manager:main", arguments="utility_scripts.dns.args:parse_args"))
+
+# Long-running daemon serving opsforge-check clients over a Unix socket; the
+# server module itself imports nothing heavy
+register_command(Command(
+    "agent", "Run checks for opsforge-check clients with warm connections",
+    "opsforge.agent.server:main", arguments="opsforge.agent.server:parse_args"))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the top-level parser from the command registry.
+
+    Returns:
+        argparse.ArgumentParser: Parser with one subparser per command.
     """
-    # Set up logging
-    setup_logging()
-    
-    # Create the top-level parser
     parser = argparse.ArgumentParser(
         prog="opsforge",
         description="OpsForge: Essential tools for DevOps engineers and system administrators.",
     )
-    
-    # Create a subparser for each command
-    subparsers = parser.add_subparsers(
-        dest="command", help="Command to execute")
-    
-    # HTTP commands
-    http500_parser = subparsers.add_parser(
-        "http500", help="Monitor HTTP 500 errors")
-    http500_parser.add_argument(
-        "--host", required=True, help="Host to check")
-    http500_parser.add_argument(
-        "--email", required=True, help="Email for notifications")
-    http500_parser.add_argument(
-        "--port", type=int, help="Port number")
-    http500_parser.add_argument(
-        "--scheme", choices=["http", "https"], help="Protocol scheme")
-    http500_parser.add_argument(
-        "--path", default="/", help="Path to check")
-    http500_parser.add_argument(
-        "--codes", type=int, nargs="+", help="HTTP status codes to alert on")
-    http500_parser.add_argument(
-        "--timeout", type=int, help="Request timeout in seconds")
-    
-    # Filesystem commands
-    readonly_parser = subparsers.add_parser(
-        "readonly", help="Check for read-only filesystems")
-    readonly_parser.add_argument(
-        "--host", "-H", required=True, help="SSH Remote host")
-    readonly_parser.add_argument(
-        "--user", "-u", default="root", help="SSH Remote user")
-    readonly_parser.add_argument(
-        "--port", "-p", type=int, default=22, help="SSH Remote port")
-    readonly_parser.add_argument(
-        "--identity", "-i", help="SSH identity file")
-    readonly_parser.add_argument(
-        "--mount-table", "-m", default="/proc/mounts", help="Mount table path")
-    readonly_parser.add_argument(
-        "--partition", "-P", action="append", dest="part_filter",
-        help="Pattern of partition to check")
-    readonly_parser.add_argument(
-        "--exclude", "-x", dest="exclude", help="Pattern of partition to ignore")
-    readonly_parser.add_argument(
-        "--exclude-type", "-X", action="append", dest="exclude_type",
-        help="File system types to exclude")
-    
-    # DNS commands
-    dns_parser = subparsers.add_parser(
-        "dns", help="DNS management tools")
-    dns_subparsers = dns_parser.add_subparsers(dest="dns_command")
-    
-    # DNS get
-    dns_get_parser = dns_subparsers.add_parser(
-        "get", help="Get zone records for a domain")
-    dns_get_parser.add_argument(
-        "domain", help="Domain to retrieve zone records for")
-    dns_get_parser.add_argument(
-        "--server", "-s", help="Name server to query")
-    
-    # DNS search
-    dns_search_parser = dns_subparsers.add_parser(
-        "search", help="Search for a hostname in a file")
-    dns_search_parser.add_argument(
-        "hostname", help="Hostname to search for")
-    dns_search_parser.add_argument(
-        "--file", "-f", required=True, help="File to search in")
-    
-    # DNS tinydns
-    dns_tinydns_parser = dns_subparsers.add_parser(
-        "tinydns", help="Import records from TinyDNS data directory")
-    dns_tinydns_parser.add_argument(
-        "--directory", "-d", default="/service/tinydns",
-        help="TinyDNS data directory")
-    
-    # Parse the arguments
-    args = parser.parse_args()
-    
-    if not args.command:
+    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+    for command in COMMANDS.values():
+        subparser = subparsers.add_parser(
+            command.name, help=command.help, add_help=not command.forward_args)
+        if command.configure is not None:
+            command.configure(subparser)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Main entry point for the OpsForge CLI.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+
+    Returns:
+        int: Exit code (0 for success, non-zero for errors).
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    parser = build_parser()
+
+    # Anything after a forwarding command's name belongs to that command
+    args, extra_args = parser.parse_known_args(argv)
+    command = COMMANDS.get(args.command) if args.command else None
+    if command is None:
         parser.print_help()
         return 0
-    
+    if extra_args and not command.forward_args:
+        parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
+
     try:
-        # Execute the appropriate command
-        if args.command == "http500":
-            # Import and call the http500 module's main function
-            from opsforge.http.http500 import main as http500_main
-            return http500_main() or 0
-            
-        elif args.command == "readonly":
-            # Import and call the readonly module's main function
-            from opsforge.filesystem.readonly import main as readonly_main
-            return readonly_main() or 0
-            
-        elif args.command == "dns":
-            # Handle DNS commands
-            if not args.dns_command:
-                dns_parser.print_help()
-                return 0
-                
-            # Import and call the dns module's main function
-            from opsforge.dns.manager import main as dns_main
-            return dns_main() or 0
-            
-        else:
-            parser.print_help()
-            return 0
-            
+        if command.forward_args:
+            forwarded: List[str] = argv[argv.index(command.name) + 1:]
+            if command.arguments is not None:
+                _import_function(command.arguments)(forwarded)
+            return command.load()(forwarded) or 0
+        return command.load()(args) or 0
+
     except OpsForgeError as e:
         print(f"Error: {str(e)}", file=sys.stderr)
         return 1
@@ -145,4 +159,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
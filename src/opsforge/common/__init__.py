@@ -4,13 +4,48 @@ Common utilities and shared functions for the opsforge package.
 This module provides shared functionality used across the different
 modules, including configuration management, logging,
 error handling, and other common utilities.
+
+Names are imported from their submodules on first access, so importing
+``opsforge.common.exceptions`` does not pull in the YAML and dotenv
+dependencies of ``opsforge.common.config``.
 """
 
-from opsforge.common.config import ConfigManager
-from opsforge.common.logging import setup_logging, get_logger
-from opsforge.common.exceptions import (
-    OpsForgeError,
-    ConfigurationError,
-    NetworkError,
-    ValidationError,
-)
\ No newline at end of file
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from opsforge.common.config import ConfigManager
+    from opsforge.common.logging import setup_logging, get_logger
+    from opsforge.common.exceptions import (
+        OpsForgeError,
+        ConfigurationError,
+        NetworkError,
+        ValidationError,
+    )
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    "ConfigManager": "opsforge.common.config",
+    "setup_logging": "opsforge.common.logging",
+    "get_logger": "opsforge.common.logging",
+    "OpsForgeError": "opsforge.common.exceptions",
+    "ConfigurationError": "opsforge.common.exceptions",
+    "NetworkError": "opsforge.common.exceptions",
+    "ValidationError": "opsforge.common.exceptions",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """Imports a public name from its submodule on first access."""
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
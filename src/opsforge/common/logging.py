@@ -3,12 +3,149 @@ Logging utilities for OpsForge.
 
 This module provides consistent logging configuration across all
 OpsForge modules, with support for various log destinations and formats.
+
+``setup_logging`` is idempotent: calling it again replaces the handlers it
+installed before instead of adding more. In queue mode the root logger
+only gets a ``DroppingQueueHandler``; formatting and I/O happen on a
+``QueueListener`` thread, and records are dropped (and counted) rather
+than blocking the caller when the bounded queue is full.
+
+Hot paths should log with %-style arguments
+(``logger.debug("Checked %s", url)``) so no string is built when the
+level is disabled; ``JsonFormatter`` also emits ``extra=`` fields as
+structured data.
 """
 
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import Any, Dict, List, Optional, TextIO, Union
+
+DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+DEFAULT_QUEUE_SIZE = 10000  # records buffered before new ones are dropped
+
+# Attributes every LogRecord has; anything else came from ``extra=``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+# Handlers and listener installed by the last setup_logging call
+_installed: List[logging.Handler] = []
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line.
+
+    The object has ``time`` (UTC, ISO 8601), ``level``, ``logger`` and
+    ``message``, any fields passed with ``extra=``, and ``exception`` or
+    ``stack`` when present. Values that are not JSON types are converted
+    with ``str``.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        created = time.gmtime(record.created)
+        data: Dict[str, Any] = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", created) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking on a full queue.
+
+    ``prepare`` only merges the message arguments and renders the
+    traceback; the handlers behind the ``QueueListener`` do the
+    formatting on its thread.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self._drop_lock = threading.Lock()
+        self.dropped = 0
+        self.dropped_by_level: Dict[str, int] = {}
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+                self.dropped_by_level[record.levelname] = self.dropped_by_level.get(record.levelname, 0) + 1
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop waits for room when the queue is full."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _remove_installed() -> None:
+    """Stops the listener and removes the handlers of the previous setup."""
+    global _listener
+    root_logger = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()
+        queue_handler = next((h for h in _installed if isinstance(h, DroppingQueueHandler)), None)
+        if queue_handler is not None and queue_handler.dropped:
+            # The listener's handlers are still open; report what was lost
+            record = logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": "Dropped %d log records because the logging queue was full %s",
+                "args": (queue_handler.dropped, queue_handler.dropped_by_level),
+            })
+            for handler in _listener.handlers:
+                handler.handle(record)
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    for handler in _installed:
+        root_logger.removeHandler(handler)
+        handler.close()
+    _installed.clear()
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and removes the handlers setup_logging added."""
+    with _setup_lock:
+        _remove_installed()
+
+
+atexit.register(shutdown_logging)
 
 
 def setup_logging(
@@ -16,44 +153,72 @@ def setup_logging(
     log_file: Optional[Union[str, Path]] = None,
     log_format: Optional[str] = None,
     module_levels: Optional[Dict[str, Union[int, str]]] = None,
+    use_queue: Optional[bool] = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    json_format: Optional[bool] = None,
+    stream: Optional[TextIO] = None,
 ) -> None:
     """Configure logging for OpsForge.
 
+    Calling it again replaces the handlers installed by the previous call,
+    so records are never emitted twice. Handlers added by other code are
+    left alone.
+
     Args:
         log_level: The log level to use (default: INFO).
         log_file: Optional file path to write logs to.
         log_format: Optional custom log format. If None, a default format is used.
         module_levels: Optional dictionary mapping module names to specific log levels.
+        use_queue: Hand records to a background thread through a bounded
+            queue instead of writing them on the calling thread. Defaults
+            to the ``OPSFORGE_LOG_QUEUE`` environment variable.
+        queue_size: Records buffered in queue mode before new ones are dropped.
+        json_format: Write one JSON object per record instead of
+            ``log_format``. Defaults to ``OPSFORGE_LOG_FORMAT=json``.
+        stream: Stream the console handler writes to (default: stdout).
+            Nagios plugins pass stderr, so stdout holds only their status.
     """
     # Convert string log levels to constants if needed
     if isinstance(log_level, str):
         log_level = getattr(logging, log_level.upper())
-
-    # Default log format
-    if not log_format:
-        log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    if use_queue is None:
+        use_queue = _env_flag("OPSFORGE_LOG_QUEUE")
+    if json_format is None:
+        json_format = os.environ.get("OPSFORGE_LOG_FORMAT", "").lower() == "json"
 
     # Create formatter
-    formatter = logging.Formatter(log_format)
-
-    # Configure root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
+    formatter = JsonFormatter() if json_format else logging.Formatter(log_format or DEFAULT_FORMAT)
 
     # Always add a console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers: List[logging.Handler] = [logging.StreamHandler(stream or sys.stdout)]
 
     # Add a file handler if requested
     if log_file:
         file_path = Path(log_file)
         # Ensure parent directory exists
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        file_handler = logging.FileHandler(file_path)
-        file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(logging.FileHandler(file_path))
+
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    global _listener
+    with _setup_lock:
+        _remove_installed()
+
+        # Configure root logger
+        root_logger = logging.getLogger()
+        root_logger.setLevel(log_level)
+
+        if use_queue:
+            log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+            _listener = _QueueListener(log_queue, *handlers, respect_handler_level=True)
+            _listener.start()
+            handlers = [DroppingQueueHandler(log_queue)]
+
+        for handler in handlers:
+            root_logger.addHandler(handler)
+        _installed.extend(handlers)
 
     # Set specific levels for modules if provided
     if module_levels:
@@ -63,6 +228,20 @@ def setup_logging(
             logging.getLogger(module_name).setLevel(level)
 
 
+def logging_stats() -> Dict[str, Any]:
+    """Returns queue-mode counters: records waiting and records dropped.
+
+    Returns:
+        Dict with ``queued``, ``dropped`` and ``dropped_by_level``; empty
+        when logging is not in queue mode.
+    """
+    handler = next((h for h in _installed if isinstance(h, DroppingQueueHandler)), None)
+    if handler is None:
+        return {}
+    return {"queued": handler.queue.qsize(), "dropped": handler.dropped,
+            "dropped_by_level": dict(handler.dropped_by_level)}
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger with the specified name.
 
@@ -72,4 +251,4 @@ def get_logger(name: str) -> logging.Logger:
     Returns:
         A configured logger instance.
     """
-    return logging.getLogger(name)
\ No newline at end of file
+    return logging.getLogger(name)
@@ -0,0 +1,89 @@
+"""
+Command-line options of the read-only mount check.
+
+Kept apart from ``opsforge.filesystem.readonly`` and free of heavy
+imports, so ``opsforge readonly --help`` and mistyped options are answered
+before ``paramiko`` is loaded.
+"""
+
+import argparse
+from typing import Optional, Sequence
+
+# Option defaults
+DEFAULT_SWEEP_WORKERS = 100  # hosts checked concurrently in a fleet sweep
+DEFAULT_HOST_TIMEOUT = 30.0  # seconds budgeted per host in a fleet sweep
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the argument parser of the read-only mount check.
+
+    Returns:
+        The configured ArgumentParser.
+    """
+    parser = argparse.ArgumentParser(description='Check read-only mounts on a remote system.')
+
+    # SSH connection options
+    ssh_group = parser.add_argument_group('SSH Options')
+    ssh_group.add_argument('--host', '-H', help='SSH Remote host')
+    ssh_group.add_argument('--hosts-file', help='Check every [user@]host[:port] listed in this file')
+    ssh_group.add_argument('--user', '-u', default='root', help='SSH Remote user (default: root)')
+    ssh_group.add_argument('--port', '-p', type=int, default=22, help='SSH Remote port (default: 22)')
+    ssh_group.add_argument('--identity', '-i', help='SSH identity file')
+    ssh_group.add_argument('--password', help='SSH password (not recommended, use identity file instead)')
+    ssh_group.add_argument('--timeout', type=int, default=10, help='SSH connection timeout in seconds (default: 10)')
+
+    # Fleet sweep options
+    fleet_group = parser.add_argument_group('Fleet Sweep Options (with --hosts-file)')
+    fleet_group.add_argument('--workers', type=int, default=DEFAULT_SWEEP_WORKERS,
+                             help=f'Hosts checked concurrently (default: {DEFAULT_SWEEP_WORKERS})')
+    fleet_group.add_argument('--host-timeout', type=float, default=DEFAULT_HOST_TIMEOUT,
+                             help=f'Seconds budgeted per host (default: {DEFAULT_HOST_TIMEOUT:g})')
+
+    # Mount check options
+    mount_group = parser.add_argument_group('Mount Check Options')
+    mount_group.add_argument('--mount-table', '-m', default='/proc/mounts',
+                            help='Mount table path (default: /proc/mounts)')
+    mount_group.add_argument('--partition', '-P', action='append', dest='part_filter',
+                            help='Pattern of partition to check (may be repeated); substring, '
+                                 'or prefix with glob: or re: for a glob or regex')
+    mount_group.add_argument('--exclude', '-x', dest='exclude',
+                            help='Pattern of partition to ignore (only when --partition not used); '
+                                 'substring, glob: or re:')
+    mount_group.add_argument('--exclude-type', '-X', action='append', dest='exclude_type',
+                            help='File system types to exclude (may be repeated)')
+    mount_group.add_argument('--remote-filter', action='store_true',
+                            help='Filter the mount table on the remote host with awk, '
+                                 'so only candidate read-only mounts are transferred')
+    mount_group.add_argument('--mount-cache', metavar='FILE',
+                            help='Remember each host\'s mount table digest in FILE and skip '
+                                 'transferring and parsing tables that did not change')
+
+    # Backward compatibility (old parameter names)
+    parser.add_argument('-sh', dest='sHost', help=argparse.SUPPRESS)
+    parser.add_argument('-su', dest='sUser', help=argparse.SUPPRESS)
+    parser.add_argument('-sp', type=int, dest='sPort', help=argparse.SUPPRESS)
+    parser.add_argument('-mpath', dest='mtabPath', help=argparse.SUPPRESS)
+    parser.add_argument('-partition', action='append', dest='partFilter', help=argparse.SUPPRESS)
+    return parser
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parses command-line arguments, requiring exactly one of the host options.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+
+    Returns:
+        The parsed arguments; old option names are kept as parsed.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    host = args.host if args.host else args.sHost
+    if host and args.hosts_file:
+        parser.error("--host and --hosts-file are mutually exclusive")
+    if not host and not args.hosts_file:
+        parser.error("SSH host is required (--host or --hosts-file)")
+    return args
@@ -14,15 +14,25 @@ For more options:
 
 import sys
 import os
-import argparse
+import fnmatch
+import hashlib
+import json
+import logging
 import re
+import shlex
 import socket
-from typing import List, Optional, Sequence, Tuple, Set, Dict
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, ContextManager, FrozenSet, Iterable, List, Optional, Pattern, Sequence, Tuple, Set, Dict, Union
 from dataclasses import dataclass, field
 import paramiko
 
 from opsforge.common.logging import setup_logging, get_logger
-from opsforge.common.exceptions import OpsForgeError, NetworkError
+from opsforge.common.exceptions import OpsForgeError, NetworkError, ConfigurationError
+from opsforge.filesystem.args import DEFAULT_HOST_TIMEOUT, DEFAULT_SWEEP_WORKERS, parse_args
 
 # Set up logger
 logger = get_logger(__name__)
@@ -32,6 +42,16 @@ EXIT_OK = 0
 EXIT_WARNING = 1
 EXIT_CRITICAL = 2
 EXIT_ERROR = 3
+DEFAULT_POOL_MAX_CONNECTIONS = 256  # authenticated SSH connections kept open
+DEFAULT_POOL_IDLE_TIMEOUT = 900.0  # seconds an unused connection is kept
+SSH_KEEPALIVE_INTERVAL = 30  # seconds between keepalives on pooled connections
+
+# Prefixes selecting how a partition/exclude pattern matches (default: substring)
+PATTERN_REGEX_PREFIX = 're:'
+PATTERN_GLOB_PREFIX = 'glob:'
+
+# Severity used to pick a fleet's overall exit code (worst wins)
+EXIT_SEVERITY = {EXIT_OK: 0, EXIT_ERROR: 1, EXIT_WARNING: 2, EXIT_CRITICAL: 3}
 
 # Domain/Value Objects
 @dataclass(frozen=True)
@@ -45,33 +65,65 @@ class SSHConfig:
     timeout: int = 10
 
 
-@dataclass(frozen=True)
+@lru_cache(maxsize=4096)
+def _parse_options(raw: bytes) -> Tuple[str, ...]:
+    """Parses a mount options field into interned option names, in order."""
+    return tuple(sys.intern(option) for option in raw.decode('utf-8', 'replace').split(','))
+
+
+@lru_cache(maxsize=4096)
+def _option_set(options: Tuple[str, ...]) -> FrozenSet[str]:
+    """Returns the frozenset of some options; equal options share one set."""
+    return frozenset(options)
+
+
+@lru_cache(maxsize=1024)
+def _parse_type(raw: bytes) -> str:
+    """Decodes a filesystem type field into an interned string."""
+    return sys.intern(raw.decode('utf-8', 'replace'))
+
+
+@dataclass(frozen=True, slots=True)
 class MountInfo:
-    """Represents a single mount point entry."""
+    """Represents a single mount point entry.
+
+    ``options`` is the list of options in mount table order, as it always
+    was; ``option_set`` holds the same options as a frozenset for
+    membership tests and is shared by entries with equal options.
+    Instances are slotted, each distinct options field is parsed once, and
+    devices and filesystem types are interned, so thousands of hosts'
+    mount tables can be held for reporting cheaply.
+    """
     device: str
     mountpoint: str
     filesystem_type: str
     options: List[str]
     # Ignoring dump and passno fields
+    option_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, 'option_set', _option_set(tuple(self.options)))
 
     @classmethod
-    def from_line(cls, line: str) -> Optional['MountInfo']:
+    def from_line(cls, line: Union[str, bytes]) -> Optional['MountInfo']:
         """
         Parses a line from /proc/mounts or similar.
         
         Args:
-            line: A line from a mount table file.
+            line: A line from a mount table file, as text or raw bytes.
             
         Returns:
             MountInfo object or None if the line cannot be parsed.
         """
-        parts = re.split(r'\s+', line.strip())
+        if isinstance(line, str):
+            line = line.encode('utf-8')
+        parts = line.split(None, 4)
         if len(parts) >= 4:
             return cls(
-                device=parts[0],
-                mountpoint=parts[1],
-                filesystem_type=parts[2],
-                options=parts[3].split(',')
+                device=sys.intern(parts[0].decode('utf-8', 'replace')),
+                mountpoint=parts[1].decode('utf-8', 'replace'),
+                filesystem_type=_parse_type(parts[2]),
+                options=list(_parse_options(parts[3]))
             )
         return None
 
@@ -82,7 +134,208 @@ class MountInfo:
         Returns:
             True if the mount is read-only, False otherwise.
         """
-        return 'ro' in self.options
+        return 'ro' in self.option_set
+
+
+def _awk_string(value: str) -> str:
+    """Quotes a value as an awk string literal."""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _pattern_to_regex(pattern: str) -> str:
+    """Translates a substring, ``glob:`` or ``re:`` pattern to a regex."""
+    if pattern.startswith(PATTERN_REGEX_PREFIX):
+        return pattern[len(PATTERN_REGEX_PREFIX):]
+    if pattern.startswith(PATTERN_GLOB_PREFIX):
+        # Globs match a whole device or mountpoint
+        return r'\A' + fnmatch.translate(pattern[len(PATTERN_GLOB_PREFIX):])
+    return re.escape(pattern)
+
+
+class MountFilter:
+    """Compiled mount filters, applied in a single pass.
+
+    Excluded filesystem types become a frozenset. The substring and
+    ``glob:`` patterns of the partition (include) and exclude lists are
+    each combined into one regex with a named group per pattern, so they
+    cost one search however many there are. ``re:`` patterns are compiled
+    on their own and searched in order after it, so inline flags, numbered
+    groups and backreferences work as written. Patterns match a mount's device or
+    mountpoint as a substring, or as a whole-field glob with ``glob:``, or
+    as a regex search with ``re:``. As before, exclude patterns only apply
+    when no partition patterns are given.
+
+    Hit counts per filter accumulate across ``apply`` calls and threads.
+    """
+
+    def __init__(
+        self,
+        exclude_types: Iterable[str] = (),
+        include_patterns: Sequence[str] = (),
+        exclude_patterns: Sequence[str] = (),
+    ):
+        """
+        Compile the filters.
+
+        Args:
+            exclude_types: Filesystem types to skip.
+            include_patterns: If given, only mounts matching one are kept.
+            exclude_patterns: Mounts matching one are skipped (ignored when
+                include patterns are given).
+
+        Raises:
+            ConfigurationError: If a ``re:`` pattern is not a valid regex.
+        """
+        self.exclude_types = frozenset(exclude_types)
+        self._include_patterns = list(include_patterns)
+        self._exclude_patterns = [] if self._include_patterns else list(exclude_patterns)
+        self._include = self._compile(self._include_patterns)
+        self._exclude = self._compile(self._exclude_patterns)
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, config: 'CheckConfig') -> 'MountFilter':
+        """Compiles the filters of a CheckConfig."""
+        return cls(
+            exclude_types=config.exclude_types,
+            include_patterns=config.partition_filters or (),
+            exclude_patterns=[config.exclude_filter] if config.exclude_filter else (),
+        )
+
+    @staticmethod
+    def _compile(patterns: Sequence[str]) -> List[Tuple[Pattern[str], Optional[int]]]:
+        """
+        Compiles patterns into (regex, index) pairs to search in order.
+
+        Substring and glob patterns share one regex with a group named
+        after each pattern's index (the pair's index is None); every
+        ``re:`` pattern gets a regex of its own, left exactly as written.
+        """
+        combined = []
+        matchers: List[Tuple[Pattern[str], Optional[int]]] = []
+        try:
+            for index, pattern in enumerate(patterns):
+                if pattern.startswith(PATTERN_REGEX_PREFIX):
+                    matchers.append((re.compile(_pattern_to_regex(pattern)), index))
+                else:
+                    combined.append(f'(?P<f{index}>{_pattern_to_regex(pattern)})')
+            if combined:
+                matchers.insert(0, (re.compile('|'.join(combined)), None))
+        except re.error as e:
+            raise ConfigurationError(f"Invalid mount filter pattern: {e}")
+        return matchers
+
+    @staticmethod
+    def _search(matchers: Sequence[Tuple[Pattern[str], Optional[int]]], mount: MountInfo) -> Optional[int]:
+        """Returns the index of the pattern matching the device or mountpoint."""
+        for regex, index in matchers:
+            match = regex.search(mount.device) or regex.search(mount.mountpoint)
+            if match is not None:
+                if index is None:
+                    # The outermost group closes last, so lastgroup names the pattern
+                    return int(match.lastgroup[1:])
+                return index
+        return None
+
+    def apply(self, mounts: Iterable[MountInfo]) -> List[MountInfo]:
+        """
+        Returns the mounts that pass every filter, counting filter hits.
+
+        Args:
+            mounts: Mounts to filter.
+
+        Returns:
+            The kept mounts, in input order.
+        """
+        exclude_types = self.exclude_types
+        include = self._include
+        exclude = self._exclude
+        type_hits: Dict[str, int] = {}
+        include_hits = [0] * len(self._include_patterns)
+        exclude_hits = [0] * len(self._exclude_patterns)
+        not_included = 0
+
+        kept = []
+        for mount in mounts:
+            if mount.filesystem_type in exclude_types:
+                type_hits[mount.filesystem_type] = type_hits.get(mount.filesystem_type, 0) + 1
+                continue
+            if include:
+                index = self._search(include, mount)
+                if index is None:
+                    not_included += 1
+                    continue
+                include_hits[index] += 1
+            elif exclude:
+                index = self._search(exclude, mount)
+                if index is not None:
+                    exclude_hits[index] += 1
+                    continue
+            kept.append(mount)
+
+        counts = {f"exclude-type:{t}": n for t, n in type_hits.items()}
+        counts.update((f"partition:{p}", n) for p, n in zip(self._include_patterns, include_hits) if n)
+        counts.update((f"exclude:{p}", n) for p, n in zip(self._exclude_patterns, exclude_hits) if n)
+        if not_included:
+            counts["partition:<no match>"] = not_included
+        with self._lock:
+            for key, count in counts.items():
+                self._hits[key] = self._hits.get(key, 0) + count
+        return kept
+
+    def awk_program(self) -> str:
+        """
+        Builds an awk program printing only candidate read-only mounts.
+
+        The program keeps mount table lines whose options include ``ro``
+        and that pass the type exclusions and the plain substring patterns.
+        ``glob:`` and ``re:`` patterns are not translated (awk regexes
+        differ from Python's); they are left to the local filter, so the
+        remote output is always a superset of what the local filter keeps.
+
+        Returns:
+            The awk program text.
+        """
+        conditions = ['$4 ~ /(^|,)ro(,|$)/']
+        begin = ''
+        if self.exclude_types:
+            begin = 'BEGIN { ' + ' '.join(
+                f'skip[{_awk_string(t)}] = 1;' for t in sorted(self.exclude_types)
+            ) + ' } '
+            conditions.append('!($3 in skip)')
+
+        def substring_test(patterns: Sequence[str]) -> Optional[str]:
+            if not patterns or any(
+                p.startswith((PATTERN_REGEX_PREFIX, PATTERN_GLOB_PREFIX)) for p in patterns
+            ):
+                return None
+            return '(' + ' || '.join(
+                f'index($1, {_awk_string(p)}) || index($2, {_awk_string(p)})' for p in patterns
+            ) + ')'
+
+        include = substring_test(self._include_patterns)
+        if include:
+            conditions.append(include)
+        plain_excludes = [
+            p for p in self._exclude_patterns
+            if not p.startswith((PATTERN_REGEX_PREFIX, PATTERN_GLOB_PREFIX))
+        ]
+        exclude = substring_test(plain_excludes)
+        if exclude:
+            conditions.append(f'!{exclude}')
+        return begin + ' && '.join(conditions) + ' { print }'
+
+    def hit_counts(self) -> Dict[str, int]:
+        """
+        Returns how many mounts each filter decided so far.
+
+        Keys are ``exclude-type:<type>``, ``partition:<pattern>`` (mounts
+        kept by that pattern), ``partition:<no match>`` (mounts dropped for
+        matching no pattern) and ``exclude:<pattern>``.
+        """
+        with self._lock:
+            return dict(self._hits)
 
 
 @dataclass(frozen=True)
@@ -93,29 +346,343 @@ class CheckConfig:
     partition_filters: Optional[List[str]] = None
     exclude_filter: Optional[str] = None
     exclude_types: Set[str] = field(default_factory=set)
+    fleet: List[SSHConfig] = field(default_factory=list)  # hosts of a fleet sweep
+    max_workers: int = DEFAULT_SWEEP_WORKERS
+    host_timeout: float = DEFAULT_HOST_TIMEOUT
+    remote_filter: bool = False  # pre-filter the mount table on the remote host
+    mount_cache: Optional[str] = None  # JSON file of mount table digests per host
+    mount_filter: MountFilter = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Compile the filters once per configuration, not once per mount
+        object.__setattr__(self, 'mount_filter', MountFilter.from_config(self))
+
+
+@dataclass(frozen=True)
+class HostReport:
+    """Outcome of the mount check on one host."""
+    host: str
+    exit_code: int
+    ro_mounts: List[MountInfo] = field(default_factory=list)
+    error: Optional[str] = None
 
 
 # Custom Exceptions
 class SSHExecutionError(NetworkError):
     """Error during SSH command execution."""
-    def __init__(self, message: str, stderr: str = ""):
+    def __init__(self, message: str, stderr: str = "", exit_status: Optional[int] = None):
         super().__init__(message)
         self.stderr = stderr
+        self.exit_status = exit_status  # set when the remote command itself failed
 
 
 # Infrastructure/Services
+def open_ssh_client(config: SSHConfig) -> paramiko.SSHClient:
+    """
+    Establish an authenticated SSH connection.
+
+    Args:
+        config: SSH connection configuration.
+
+    Returns:
+        Connected SSHClient.
+
+    Raises:
+        SSHExecutionError: If the connection fails.
+    """
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    
+    try:
+        connect_kwargs = {
+            'hostname': config.host,
+            'username': config.user,
+            'port': config.port,
+            'timeout': config.timeout,
+        }
+        
+        # Add password if provided
+        if config.password:
+            connect_kwargs['password'] = config.password
+            
+        # Add identity file if provided
+        if config.identity_file:
+            connect_kwargs['key_filename'] = config.identity_file
+            
+        client.connect(**connect_kwargs)
+        return client
+        
+    except paramiko.AuthenticationException:
+        raise SSHExecutionError(f"Authentication failed for {config.user}@{config.host}")
+    except paramiko.SSHException as e:
+        raise SSHExecutionError(f"SSH error: {str(e)}")
+    except socket.error as e:
+        raise SSHExecutionError(f"Socket error when connecting to {config.host}: {str(e)}")
+    except Exception as e:
+        raise SSHExecutionError(f"Unexpected error establishing SSH connection: {str(e)}")
+
+
+@dataclass
+class _PoolEntry:
+    """One pooled connection and its bookkeeping."""
+    client: Optional[paramiko.SSHClient] = None
+    users: int = 0  # commands currently using the connection
+    last_used: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)  # guards (re)connects
+
+
+class SSHConnectionPool:
+    """Keeps authenticated SSH connections open across commands.
+
+    Connections are keyed by (host, port, user). A paramiko transport
+    multiplexes channels, so one connection per key serves any number of
+    concurrent commands. Before reuse a connection is health-checked and
+    transparently replaced if it died; connections unused for longer than
+    ``idle_timeout`` are closed, and when ``max_connections`` are open the
+    least recently used idle one makes room for a new key.
+
+    The pool is safe to share between threads. Call ``close()`` (or use it
+    as a context manager) to close every connection.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_POOL_MAX_CONNECTIONS,
+        idle_timeout: float = DEFAULT_POOL_IDLE_TIMEOUT,
+        connect: Callable[[SSHConfig], paramiko.SSHClient] = open_ssh_client,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize an empty pool.
+
+        Args:
+            max_connections: Maximum number of open connections.
+            idle_timeout: Seconds before an unused connection is closed.
+            connect: Opens a new authenticated connection.
+            clock: Monotonic clock, replaceable for testing.
+        """
+        self._max_connections = max_connections
+        self._idle_timeout = idle_timeout
+        self._connect = connect
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._entries: Dict[Tuple[str, int, str], _PoolEntry] = {}
+        self._last_sweep = clock()
+        self.connects = 0
+        self.reuses = 0
+        self.evictions = 0
+
+    def __enter__(self) -> 'SSHConnectionPool':
+        return self
+
+    @property
+    def max_connections(self) -> int:
+        """Maximum number of open connections."""
+        return self._max_connections
+
+    def grow(self, max_connections: int) -> None:
+        """
+        Raises the connection limit; a smaller limit is ignored.
+
+        Args:
+            max_connections: The new maximum number of open connections.
+        """
+        with self._cond:
+            if max_connections > self._max_connections:
+                self._max_connections = max_connections
+                self._cond.notify_all()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def _key(config: SSHConfig) -> Tuple[str, int, str]:
+        return (config.host, config.port, config.user)
+
+    @staticmethod
+    def _is_healthy(client: paramiko.SSHClient) -> bool:
+        """Checks that a connection's transport is still usable."""
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            # An SSH_MSG_IGNORE costs no round trip but fails on a dead socket
+            transport.send_ignore()
+        except (paramiko.SSHException, socket.error, EOFError):
+            return False
+        return True
+
+    def _remove_entry(
+        self, key: Tuple[str, int, str], entry: _PoolEntry, reason: str, to_close: List[paramiko.SSHClient]
+    ) -> None:
+        """
+        Forgets a connection; the caller holds the condition.
+
+        The client is appended to ``to_close`` so the caller can close it
+        after releasing the condition, without stalling other threads.
+        """
+        del self._entries[key]
+        self.evictions += 1
+        if entry.client is not None:
+            to_close.append(entry.client)
+        logger.debug("Closed pooled SSH connection to %s@%s:%s (%s)", key[2], key[0], key[1], reason)
+
+    def _evict_idle(self, now: float, to_close: List[paramiko.SSHClient]) -> None:
+        """Forgets connections unused for longer than the idle timeout."""
+        for key, entry in list(self._entries.items()):
+            if entry.users == 0 and now - entry.last_used > self._idle_timeout:
+                self._remove_entry(key, entry, "idle", to_close)
+        self._last_sweep = now
+
+    def _reserve(self, key: Tuple[str, int, str]) -> _PoolEntry:
+        """Returns the key's entry with a use registered, waiting for room if full."""
+        to_close: List[paramiko.SSHClient] = []
+        try:
+            with self._cond:
+                now = self._clock()
+                if now - self._last_sweep >= min(self._idle_timeout, 60.0):
+                    self._evict_idle(now, to_close)
+                while True:
+                    entry = self._entries.get(key)
+                    if entry is None and len(self._entries) >= self._max_connections:
+                        idle = [(e.last_used, k) for k, e in self._entries.items() if e.users == 0]
+                        if not idle:
+                            self._cond.wait()
+                            continue
+                        lru_key = min(idle)[1]
+                        self._remove_entry(lru_key, self._entries[lru_key], "pool full", to_close)
+                    if entry is None:
+                        entry = self._entries[key] = _PoolEntry()
+                    entry.users += 1
+                    return entry
+        finally:
+            for client in to_close:
+                client.close()
+
+    def acquire(self, config: SSHConfig) -> paramiko.SSHClient:
+        """
+        Returns a healthy connection for the config's host, port and user.
+
+        Every ``acquire`` must be paired with a ``release``.
+
+        Args:
+            config: SSH connection configuration.
+
+        Returns:
+            A connected SSHClient, possibly shared with other threads.
+
+        Raises:
+            SSHExecutionError: If a new connection cannot be established.
+        """
+        key = self._key(config)
+        entry = self._reserve(key)
+        try:
+            with entry.lock:
+                client = entry.client
+                if client is not None and not self._is_healthy(client):
+                    logger.info(f"Pooled SSH connection to {config.host} is stale; reconnecting")
+                    client.close()
+                    client = entry.client = None
+                if client is None:
+                    client = self._connect(config)
+                    transport = client.get_transport()
+                    if transport is not None:
+                        transport.set_keepalive(SSH_KEEPALIVE_INTERVAL)
+                    entry.client = client
+                    self.connects += 1
+                else:
+                    self.reuses += 1
+                return client
+        except Exception:
+            self.release(config)
+            raise
+
+    def release(self, config: SSHConfig) -> None:
+        """
+        Returns a connection obtained from ``acquire`` to the pool.
+
+        Args:
+            config: The configuration it was acquired with.
+        """
+        key = self._key(config)
+        with self._cond:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.users -= 1
+            entry.last_used = self._clock()
+            if entry.users == 0 and entry.client is None:
+                del self._entries[key]
+            self._cond.notify_all()
+
+    def discard(self, config: SSHConfig, client: paramiko.SSHClient) -> None:
+        """
+        Drops a connection that failed, so the next ``acquire`` reconnects.
+
+        Args:
+            config: The configuration it was acquired with.
+            client: The failed connection.
+        """
+        with self._cond:
+            entry = self._entries.get(self._key(config))
+        if entry is None:
+            return
+        with entry.lock:
+            if entry.client is not client:
+                return
+            entry.client = None
+        client.close()
+
+    def interrupt(self, config: SSHConfig) -> None:
+        """
+        Closes a host's connection while it may still be in use.
+
+        Reads blocked on the connection fail, so a thread stuck on an
+        unresponsive host returns; the next ``acquire`` sees the closed
+        transport and reconnects.
+
+        Args:
+            config: The configuration the connection was acquired with.
+        """
+        with self._cond:
+            entry = self._entries.get(self._key(config))
+        # entry.lock is held for the whole of a hanging connect, so read
+        # the client without it; a connect in progress is bounded by its
+        # own timeout
+        client = entry.client if entry is not None else None
+        if client is not None:
+            client.close()
+
+    def close(self) -> None:
+        """Closes every pooled connection."""
+        to_close: List[paramiko.SSHClient] = []
+        with self._cond:
+            for key, entry in list(self._entries.items()):
+                self._remove_entry(key, entry, "pool closed", to_close)
+            self._cond.notify_all()
+        for client in to_close:
+            client.close()
+
+
 class SSHCommandExecutor:
     """Executes commands remotely via SSH using Paramiko."""
     
-    def __init__(self, config: SSHConfig):
+    def __init__(self, config: SSHConfig, pool: Optional[SSHConnectionPool] = None):
         """
         Initialize with SSH configuration.
         
         Args:
             config: SSH connection configuration.
+            pool: Connection pool to reuse connections from; without one,
+                every command opens and closes its own connection.
         """
         self._config = config
-        self._client = None
+        self._pool = pool
+
+    @property
+    def config(self) -> SSHConfig:
+        """The SSH configuration commands run with."""
+        return self._config
 
     def _connect(self) -> paramiko.SSHClient:
         """
@@ -127,43 +694,16 @@ class SSHCommandExecutor:
         Raises:
             SSHExecutionError: If the connection fails.
         """
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        
-        try:
-            connect_kwargs = {
-                'hostname': self._config.host,
-                'username': self._config.user,
-                'port': self._config.port,
-                'timeout': self._config.timeout,
-            }
-            
-            # Add password if provided
-            if self._config.password:
-                connect_kwargs['password'] = self._config.password
-                
-            # Add identity file if provided
-            if self._config.identity_file:
-                connect_kwargs['key_filename'] = self._config.identity_file
-                
-            client.connect(**connect_kwargs)
-            return client
-            
-        except paramiko.AuthenticationException:
-            raise SSHExecutionError(f"Authentication failed for {self._config.user}@{self._config.host}")
-        except paramiko.SSHException as e:
-            raise SSHExecutionError(f"SSH error: {str(e)}")
-        except socket.error as e:
-            raise SSHExecutionError(f"Socket error when connecting to {self._config.host}: {str(e)}")
-        except Exception as e:
-            raise SSHExecutionError(f"Unexpected error establishing SSH connection: {str(e)}")
+        return open_ssh_client(self._config)
 
-    def execute(self, command: str) -> str:
+    def execute(self, command: str, decode: bool = True) -> Union[str, bytes]:
         """
         Executes a command on the configured remote host using Paramiko.
 
         Args:
             command: The command to execute on the remote host.
+            decode: Whether to decode stdout as UTF-8; False returns the
+                raw bytes, for callers that parse them directly.
 
         Returns:
             The stdout of the executed command.
@@ -171,21 +711,29 @@ class SSHCommandExecutor:
         Raises:
             SSHExecutionError: If the SSH command fails.
         """
-        logger.debug(f"Executing SSH command: {command}")
+        logger.debug("Executing SSH command: %s", command)
         
         try:
-            client = self._connect()
-            
-            # Execute the command
-            stdin, stdout, stderr = client.exec_command(command)
-            exit_status = stdout.channel.recv_exit_status()
-            
-            # Read output
-            stdout_data = stdout.read().decode('utf-8')
-            stderr_data = stderr.read().decode('utf-8')
-            
-            # Close the connection
-            client.close()
+            client = self._pool.acquire(self._config) if self._pool else self._connect()
+            try:
+                # Execute the command
+                stdin, stdout, stderr = client.exec_command(command, timeout=self._config.timeout)
+                
+                # Read output before the exit status, so a large output
+                # cannot stall the command on a full channel window
+                stdout_data = stdout.read()
+                stderr_data = stderr.read().decode('utf-8', 'replace')
+                exit_status = stdout.channel.recv_exit_status()
+            except (paramiko.SSHException, socket.error, EOFError):
+                if self._pool:
+                    self._pool.discard(self._config, client)
+                raise
+            finally:
+                # Return the connection to the pool, or close it
+                if self._pool:
+                    self._pool.release(self._config)
+                else:
+                    client.close()
             
             if exit_status != 0:
                 error_message = (
@@ -195,9 +743,9 @@ class SSHCommandExecutor:
                 logger.error(f"{error_message}")
                 if stderr_data:
                     logger.error(f"stderr: {stderr_data.strip()}")
-                raise SSHExecutionError(error_message, stderr_data)
+                raise SSHExecutionError(error_message, stderr_data, exit_status)
                 
-            return stdout_data
+            return stdout_data.decode('utf-8') if decode else stdout_data
             
         except SSHExecutionError:
             # Re-raise existing SSH execution errors
@@ -208,6 +756,127 @@ class SSHCommandExecutor:
             raise SSHExecutionError(error_message)
 
 
+class MountTableCache:
+    """Remembers each host's last mount table digest and check result.
+
+    Entries are keyed by host, port, user, mount table path and filters, so
+    a cached result is only reused for an identical check. With a path, the
+    cache is loaded from and saved to a JSON file, so one-shot runs from
+    cron benefit too. Safe to share between threads.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the cache, loading entries saved at ``path``.
+
+        Args:
+            path: JSON file to persist the cache in; None keeps it in memory.
+                An unreadable file is ignored (the next save replaces it).
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[str, List[MountInfo]]] = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for key, entry in json.load(f).items():
+                        self._entries[key] = (
+                            entry['digest'],
+                            [MountInfo(device, mountpoint, fs_type, options)
+                             for device, mountpoint, fs_type, options in entry['ro_mounts']],
+                        )
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable mount cache {path}: {e}")
+                self._entries.clear()
+
+    @staticmethod
+    def key(ssh_config: SSHConfig, config: 'CheckConfig') -> str:
+        """Returns the cache key of a check on one host."""
+        filters = json.dumps([
+            sorted(config.exclude_types),
+            config.partition_filters or [],
+            config.exclude_filter,
+            config.remote_filter,
+        ])
+        signature = hashlib.sha1(filters.encode('utf-8')).hexdigest()[:16]
+        return f"{ssh_config.user}@{ssh_config.host}:{ssh_config.port}:{config.mount_tab_path}:{signature}"
+
+    def get(self, key: str) -> Optional[Tuple[str, List[MountInfo]]]:
+        """Returns the (digest, read-only mounts) last stored for a key."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: str, digest: str, ro_mounts: List[MountInfo]) -> None:
+        """Stores the digest and read-only mounts seen for a key."""
+        with self._lock:
+            self._entries[key] = (digest, list(ro_mounts))
+
+    def discard(self, key: str) -> None:
+        """Forgets a key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def record_hit(self) -> None:
+        """Counts a check that reused a cached result."""
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self) -> None:
+        """Counts a check whose mount table changed or was not cached."""
+        with self._lock:
+            self.misses += 1
+
+    def save(self) -> None:
+        """Atomically writes the cache to its file, if it has one."""
+        if not self._path:
+            return
+        with self._lock:
+            data = {
+                key: {
+                    'digest': digest,
+                    'ro_mounts': [[m.device, m.mountpoint, m.filesystem_type, list(m.options)]
+                                  for m in ro_mounts],
+                }
+                for key, (digest, ro_mounts) in self._entries.items()
+            }
+        directory = os.path.dirname(os.path.abspath(self._path))
+        try:
+            fd, tmp_name = tempfile.mkstemp(dir=directory, prefix='.mount-cache.')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp_name, self._path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            logger.error(f"Failed to save mount cache {self._path}: {e}")
+
+
+def _digest_script(mount_tab_path: str, cached_digest: Optional[str], awk_program: Optional[str]) -> str:
+    """
+    Builds the remote shell script of a cached mount check.
+
+    The script reads the mount table once and prints ``UNCHANGED <digest>``
+    if its digest equals ``cached_digest``, or ``DIGEST <digest>`` followed
+    by the table (through ``awk_program`` if given).
+    """
+    body = "printf '%s\\n' \"$t\""
+    if awk_program:
+        body += f" | awk {shlex.quote(awk_program)}"
+    return (
+        f"t=$(cat {shlex.quote(mount_tab_path)}) || exit; "
+        "d=$(printf '%s\\n' \"$t\" | { md5sum 2>/dev/null || cksum; } | cut -d' ' -f1); "
+        f"if [ \"$d\" = {shlex.quote(cached_digest or '-')} ]; then echo \"UNCHANGED $d\"; "
+        f"else echo \"DIGEST $d\"; {body}; fi"
+    )
+
+
 class MountService:
     """Handles fetching, parsing, and filtering mount information."""
 
@@ -220,12 +889,20 @@ class MountService:
         """
         self._executor = executor
 
-    def get_remote_mounts(self, mount_tab_path: str) -> List[MountInfo]:
+    def get_remote_mounts(
+        self, mount_tab_path: str, config: Optional[CheckConfig] = None
+    ) -> List[MountInfo]:
         """
         Fetches and parses mount information from the remote system.
         
+        With ``config.remote_filter`` set, the config's filters run on the
+        remote host through awk and only candidate read-only mounts are
+        transferred. If the remote awk fails, the whole table is fetched
+        and filtered locally instead.
+
         Args:
             mount_tab_path: Path to the mount table file on the remote system.
+            config: Check configuration whose filters to apply remotely.
             
         Returns:
             List of MountInfo objects representing mounts on the remote system.
@@ -233,26 +910,52 @@ class MountService:
         Raises:
             SSHExecutionError: If fetching mount information fails.
         """
-        command = f"cat {mount_tab_path}"
+        command = f"cat {shlex.quote(mount_tab_path)}"
         try:
-            raw_output = self._executor.execute(command)
+            if config is not None and config.remote_filter:
+                awk_command = f"awk {shlex.quote(config.mount_filter.awk_program())} {shlex.quote(mount_tab_path)}"
+                try:
+                    raw_output = self._executor.execute(awk_command, decode=False)
+                except SSHExecutionError as e:
+                    if e.exit_status is None:
+                        raise
+                    logger.warning(f"Remote mount filter failed ({e}); fetching the full mount table")
+                    raw_output = self._executor.execute(command, decode=False)
+            else:
+                raw_output = self._executor.execute(command, decode=False)
         except SSHExecutionError as e:
             logger.error(f"Failed to retrieve mount info: {e}")
             if e.stderr:
                 logger.error(f"SSH stderr: {e.stderr.strip()}")
             raise
 
+        return self._parse_mount_table(raw_output)
+
+    def _parse_mount_table(self, raw_output: Union[str, bytes]) -> List[MountInfo]:
+        """
+        Parses mount table text.
+
+        Args:
+            raw_output: Mount table lines as read from the remote system;
+                raw bytes are parsed without decoding the whole buffer.
+
+        Returns:
+            List of MountInfo objects, skipping comments and bad lines.
+        """
+        if isinstance(raw_output, str):
+            raw_output = raw_output.encode('utf-8')
         mounts = []
-        for line in raw_output.strip().splitlines():
-            if not line or line.startswith('#'):  # Skip empty lines/comments
+        from_line = MountInfo.from_line
+        for line in raw_output.splitlines():
+            if not line or line.startswith(b'#'):  # Skip empty lines/comments
                 continue
-            mount_info = MountInfo.from_line(line)
+            mount_info = from_line(line)
             if mount_info:
                 mounts.append(mount_info)
-            else:
-                logger.warning(f"Could not parse mount line: {line}")
+            elif line.strip():
+                logger.warning(f"Could not parse mount line: {line.decode('utf-8', 'replace')}")
         
-        logger.info(f"Retrieved {len(mounts)} mounts from remote system")
+        logger.info("Retrieved %d mounts from remote system", len(mounts))
         return mounts
 
     def filter_mounts(self, mounts: List[MountInfo], config: CheckConfig) -> List[MountInfo]:
@@ -266,30 +969,12 @@ class MountService:
         Returns:
             Filtered list of MountInfo objects.
         """
-        filtered = []
-        for mount in mounts:
-            # Filesystem type exclusion
-            if mount.filesystem_type in config.exclude_types:
-                logger.debug(f"Skipping {mount.mountpoint} (type: {mount.filesystem_type}) due to excluded filesystem type")
-                continue
-
-            # Partition/Device filtering logic
-            if config.partition_filters:
-                # If partition filters are specified, only include matching devices/paths
-                if not any(patt in mount.device or patt in mount.mountpoint for patt in config.partition_filters):
-                    logger.debug(f"Skipping {mount.mountpoint} as it doesn't match any partition filter")
-                    continue
-                # If it matched a partition filter, include it
-            elif config.exclude_filter:
-                # If no partition filters but exclude filter is specified
-                if config.exclude_filter in mount.device or config.exclude_filter in mount.mountpoint:
-                    logger.debug(f"Skipping {mount.mountpoint} due to exclude filter match")
-                    continue
-
-            # If we passed all filters, add the mount
-            filtered.append(mount)
-
-        logger.info(f"After filtering: {len(filtered)} mounts remaining")
+        filtered = config.mount_filter.apply(mounts)
+        skipped = len(mounts) - len(filtered)
+        if skipped and logger.isEnabledFor(logging.DEBUG):
+            # hit_counts() walks every filter, so only build it when it is logged
+            logger.debug("Filters skipped %d mounts; hits so far: %s", skipped, config.mount_filter.hit_counts())
+        logger.info("After filtering: %d mounts remaining", len(filtered))
         return filtered
 
     def find_read_only_mounts(self, mounts: List[MountInfo]) -> List[MountInfo]:
@@ -303,47 +988,280 @@ class MountService:
             List of read-only MountInfo objects.
         """
         ro_mounts = [mount for mount in mounts if mount.is_read_only()]
-        logger.info(f"Found {len(ro_mounts)} read-only mounts")
+        logger.info("Found %d read-only mounts", len(ro_mounts))
+        return ro_mounts
+
+    def check_read_only(
+        self, config: CheckConfig, cache: Optional[MountTableCache] = None
+    ) -> List[MountInfo]:
+        """
+        Fetches, filters and returns the read-only mounts of the host.
+
+        With a cache, the remote side hashes its mount table and replies
+        with just the digest when it matches the last one seen; the cached
+        result is then returned without transferring, parsing or filtering
+        the table again.
+
+        Args:
+            config: Mount table path and filters.
+            cache: Digest cache shared across checks and cycles.
+
+        Returns:
+            List of read-only MountInfo objects that pass the filters.
+
+        Raises:
+            SSHExecutionError: If fetching mount information fails.
+        """
+        if cache is None:
+            mounts = self.get_remote_mounts(config.mount_tab_path, config)
+            return self.find_read_only_mounts(self.filter_mounts(mounts, config))
+
+        key = cache.key(self._executor.config, config)
+        cached = cache.get(key)
+        script = _digest_script(
+            config.mount_tab_path,
+            cached[0] if cached else None,
+            config.mount_filter.awk_program() if config.remote_filter else None,
+        )
+        try:
+            output = self._executor.execute(f"sh -c {shlex.quote(script)}", decode=False)
+        except SSHExecutionError as e:
+            if e.exit_status is None:
+                raise
+            logger.warning(f"Cached mount check failed ({e}); fetching the full mount table")
+            cache.discard(key)
+            return self.check_read_only(config)
+
+        if isinstance(output, str):
+            output = output.encode('utf-8')
+        raw_header, _, body = output.partition(b'\n')
+        header = raw_header.decode('utf-8', 'replace')
+        status, _, digest = header.strip().partition(' ')
+        if status == 'UNCHANGED' and cached is not None and digest == cached[0]:
+            cache.record_hit()
+            logger.info("Mount table unchanged (%s); reusing %d read-only mounts", digest, len(cached[1]))
+            return list(cached[1])
+        if status != 'DIGEST' or not digest:
+            raise SSHExecutionError(f"Unexpected reply from cached mount check: {header[:80]!r}")
+
+        cache.record_miss()
+        mounts = self._parse_mount_table(body)
+        ro_mounts = self.find_read_only_mounts(self.filter_mounts(mounts, config))
+        cache.put(key, digest, ro_mounts)
         return ro_mounts
 
 
-def parse_arguments() -> CheckConfig:
+def check_host(
+    config: CheckConfig,
+    ssh_config: SSHConfig,
+    pool: Optional[SSHConnectionPool] = None,
+    cache: Optional[MountTableCache] = None,
+) -> HostReport:
+    """
+    Runs the mount check on one host.
+
+    Args:
+        config: Mount table path and filters.
+        ssh_config: The host to check.
+        pool: Connection pool to reuse connections from.
+        cache: Mount table digest cache; unchanged tables are not re-read.
+
+    Returns:
+        HostReport for the host; SSH failures are reported, not raised.
+    """
+    mount_service = MountService(SSHCommandExecutor(ssh_config, pool=pool))
+    try:
+        ro_mounts = mount_service.check_read_only(config, cache)
+    except SSHExecutionError as e:
+        return HostReport(host=ssh_config.host, exit_code=EXIT_ERROR, error=str(e))
+    return HostReport(
+        host=ssh_config.host,
+        exit_code=EXIT_CRITICAL if ro_mounts else EXIT_OK,
+        ro_mounts=ro_mounts,
+    )
+
+
+def load_hosts_file(path: str, defaults: SSHConfig) -> List[SSHConfig]:
+    """
+    Reads a fleet inventory of one ``[user@]host[:port]`` per line.
+
+    Blank lines and ``#`` comments are ignored; missing users, ports and all
+    authentication settings come from ``defaults``.
+
+    Args:
+        path: Path to the hosts file.
+        defaults: SSH settings shared by all hosts.
+
+    Returns:
+        One SSHConfig per host, in file order.
+
+    Raises:
+        ConfigurationError: If the file cannot be read or a line is invalid.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError as e:
+        raise ConfigurationError(f"Cannot read hosts file {path}: {e}")
+
+    hosts = []
+    for number, line in enumerate(lines, 1):
+        entry = line.split('#', 1)[0].strip()
+        if not entry:
+            continue
+        user, _, address = entry.rpartition('@')
+        host, _, port = address.partition(':')
+        if not host or (port and not port.isdigit()):
+            raise ConfigurationError(f"Invalid host on line {number} of {path}: {entry!r}")
+        hosts.append(SSHConfig(
+            host=host,
+            user=user or defaults.user,
+            port=int(port) if port else defaults.port,
+            identity_file=defaults.identity_file,
+            password=defaults.password,
+            timeout=defaults.timeout,
+        ))
+    return hosts
+
+
+class FleetSweeper:
+    """Checks many hosts concurrently with a per-host time budget.
+
+    Hosts are checked on a thread pool sharing one SSH connection pool, so
+    repeated sweeps skip the key exchange. A host still running when its
+    budget is spent is reported as an error and its connection is closed
+    so the blocked read fails; ``sweep`` waits for those threads before
+    returning, so the pool and cache are not used after it.
+    """
+
+    def __init__(
+        self,
+        pool: SSHConnectionPool,
+        max_workers: int = DEFAULT_SWEEP_WORKERS,
+        host_timeout: float = DEFAULT_HOST_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+        cache: Optional[MountTableCache] = None,
+    ):
+        """
+        Initialize the sweeper.
+
+        Args:
+            pool: SSH connection pool shared by all checks.
+            max_workers: Maximum number of hosts checked at once.
+            host_timeout: Seconds a single host may take.
+            clock: Monotonic clock, replaceable for testing.
+            cache: Mount table digest cache shared by all checks.
+        """
+        self._pool = pool
+        self._cache = cache
+        self._max_workers = max_workers
+        self._host_timeout = host_timeout
+        self._clock = clock
+
+    def sweep(self, config: CheckConfig, hosts: Sequence[SSHConfig]) -> List[HostReport]:
+        """
+        Checks every host.
+
+        Args:
+            config: Mount table path and filters.
+            hosts: Hosts to check.
+
+        Returns:
+            One HostReport per host, in the same order as ``hosts``.
+        """
+        reports: List[Optional[HostReport]] = [None] * len(hosts)
+        started: Dict[int, float] = {}
+        started_lock = threading.Lock()
+
+        def run(index: int) -> HostReport:
+            with started_lock:
+                started[index] = self._clock()
+            return check_host(config, hosts[index], self._pool, self._cache)
+
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(self._max_workers, len(hosts))),
+            thread_name_prefix="readonly-sweep",
+        )
+        try:
+            pending: Dict[Future, int] = {executor.submit(run, i): i for i in range(len(hosts))}
+            while pending:
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        reports[index] = future.result()
+                    except Exception as e:
+                        logger.exception(f"Mount check failed for {hosts[index].host}")
+                        reports[index] = HostReport(host=hosts[index].host, exit_code=EXIT_ERROR, error=str(e))
+
+                now = self._clock()
+                with started_lock:
+                    started_at = dict(started)
+                for future, index in list(pending.items()):
+                    if index in started_at and now - started_at[index] > self._host_timeout:
+                        del pending[future]
+                        self._pool.interrupt(hosts[index])
+                        reports[index] = HostReport(
+                            host=hosts[index].host,
+                            exit_code=EXIT_ERROR,
+                            error=f"timed out after {self._host_timeout:g}s",
+                        )
+        finally:
+            # Interrupted hosts fail fast; the rest are bounded by the SSH
+            # timeouts. Waiting keeps workers off the pool and cache once
+            # the caller closes or saves them.
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return [report for report in reports if report is not None]
+
+
+def summarize_fleet(reports: Sequence[HostReport]) -> Tuple[int, str]:
+    """
+    Builds the Nagios-style summary of a fleet sweep.
+
+    The exit code is the worst of all hosts, CRITICAL over WARNING over
+    ERROR (UNKNOWN) over OK.
+
+    Args:
+        reports: Reports of every host.
+
+    Returns:
+        Tuple of (exit code, output): a status line with performance data,
+        followed by one line per host with a problem.
+    """
+    exit_code = max((r.exit_code for r in reports), key=EXIT_SEVERITY.__getitem__, default=EXIT_OK)
+    ro_hosts = [r for r in reports if r.ro_mounts]
+    failed_hosts = [r for r in reports if r.error]
+    label = {EXIT_OK: "OK", EXIT_WARNING: "WARNING", EXIT_CRITICAL: "CRITICAL", EXIT_ERROR: "UNKNOWN"}[exit_code]
+
+    status = f"RO_MOUNTS {label} - {len(ro_hosts)}/{len(reports)} hosts with ro mounts"
+    if failed_hosts:
+        status += f", {len(failed_hosts)} unreachable"
+    status += (
+        f" | hosts={len(reports)} ro_hosts={len(ro_hosts)} "
+        f"errors={len(failed_hosts)} ok={len(reports) - len(ro_hosts) - len(failed_hosts)}"
+    )
+
+    lines = [status]
+    for report in ro_hosts:
+        ro_devices = ', '.join(f"{mount.device} on {mount.mountpoint}" for mount in report.ro_mounts)
+        lines.append(f"{report.host}: CRITICAL - {ro_devices}")
+    for report in failed_hosts:
+        lines.append(f"{report.host}: UNKNOWN - {report.error}")
+    return exit_code, "\n".join(lines)
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None) -> CheckConfig:
     """
     Parses command-line arguments into a configuration object.
     
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+
     Returns:
         CheckConfig object with parsed arguments.
     """
-    parser = argparse.ArgumentParser(description='Check read-only mounts on a remote system.')
-    
-    # SSH connection options
-    ssh_group = parser.add_argument_group('SSH Options')
-    ssh_group.add_argument('--host', '-H', required=True, help='SSH Remote host')
-    ssh_group.add_argument('--user', '-u', default='root', help='SSH Remote user (default: root)')
-    ssh_group.add_argument('--port', '-p', type=int, default=22, help='SSH Remote port (default: 22)')
-    ssh_group.add_argument('--identity', '-i', help='SSH identity file')
-    ssh_group.add_argument('--password', help='SSH password (not recommended, use identity file instead)')
-    ssh_group.add_argument('--timeout', type=int, default=10, help='SSH connection timeout in seconds (default: 10)')
-    
-    # Mount check options
-    mount_group = parser.add_argument_group('Mount Check Options')
-    mount_group.add_argument('--mount-table', '-m', default='/proc/mounts', 
-                            help='Mount table path (default: /proc/mounts)')
-    mount_group.add_argument('--partition', '-P', action='append', dest='part_filter',
-                            help='Pattern of partition to check (may be repeated)')
-    mount_group.add_argument('--exclude', '-x', dest='exclude',
-                            help='Pattern of partition to ignore (only when --partition not used)')
-    mount_group.add_argument('--exclude-type', '-X', action='append', dest='exclude_type',
-                            help='File system types to exclude (may be repeated)')
-    
-    # Backward compatibility (old parameter names)
-    parser.add_argument('-sh', dest='sHost', help=argparse.SUPPRESS)
-    parser.add_argument('-su', dest='sUser', help=argparse.SUPPRESS)
-    parser.add_argument('-sp', type=int, dest='sPort', help=argparse.SUPPRESS)
-    parser.add_argument('-mpath', dest='mtabPath', help=argparse.SUPPRESS)
-    parser.add_argument('-partition', action='append', dest='partFilter', help=argparse.SUPPRESS)
-
-    args = parser.parse_args()
+    args = parse_args(argv)
 
     # Handle backward compatibility
     host = args.host if args.host else args.sHost
@@ -352,11 +1270,8 @@ def parse_arguments() -> CheckConfig:
     mount_table = args.mount_table if args.mount_table else args.mtabPath
     part_filters = args.part_filter if args.part_filter else args.partFilter
 
-    if not host:
-        parser.error("SSH host is required (--host)")
-
     ssh_config = SSHConfig(
-        host=host,
+        host=host or '',
         user=user if user else 'root',
         port=port if port else 22,
         identity_file=args.identity,
@@ -374,32 +1289,75 @@ def parse_arguments() -> CheckConfig:
         mount_tab_path=mount_table if mount_table else '/proc/mounts',
         partition_filters=part_filters,
         exclude_filter=args.exclude,
-        exclude_types=exclude_types
+        exclude_types=exclude_types,
+        fleet=load_hosts_file(args.hosts_file, ssh_config) if args.hosts_file else [],
+        max_workers=args.workers,
+        host_timeout=args.host_timeout,
+        remote_filter=args.remote_filter,
+        mount_cache=args.mount_cache,
     )
 
 
-def main() -> int:
+def main(argv: Optional[Sequence[str]] = None) -> int:
     """
     Main script execution logic.
     
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+
+    Returns:
+        Exit code (0 for success, non-zero for errors).
+    """
+    # Log to stderr so the plugin's stdout holds only its status
+    setup_logging(log_level=os.getenv("OPSFORGE_LOG_LEVEL", "INFO"), stream=sys.stderr)
+    return run(argv)
+
+
+def run(
+    argv: Optional[Sequence[str]] = None,
+    *,
+    pool_factory: Callable[..., ContextManager[SSHConnectionPool]] = SSHConnectionPool,
+) -> int:
+    """
+    Checks one host or a fleet for read-only mounts and prints the result.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+        pool_factory: Called with ``SSHConnectionPool`` keyword arguments;
+            returns a context manager giving the pool. The agent passes
+            one that hands out its long-lived pool.
+
     Returns:
         Exit code (0 for success, non-zero for errors).
     """
-    # Set up logging
-    setup_logging(log_level=os.getenv("OPSFORGE_LOG_LEVEL", "INFO"))
-    
     try:
         # Parse arguments and set up services
-        config = parse_arguments()
+        config = parse_arguments(argv)
+        cache = MountTableCache(config.mount_cache) if config.mount_cache else None
+
+        if config.fleet:
+            logger.info(f"Checking for read-only mounts on {len(config.fleet)} hosts")
+            with pool_factory(max_connections=max(DEFAULT_POOL_MAX_CONNECTIONS, len(config.fleet))) as ssh_pool:
+                sweeper = FleetSweeper(ssh_pool, config.max_workers, config.host_timeout, cache=cache)
+                reports = sweeper.sweep(config, config.fleet)
+            if cache is not None:
+                cache.save()
+                logger.info(f"Mount cache: {cache.hits} unchanged, {cache.misses} changed or new")
+            exit_code, output = summarize_fleet(reports)
+            logger.info(f"Mount filter hits: {config.mount_filter.hit_counts()}")
+            print(output)
+            return exit_code
+
         logger.info(f"Checking for read-only mounts on {config.ssh_config.host}")
         
-        ssh_executor = SSHCommandExecutor(config.ssh_config)
-        mount_service = MountService(ssh_executor)
+        with pool_factory() as ssh_pool:
+            ssh_executor = SSHCommandExecutor(config.ssh_config, pool=ssh_pool)
+            mount_service = MountService(ssh_executor)
 
-        # Get and filter mounts
-        all_mounts = mount_service.get_remote_mounts(config.mount_tab_path)
-        filtered_mounts = mount_service.filter_mounts(all_mounts, config)
-        ro_mounts = mount_service.find_read_only_mounts(filtered_mounts)
+            # Get and filter mounts
+            ro_mounts = mount_service.check_read_only(config, cache)
+        if cache is not None:
+            cache.save()
 
         # Output results and set exit code
         if ro_mounts:
@@ -0,0 +1,191 @@
+"""
+Command-line options of the HTTP status code monitor.
+
+Kept apart from ``opsforge.http.http500`` and free of heavy imports, so
+``opsforge http500 --help`` and mistyped options are answered before
+``requests`` is loaded.
+"""
+
+import argparse
+import sys
+from typing import Optional, Sequence
+
+# Option defaults
+DEFAULT_TIMEOUT = 10  # seconds
+DEFAULT_RENOTIFY_INTERVAL = 3600.0  # seconds before re-alerting an ongoing incident
+DEFAULT_MAX_WORKERS = 32  # concurrent checks in multi-target mode
+DEFAULT_MAX_BODY_BYTES = 64 * 1024  # response bytes buffered per check
+DEFAULT_PER_HOST_LIMIT = 8  # async engine: checks in flight per host:port
+
+# Probe strategies: how much of a response a check asks for
+PROBE_GET = "get"  # plain GET
+PROBE_HEAD = "head"  # HEAD, falling back to GET if the server rejects it
+PROBE_RANGE = "range"  # GET with 'Range: bytes=0-0'
+PROBE_CONDITIONAL = "conditional"  # GET revalidating with ETag/Last-Modified
+PROBE_STRATEGIES = (PROBE_GET, PROBE_HEAD, PROBE_RANGE, PROBE_CONDITIONAL)
+
+
+def build_parser(serve: bool = False) -> argparse.ArgumentParser:
+    """
+    Builds the argument parser for one-shot or serve mode.
+
+    Args:
+        serve: Whether to add the scheduler options of ``serve`` mode.
+
+    Returns:
+        The configured ArgumentParser.
+    """
+    if serve:
+        parser = argparse.ArgumentParser(
+            prog="opsforge-http500 serve",
+            description="Continuously monitor HTTP status codes and notify via email.",
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            description="Monitor HTTP status codes on a server and notify via email.",
+            epilog="Run 'serve --help' for the long-running scheduler mode.",
+        )
+    parser.add_argument("--email", required=True, help="Destination email address for notifications")
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument("--host", help="Host address (e.g., example.com or IP) to check")
+    target_group.add_argument(
+        "--targets-file",
+        help="YAML or CSV file of targets (host, port, scheme, path, headers, interval) to check concurrently"
+    )
+    parser.add_argument("--port", type=int, default=None, help="Port number (default: 80 for http, 443 for https)")
+    parser.add_argument(
+        "--scheme", 
+        choices=["http", "https"], 
+        default=None, 
+        help="Protocol scheme (default: http for port 80, https for 443/other)"
+    )
+    parser.add_argument(
+        "--path",
+        default="/",
+        help="Path to check (default: /)"
+    )
+    parser.add_argument(
+        "--header",
+        action="append",
+        dest="headers",
+        help="Add custom HTTP header (format: 'Header-Name: value'). Can be used multiple times."
+    )
+    parser.add_argument(
+        "--probe",
+        choices=PROBE_STRATEGIES,
+        default=PROBE_GET,
+        help="Request used per check: get, head (falls back to GET if rejected), "
+        "range (first byte only) or conditional (ETag/Last-Modified revalidation); "
+        "a target's own 'probe' wins (default: get)"
+    )
+    parser.add_argument(
+        "--codes",
+        type=int,
+        nargs="+",
+        default=[500, 502, 503, 504],  # Default to common server error codes
+        dest="alert_codes",
+        help="HTTP status codes to trigger alerts (default: 500 502 503 504)",
+    )
+    parser.add_argument(
+        "--timeout", 
+        type=int, 
+        default=DEFAULT_TIMEOUT, 
+        help=f"Request timeout in seconds (default: {DEFAULT_TIMEOUT})"
+    )
+    parser.add_argument(
+        "--state-file",
+        help="SQLite file remembering alert state between runs, so each incident is notified once"
+        + (" (default: in memory)" if serve else "")
+    )
+    parser.add_argument(
+        "--renotify-interval",
+        type=float,
+        default=DEFAULT_RENOTIFY_INTERVAL,
+        help=f"Seconds before re-notifying a target that is still failing; 0 never re-notifies (default: {DEFAULT_RENOTIFY_INTERVAL:.0f})"
+    )
+    parser.add_argument(
+        "--no-recovery",
+        action="store_true",
+        help="Do not notify when an alerting target recovers"
+    )
+    parser.add_argument(
+        "--digest-window",
+        type=float,
+        default=0.0,
+        help="Seconds to coalesce alerts into one digest email per recipient (default: 0, no digest)"
+    )
+    parser.add_argument(
+        "--max-body-bytes",
+        type=int,
+        default=DEFAULT_MAX_BODY_BYTES,
+        help=f"Maximum response body bytes read per check; 0 reads everything (default: {DEFAULT_MAX_BODY_BYTES})"
+    )
+    parser.add_argument(
+        "--alert-bodies-only",
+        action="store_true",
+        help="Only keep response bodies for alert status codes"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Maximum concurrent checks (default: {DEFAULT_MAX_WORKERS})"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Write latency percentiles, error and alert counts to this file in Prometheus text format"
+        + (" (rewritten every 15s)" if serve else "")
+    )
+    if serve:
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            help="Serve metrics on http://127.0.0.1:PORT/metrics"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60.0,
+            help="Default seconds between checks of one target; a target's own 'interval' wins (default: 60)"
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=0.1,
+            help="Fraction of the interval added at random to each check (default: 0.1)"
+        )
+    else:
+        parser.add_argument(
+            "--engine",
+            choices=["threads", "async"],
+            default="threads",
+            help="Concurrency engine for --targets-file: worker threads or an asyncio event loop (default: threads)"
+        )
+        parser.add_argument(
+            "--per-host-limit",
+            type=int,
+            default=DEFAULT_PER_HOST_LIMIT,
+            help=f"Maximum concurrent checks per host:port with --engine async (default: {DEFAULT_PER_HOST_LIMIT})"
+        )
+    parser.add_argument(
+        "--no-verify-ssl",
+        action="store_true",
+        help="Disable SSL certificate verification"
+    )
+    return parser
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parses one-shot or (after a leading ``serve``) serve mode arguments.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+
+    Returns:
+        The parsed arguments.
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["serve"]:
+        return build_parser(serve=True).parse_args(argv[1:])
+    return build_parser().parse_args(argv)
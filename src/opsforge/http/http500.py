@@ -11,31 +11,79 @@ For more options:
     $ python -m opsforge.http.http500 --help
 """
 
+import asyncio
+import contextlib
+import csv
+import functools
 import logging
 import os
+import queue
+import signal
 import smtplib
+import sys
 import argparse
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
-from typing import List, Optional, Dict, Union, Tuple
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Iterable, List, Optional, Dict, Sequence, Union, Tuple
 from dataclasses import dataclass, field
 
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
 
 from opsforge.common.logging import setup_logging, get_logger
 from opsforge.common.exceptions import (
     OpsForgeError,
+    ConfigurationError,
     NetworkError,
     AuthenticationError,
 )
+from opsforge.http.args import (
+    DEFAULT_MAX_BODY_BYTES,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_PER_HOST_LIMIT,
+    DEFAULT_RENOTIFY_INTERVAL,
+    DEFAULT_TIMEOUT,
+    PROBE_CONDITIONAL,
+    PROBE_GET,
+    PROBE_HEAD,
+    PROBE_RANGE,
+    PROBE_STRATEGIES,
+    build_parser,
+)
+from opsforge.http.metrics import CheckMetrics, MetricsServer, TextfileWriter
+from opsforge.http.state import AlertStateStore, TargetState
 
 # Get logger for this module
 logger = get_logger(__name__)
 
 # Constants
-DEFAULT_TIMEOUT = 10  # seconds
+EXIT_OK = 0
+EXIT_CRITICAL = 2
+EXIT_UNKNOWN = 3
 MAX_ERROR_CONTENT_LENGTH = 500  # max chars for email body
 DEFAULT_SMTP_PORT = 587  # Updated to a more secure default (TLS)
 DEFAULT_SMTP_SERVER = "localhost"
+DEFAULT_NOTIFY_QUEUE_SIZE = 10000  # alerts waiting for the mail worker
+DEFAULT_SMTP_IDLE_TIMEOUT = 30.0  # seconds before a pooled SMTP connection closes
+DEFAULT_POOL_SIZE = 10  # keep-alive connections per host:port
+DEFAULT_MAX_SESSIONS = 256  # host:port sessions kept by one HttpChecker
+DEFAULT_USER_AGENT = "OpsForge HTTP Monitor/1.0"
+READ_CHUNK_SIZE = 16 * 1024  # bytes per read when streaming bodies
+DEFAULT_MAX_IN_FLIGHT = 500  # async engine: checks in flight across all hosts
+
+# Fallbacks of the probe strategies (defined in opsforge.http.args)
+HEAD_FALLBACK_CODES = frozenset({405, 501})  # HEAD not allowed / not implemented
+RANGE_FALLBACK_CODES = frozenset({416})  # range not satisfiable, e.g. empty body
 
 
 # Domain / Value Objects
@@ -48,6 +96,8 @@ class CheckTarget:
     scheme: str  # 'http' or 'https'
     path: str = "/"  # Path to check
     headers: Dict[str, str] = field(default_factory=dict)  # Custom headers
+    interval: Optional[float] = None  # Seconds between checks in serve mode
+    probe: str = PROBE_GET  # One of PROBE_STRATEGIES
     
     def get_url(self) -> str:
         """Constructs the full URL for the check."""
@@ -64,6 +114,7 @@ class CheckResult:
     content: Optional[str] = None
     error_message: Optional[str] = None
     response_time: Optional[float] = None  # Response time in seconds
+    truncated: bool = False  # True if content was cut at the byte budget
 
 
 @dataclass(frozen=True)
@@ -100,24 +151,248 @@ class NotificationError(OpsForgeError):
         super().__init__(f"Notification error: {message}")
 
 
+@dataclass(frozen=True)
+class BodyLimit:
+    """How much of a response body a checker keeps."""
+
+    max_bytes: Optional[int] = DEFAULT_MAX_BODY_BYTES  # None means unlimited
+    status_codes: Optional[Iterable[int]] = None  # None keeps every body
+
+    def __post_init__(self) -> None:
+        if self.status_codes is not None:
+            object.__setattr__(self, "status_codes", frozenset(self.status_codes))
+
+    def keeps(self, status_code: int) -> bool:
+        """Returns whether the body of a response with this status is kept."""
+        return self.status_codes is None or status_code in self.status_codes
+
+
+def _decode_body(data: bytes, encoding: Optional[str]) -> str:
+    """Decodes a (possibly truncated) body, replacing undecodable bytes."""
+    try:
+        return data.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return data.decode("utf-8", errors="replace")
+
+
 # Services / Interfaces
+class ProbePlanner:
+    """Chooses the request for each check according to the target's probe.
+
+    Remembers, per URL, servers that mishandle HEAD or byte ranges (those
+    are checked with a plain GET from then on) and the ETag/Last-Modified
+    validators of conditional probes. A revalidated check reports the
+    server's 304 status with no content. Safe to share between threads.
+    """
+
+    def __init__(self) -> None:
+        """Initialize with no remembered fallbacks or validators."""
+        self._lock = threading.Lock()
+        self._fallbacks: set = set()  # (probe, url) pairs downgraded to GET
+        self._validators: Dict[str, Dict[str, str]] = {}
+
+    def plan(self, target: CheckTarget) -> Tuple[str, Dict[str, str]]:
+        """
+        Returns the request method and headers for the next check.
+
+        Args:
+            target: The target about to be checked.
+
+        Returns:
+            Tuple of (HTTP method, request headers including the target's).
+        """
+        url = target.get_url()
+        headers = dict(target.headers)
+        with self._lock:
+            if (target.probe, url) in self._fallbacks:
+                return "GET", headers
+            if target.probe == PROBE_HEAD:
+                return "HEAD", headers
+            if target.probe == PROBE_RANGE:
+                headers.setdefault("Range", "bytes=0-0")
+            elif target.probe == PROBE_CONDITIONAL:
+                headers.update(self._validators.get(url, {}))
+        return "GET", headers
+
+    def needs_fallback(self, target: CheckTarget, method: str, status: int) -> bool:
+        """
+        Records a mishandled probe and says whether to retry with GET.
+
+        Args:
+            target: The target that was checked.
+            method: The method of the request that was sent.
+            status: The status code it returned.
+
+        Returns:
+            True if the check should be repeated as a plain GET.
+        """
+        if target.probe == PROBE_HEAD and method == "HEAD":
+            fallback = status in HEAD_FALLBACK_CODES
+        elif target.probe == PROBE_RANGE and method == "GET":
+            fallback = status in RANGE_FALLBACK_CODES
+        else:
+            fallback = False
+        if fallback:
+            with self._lock:
+                self._fallbacks.add((target.probe, target.get_url()))
+            logger.info(
+                f"{target.get_url()} answered the {target.probe} probe with {status}; "
+                f"using GET from now on"
+            )
+        return fallback
+
+    def remember(self, target: CheckTarget, status: int, headers: Any) -> None:
+        """
+        Stores the validators of a conditional probe's response.
+
+        Args:
+            target: The target that was checked.
+            status: The response status code.
+            headers: The response headers (any case-insensitive mapping).
+        """
+        if target.probe != PROBE_CONDITIONAL or not 200 <= status < 300:
+            return
+        validators = {}
+        if headers.get("ETag"):
+            validators["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = headers["Last-Modified"]
+        with self._lock:
+            if validators:
+                self._validators[target.get_url()] = validators
+            else:
+                self._validators.pop(target.get_url(), None)
+
+
 class HttpChecker:
-    """Performs HTTP checks against a target."""
+    """Performs HTTP checks against a target.
+
+    One pooled ``requests.Session`` is kept per scheme/host/port, so
+    repeated checks against the same endpoint reuse keep-alive connections
+    and TLS sessions. At most ``max_sessions`` are kept; the least
+    recently used one is closed when another endpoint is checked. The
+    checker is safe to share between worker threads; call ``close()`` (or
+    use it as a context manager) to release the pools.
+    """
 
-    def __init__(self, timeout: int = DEFAULT_TIMEOUT, verify_ssl: bool = True):
+    def __init__(
+        self,
+        timeout: int = DEFAULT_TIMEOUT,
+        verify_ssl: bool = True,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_body_bytes: Optional[int] = DEFAULT_MAX_BODY_BYTES,
+        body_status_codes: Optional[Iterable[int]] = None,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+    ):
         """
         Initialize the HTTP checker.
         
         Args:
             timeout: Request timeout in seconds.
             verify_ssl: Whether to verify SSL certificates.
+            pool_size: Maximum keep-alive connections kept per host:port.
+            max_body_bytes: Maximum response body bytes kept per check;
+                None reads the whole body.
+            body_status_codes: If given, only responses with these status
+                codes have their body kept; others get ``content=None``.
+            max_sessions: Maximum host:port sessions (and their connection
+                pools) kept open.
         """
         self._timeout = timeout
         self._verify_ssl = verify_ssl
+        self._pool_size = pool_size
+        self._body_limit = BodyLimit(max_body_bytes, body_status_codes)
+        self._max_sessions = max(1, max_sessions)
+        self._sessions: "OrderedDict[Tuple[str, str, int], requests.Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._probes = ProbePlanner()
+
+    def __enter__(self) -> "HttpChecker":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _get_session(self, target: CheckTarget) -> requests.Session:
+        """
+        Returns the long-lived session for the target's host:port.
+
+        Args:
+            target: The target about to be checked.
+
+        Returns:
+            A pooled session dedicated to the target's endpoint.
+        """
+        key = (target.scheme, target.host, target.port)
+        evicted = None
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self._pool_size
+                )
+                session.mount(f"{target.scheme}://", adapter)
+                session.headers["User-Agent"] = DEFAULT_USER_AGENT
+                self._sessions[key] = session
+                logger.debug("Opened connection pool for %s://%s:%s", target.scheme, target.host, target.port)
+                if len(self._sessions) > self._max_sessions:
+                    evicted = self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(key)
+        if evicted is not None:
+            # Closing drops the idle connections; a request still running
+            # on the session finishes and its connection is discarded
+            (scheme, host, port), old_session = evicted
+            old_session.close()
+            logger.debug("Closed least recently used connection pool for %s://%s:%s", scheme, host, port)
+        return session
+
+    def _read_body(self, response: requests.Response) -> Tuple[Optional[str], bool]:
+        """
+        Reads the streamed response body within the byte budget.
+
+        Bodies that are not kept are still drained up to the budget, so
+        small responses leave their connection in the keep-alive pool.
+        Anything longer is cut off and its connection discarded.
+
+        Args:
+            response: A response opened with ``stream=True``.
+
+        Returns:
+            Tuple of (decoded content or None, whether it was truncated).
+        """
+        limit = self._body_limit
+        keep = limit.keeps(response.status_code)
+        data = bytearray()
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(chunk_size=READ_CHUNK_SIZE):
+            size += len(chunk)
+            if limit.max_bytes is not None and size > limit.max_bytes:
+                if keep:
+                    data += chunk[: len(chunk) - (size - limit.max_bytes)]
+                truncated = True
+                break
+            if keep:
+                data += chunk
+        if truncated:
+            response.close()
+        if not keep:
+            return None, False
+        return _decode_body(bytes(data), response.encoding), truncated
+
+    def close(self) -> None:
+        """Closes every pooled session and its connections."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
 
     def check(self, target: CheckTarget) -> CheckResult:
         """
-        Performs a GET request to the target URL.
+        Performs the target's probe (a GET by default) against its URL.
 
         Args:
             target: The target to check.
@@ -126,31 +401,37 @@ class HttpChecker:
             CheckResult containing success status, code, content, or error.
         """
         url = target.get_url()
-        logger.info(f"Checking URL: {url}")
+        logger.info("Checking URL: %s", url)
         try:
-            # Use a session for better connection reuse
-            with requests.Session() as session:
-                # Set default headers for the session
-                session.headers.update({
-                    'User-Agent': 'OpsForge HTTP Monitor/1.0',
-                    **target.headers
-                })
-                
-                # Send the request with timing
-                response = session.get(
-                    url, 
+            session = self._get_session(target)
+
+            while True:
+                method, headers = self._probes.plan(target)
+                # Send the request with timing; per-target headers are merged
+                # over the session defaults for this request only. The body is
+                # streamed so at most the byte budget is ever held in memory.
+                with session.request(
+                    method,
+                    url,
+                    headers=headers or None,
                     timeout=self._timeout,
                     verify=self._verify_ssl,
-                )
-                response_time = response.elapsed.total_seconds()
+                    stream=True,
+                ) as response:
+                    response_time = response.elapsed.total_seconds()
+                    content, truncated = self._read_body(response)
+                if not self._probes.needs_fallback(target, method, response.status_code):
+                    break
+            self._probes.remember(target, response.status_code, response.headers)
                 
-            logger.info(f"Check successful for {url}. Status: {response.status_code}, Time: {response_time:.2f}s")
+            logger.info("Check successful for %s. Status: %s, Time: %.2fs", url, response.status_code, response_time)
             return CheckResult(
                 target=target,
                 success=True,
                 status_code=response.status_code,
-                content=response.text,
+                content=content,
                 response_time=response_time,
+                truncated=truncated,
             )
         except requests.exceptions.Timeout:
             logger.error(f"Timeout occurred while checking {url}")
@@ -169,6 +450,199 @@ class HttpChecker:
             return CheckResult(target=target, success=False, error_message=f"Unexpected error: {e}")
 
 
+class AsyncHttpChecker:
+    """Performs HTTP checks on an asyncio event loop.
+
+    Requests share one aiohttp connection pool. A global semaphore caps the
+    number of checks in flight and a per-host:port semaphore keeps a large
+    sweep from piling onto a single server. A check only starts its timeout
+    once it holds both slots, so queued checks never time out while waiting.
+
+    Use as an async context manager, or call ``close()`` when done.
+    """
+
+    def __init__(
+        self,
+        timeout: int = DEFAULT_TIMEOUT,
+        verify_ssl: bool = True,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+        max_body_bytes: Optional[int] = DEFAULT_MAX_BODY_BYTES,
+        body_status_codes: Optional[Iterable[int]] = None,
+    ):
+        """
+        Initialize the async HTTP checker.
+
+        Args:
+            timeout: Request timeout in seconds.
+            verify_ssl: Whether to verify SSL certificates.
+            max_in_flight: Maximum concurrent checks across all hosts.
+            per_host_limit: Maximum concurrent checks per host:port.
+            max_body_bytes: Maximum response body bytes kept per check;
+                None reads the whole body.
+            body_status_codes: If given, only responses with these status
+                codes have their body kept; others get ``content=None``.
+
+        Raises:
+            HttpCheckError: If aiohttp is not installed.
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise HttpCheckError(
+                "The async engine requires aiohttp. "
+                "Install with: pip install opsforge[async]"
+            )
+        self._timeout = timeout
+        self._verify_ssl = verify_ssl
+        self._max_in_flight = max_in_flight
+        self._per_host_limit = per_host_limit
+        self._body_limit = BodyLimit(max_body_bytes, body_status_codes)
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._host_limits: Dict[Tuple[str, int], asyncio.Semaphore] = {}
+        self._probes = ProbePlanner()
+
+    async def __aenter__(self) -> "AsyncHttpChecker":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """Returns the shared client session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._max_in_flight,
+                limit_per_host=self._per_host_limit,
+                ssl=None if self._verify_ssl else False,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": DEFAULT_USER_AGENT},
+            )
+            self._in_flight = asyncio.Semaphore(self._max_in_flight)
+            self._host_limits.clear()
+        return self._session
+
+    def _host_limit(self, target: CheckTarget) -> asyncio.Semaphore:
+        """Returns the semaphore bounding checks against the target's host:port."""
+        key = (target.host, target.port)
+        semaphore = self._host_limits.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._per_host_limit)
+            self._host_limits[key] = semaphore
+        return semaphore
+
+    async def _read_body(
+        self, response: "aiohttp.ClientResponse"
+    ) -> Tuple[Optional[str], bool]:
+        """
+        Reads the response body within the byte budget.
+
+        Args:
+            response: The response whose body is still unread.
+
+        Returns:
+            Tuple of (decoded content or None, whether it was truncated).
+        """
+        limit = self._body_limit
+        keep = limit.keeps(response.status)
+        data = bytearray()
+        size = 0
+        truncated = False
+        while True:
+            chunk = await response.content.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if limit.max_bytes is not None and size > limit.max_bytes:
+                if keep:
+                    data += chunk[: len(chunk) - (size - limit.max_bytes)]
+                truncated = True
+                break
+            if keep:
+                data += chunk
+        if truncated:
+            response.close()
+        if not keep:
+            return None, False
+        return _decode_body(bytes(data), response.charset), truncated
+
+    async def close(self) -> None:
+        """Closes the shared session and its connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def check(self, target: CheckTarget) -> CheckResult:
+        """
+        Performs the target's probe (a GET by default) against its URL.
+
+        Args:
+            target: The target to check.
+
+        Returns:
+            CheckResult containing success status, code, content, or error.
+        """
+        url = target.get_url()
+        session = self._get_session()
+        assert self._in_flight is not None
+
+        async with self._in_flight, self._host_limit(target):
+            logger.info("Checking URL: %s", url)
+            try:
+                while True:
+                    method, headers = self._probes.plan(target)
+                    started = time.monotonic()
+                    async with session.request(
+                        method,
+                        url,
+                        headers=headers or None,
+                        timeout=aiohttp.ClientTimeout(total=self._timeout),
+                    ) as response:
+                        response_time = time.monotonic() - started
+                        content, truncated = await self._read_body(response)
+                    if not self._probes.needs_fallback(target, method, response.status):
+                        break
+                self._probes.remember(target, response.status, response.headers)
+
+                logger.info("Check successful for %s. Status: %s, Time: %.2fs", url, response.status, response_time)
+                return CheckResult(
+                    target=target,
+                    success=True,
+                    status_code=response.status,
+                    content=content,
+                    response_time=response_time,
+                    truncated=truncated,
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"Timeout occurred while checking {url}")
+                return CheckResult(target=target, success=False, error_message="Request timed out")
+            except aiohttp.ClientSSLError as e:
+                logger.error(f"SSL verification error while checking {url}: {e}")
+                return CheckResult(target=target, success=False, error_message=f"SSL verification error: {e}")
+            except aiohttp.ClientConnectionError as e:
+                logger.error(f"Connection error while checking {url}: {e}")
+                return CheckResult(target=target, success=False, error_message=f"Connection error: {e}")
+            except aiohttp.ClientError as e:
+                logger.error(f"An unexpected error occurred during HTTP check for {url}: {e}")
+                return CheckResult(target=target, success=False, error_message=f"HTTP request error: {e}")
+            except Exception as e:
+                logger.exception(f"An unexpected non-HTTP error occurred during check for {url}")
+                return CheckResult(target=target, success=False, error_message=f"Unexpected error: {e}")
+
+    async def check_many(self, targets: Sequence[CheckTarget]) -> List[CheckResult]:
+        """
+        Checks all targets concurrently within the configured limits.
+
+        Args:
+            targets: The targets to check.
+
+        Returns:
+            One CheckResult per target, in the same order as ``targets``.
+        """
+        return list(await asyncio.gather(*(self.check(t) for t in targets)))
+
+
 class Notifier:
     """Interface for notification services."""
 
@@ -191,6 +665,39 @@ class EmailNotifier(Notifier):
         self._config = smtp_config
         self._details = details
 
+    def _build_message(self, subject: str, body: str, recipient: str) -> MIMEText:
+        """Builds the email for one recipient."""
+        msg = MIMEText(body)
+        msg["Subject"] = subject
+        msg["From"] = self._config.sender_address
+        msg["To"] = recipient
+        return msg
+
+    def _open_connection(self) -> smtplib.SMTP:
+        """
+        Connects to the SMTP server, enabling TLS and logging in as configured.
+
+        Returns:
+            A ready-to-use SMTP connection. The caller must close it.
+        """
+        smtp = smtplib.SMTP(self._config.server, self._config.port)
+        try:
+            # Enable TLS if configured (recommended for security)
+            if self._config.use_tls:
+                smtp.starttls()
+
+            # Login only if username and password are provided
+            if self._config.username and self._config.password:
+                logger.debug("Attempting SMTP login...")
+                smtp.login(self._config.username, self._config.password)
+                logger.debug("SMTP login successful.")
+            else:
+                logger.debug("Proceeding without SMTP authentication.")
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
+
     def notify(self, subject: str, body: str) -> None:
         """
         Sends an email notification.
@@ -202,28 +709,13 @@ class EmailNotifier(Notifier):
         Raises:
             NotificationError: If sending the email fails.
         """
-        msg = MIMEText(body)
-        msg["Subject"] = subject
-        msg["From"] = self._config.sender_address
-        msg["To"] = self._details.recipient_email
+        msg = self._build_message(subject, body, self._details.recipient_email)
 
         logger.info(f"Attempting to send email notification to {self._details.recipient_email}")
 
         try:
             # Use 'with' statement for automatic connection closing
-            with smtplib.SMTP(self._config.server, self._config.port) as smtp:
-                # Enable TLS if configured (recommended for security)
-                if self._config.use_tls:
-                    smtp.starttls()
-
-                # Login only if username and password are provided
-                if self._config.username and self._config.password:
-                    logger.debug("Attempting SMTP login...")
-                    smtp.login(self._config.username, self._config.password)
-                    logger.debug("SMTP login successful.")
-                else:
-                    logger.debug("Proceeding without SMTP authentication.")
-
+            with self._open_connection() as smtp:
                 # Send the email
                 smtp.sendmail(
                     self._config.sender_address,
@@ -246,22 +738,276 @@ class EmailNotifier(Notifier):
             raise NotificationError(f"Unexpected error sending email: {e}")
 
 
+@dataclass(frozen=True)
+class _QueuedAlert:
+    """An alert waiting in a QueuedEmailNotifier queue."""
+
+    recipient: str
+    subject: str
+    body: str
+    on_failure: Optional[Callable[[], None]] = None  # called if the alert is not delivered
+
+
+class QueuedEmailNotifier(EmailNotifier):
+    """Sends email from a background thread over one pooled SMTP connection.
+
+    ``notify()`` only enqueues the alert, so checks never wait on the mail
+    server. A worker thread delivers the queue over a single long-lived
+    connection, which is health-checked before reuse, re-opened when the
+    server drops it and closed after ``idle_timeout`` seconds without mail.
+
+    With a ``digest_window``, alerts that arrive within the window of the
+    first one are coalesced into one digest email per recipient.
+
+    Call ``close()`` (or use it as a context manager) to flush the queue.
+    """
+
+    _STOP = None  # queue sentinel
+
+    def __init__(
+        self,
+        smtp_config: SmtpConfig,
+        details: NotificationDetails,
+        digest_window: float = 0.0,
+        max_queue_size: int = DEFAULT_NOTIFY_QUEUE_SIZE,
+        idle_timeout: float = DEFAULT_SMTP_IDLE_TIMEOUT,
+    ):
+        """
+        Initialize the queued notifier.
+
+        Args:
+            smtp_config: SMTP server configuration.
+            details: Notification details (the default recipient).
+            digest_window: Seconds to collect alerts into one digest; 0
+                sends every alert on its own.
+            max_queue_size: Maximum alerts waiting; further alerts are
+                dropped and counted.
+            idle_timeout: Seconds an unused SMTP connection stays open.
+        """
+        super().__init__(smtp_config, details)
+        self._digest_window = digest_window
+        self._idle_timeout = idle_timeout
+        self._queue: "queue.Queue[Optional[_QueuedAlert]]" = queue.Queue(max_queue_size)
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._counter_lock = threading.Lock()  # notify() callers and the worker update the counters
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def __enter__(self) -> "QueuedEmailNotifier":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def notify(
+        self,
+        subject: str,
+        body: str,
+        recipient: Optional[str] = None,
+        on_failure: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Queues an email notification without waiting for delivery.
+
+        Args:
+            subject: The email subject line.
+            body: The email body text.
+            recipient: Overrides the configured recipient for this alert.
+            on_failure: Called (on the worker thread, or here if the queue
+                is full) when the alert could not be delivered.
+        """
+        self._ensure_worker()
+        alert = _QueuedAlert(recipient or self._details.recipient_email, subject, body, on_failure)
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+            logger.error(f"Notification queue full; dropped alert '{subject}'")
+            self._report_failure([alert])
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Delivers everything still queued and stops the worker thread.
+
+        Args:
+            timeout: Maximum seconds to wait for the queue to drain.
+        """
+        with self._worker_lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None:
+            self._queue.put(self._STOP)
+            worker.join(timeout)
+        logger.info(
+            f"Notifier closed: {self.sent} sent, {self.failed} failed, {self.dropped} dropped"
+        )
+
+    def _ensure_worker(self) -> None:
+        """Starts the delivery thread on first use."""
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="http500-notifier", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self) -> None:
+        """Worker loop: collects batches from the queue and delivers them."""
+        try:
+            while True:
+                try:
+                    alert = self._queue.get(timeout=self._idle_timeout)
+                except queue.Empty:
+                    self._disconnect()
+                    continue
+                if alert is self._STOP:
+                    break
+
+                batch = [alert]
+                stopping = self._collect_digest(batch)
+                self._deliver(batch)
+                if stopping:
+                    break
+        finally:
+            self._disconnect()
+
+    def _collect_digest(self, batch: List[_QueuedAlert]) -> bool:
+        """
+        Adds alerts arriving within the digest window to ``batch``.
+
+        Returns:
+            True if the stop sentinel was received while collecting.
+        """
+        if self._digest_window <= 0:
+            return False
+        deadline = time.monotonic() + self._digest_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                alert = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return False
+            if alert is self._STOP:
+                return True
+            batch.append(alert)
+
+    def _deliver(self, batch: List[_QueuedAlert]) -> None:
+        """Sends a batch, as one digest per recipient when it holds several alerts."""
+        by_recipient: Dict[str, List[_QueuedAlert]] = {}
+        for alert in batch:
+            by_recipient.setdefault(alert.recipient, []).append(alert)
+
+        for recipient, alerts in by_recipient.items():
+            if len(alerts) == 1:
+                subject, body = alerts[0].subject, alerts[0].body
+            else:
+                subject = f"🚨 {len(alerts)} server alerts"
+                separator = "\n\n" + "-" * 60 + "\n\n"
+                body = separator.join(f"{a.subject}\n\n{a.body}" for a in alerts)
+            try:
+                self._send(recipient, subject, body)
+                with self._counter_lock:
+                    self.sent += len(alerts)
+            except Exception as e:
+                with self._counter_lock:
+                    self.failed += len(alerts)
+                logger.error(f"Failed to send {len(alerts)} alert(s) to {recipient}: {e}")
+                self._report_failure(alerts)
+
+    @staticmethod
+    def _report_failure(alerts: List[_QueuedAlert]) -> None:
+        """Runs the failure callbacks of alerts that were not delivered."""
+        for alert in alerts:
+            if alert.on_failure is None:
+                continue
+            try:
+                alert.on_failure()
+            except Exception:
+                logger.exception(f"Failure callback for alert '{alert.subject}' raised")
+
+    def _connection(self) -> smtplib.SMTP:
+        """Returns the pooled connection, re-opening it if it went stale."""
+        if self._smtp is not None:
+            try:
+                status, _ = self._smtp.noop()
+                if status == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._disconnect()
+        self._smtp = self._open_connection()
+        logger.debug("Opened pooled SMTP connection")
+        return self._smtp
+
+    def _send(self, recipient: str, subject: str, body: str) -> None:
+        """Sends one email over the pooled connection, reconnecting once if dropped."""
+        msg = self._build_message(subject, body, recipient).as_string()
+        try:
+            self._connection().sendmail(self._config.sender_address, [recipient], msg)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self._disconnect()
+            self._connection().sendmail(self._config.sender_address, [recipient], msg)
+        logger.info(f"Notification email sent to {recipient}")
+
+    def _disconnect(self) -> None:
+        """Closes the pooled connection, if any."""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+        logger.debug("Closed pooled SMTP connection")
+
+
 # Application Service
 class ServerMonitor:
     """Orchestrates server checking and notification."""
 
-    def __init__(self, checker: HttpChecker, notifier: Notifier, alert_codes: List[int]):
+    def __init__(
+        self,
+        checker: Union[HttpChecker, AsyncHttpChecker],
+        notifier: Notifier,
+        alert_codes: List[int],
+        state_store: Optional[AlertStateStore] = None,
+        renotify_interval: Optional[float] = DEFAULT_RENOTIFY_INTERVAL,
+        notify_recovery: bool = True,
+        clock: Callable[[], float] = time.time,
+        metrics: Optional[CheckMetrics] = None,
+    ):
         """
         Initialize with HTTP checker, notifier, and alert codes.
         
         Args:
-            checker: HTTP checker to use.
+            checker: HTTP checker to use; an AsyncHttpChecker for
+                ``run_many_async()``.
             notifier: Notifier to use for alerts.
             alert_codes: List of status codes to trigger alerts.
+            state_store: Remembers alert state per target. With a store,
+                a failing target is notified once per incident instead of
+                on every check. Without one, every alerting check notifies.
+            renotify_interval: Seconds before a still-failing target is
+                notified again; None or 0 never re-notifies.
+            notify_recovery: Whether to notify when an alerting target
+                returns to a non-alert status.
+            clock: Wall clock used for state timestamps.
+            metrics: Records latency, error and alert counts per target.
         """
         self._checker = checker
         self._notifier = notifier
         self._alert_codes = set(alert_codes)  # Use a set for faster lookups
+        self._state_store = state_store
+        self._renotify_interval = renotify_interval
+        self._notify_recovery = notify_recovery
+        self._clock = clock
+        self._metrics = metrics
 
     def run_check_and_notify(self, target: CheckTarget) -> CheckResult:
         """
@@ -273,7 +1019,30 @@ class ServerMonitor:
         Returns:
             The CheckResult from the checker.
         """
-        result = self._checker.check(target)
+        checker = self._checker
+        if isinstance(checker, AsyncHttpChecker):
+            raise HttpCheckError("run_check_and_notify() requires a synchronous HttpChecker")
+        return self.process_result(checker.check(target))
+
+    def process_result(self, result: CheckResult) -> CheckResult:
+        """
+        Sends a notification if a completed check matched an alert code.
+
+        Args:
+            result: The result of a check, from any checker.
+
+        Returns:
+            The same CheckResult.
+        """
+        target = result.target
+
+        if self._metrics is not None:
+            self._metrics.record(
+                target.get_url(),
+                success=result.success,
+                response_time=result.response_time,
+                alerting=result.status_code in self._alert_codes,
+            )
 
         if not result.success:
             logger.warning(f"Check failed for {target.get_url()}: {result.error_message}")
@@ -283,45 +1052,390 @@ class ServerMonitor:
             logger.warning(f"Check succeeded but no status code received for {target.get_url()}")
             return result  # Cannot compare status code if none exists
 
-        if result.status_code in self._alert_codes:
+        alerting = result.status_code in self._alert_codes
+        action, previous = self._record_state(result, alerting)
+
+        if alerting:
             logger.warning(
                 f"Alert triggered for {target.get_url()}: "
                 f"Status code {result.status_code} matched target codes."
             )
+            if not action:
+                logger.info(f"Alert for {target.get_url()} already notified; suppressing")
+                return result
+
             subject = f"🚨 Server Alert ({result.status_code}) on {target.host}"
             
             # Include response time if available
             response_time_info = ""
             if result.response_time is not None:
                 response_time_info = f"**Response Time:** {result.response_time:.2f}s\n"
+
+            # Reminders say how long the incident has been going on
+            ongoing_info = ""
+            if action == "reminder" and previous is not None and previous.first_failure:
+                ongoing_info = f"**Failing Since:** {_format_timestamp(previous.first_failure)}\n"
                 
             body = f"""
             An alert condition was detected on {target.get_url()}:
 
             **Status Code:** {result.status_code}
             **Timestamp:** {logging.Formatter().formatTime(logging.LogRecord(None, None, "", 0, "", (), None, None))}
-            {response_time_info}
+            {response_time_info}{ongoing_info}
             **Response Content Snippet:**
             ```
             {(result.content or "")[:MAX_ERROR_CONTENT_LENGTH]}
-            {'...' if result.content and len(result.content) > MAX_ERROR_CONTENT_LENGTH else ''}
+            {'...' if result.truncated or (result.content and len(result.content) > MAX_ERROR_CONTENT_LENGTH) else ''}
             ```
             """
-            try:
-                self._notifier.notify(subject, body.strip())
-            except NotificationError as e:
-                # Log the failure, but the program continues
-                logger.error(f"Failed to send notification for {target.get_url()}: {e}")
+            # A queued notifier reports delivery failures later, from its worker
+            forget = functools.partial(self._forget_notification, target, self._last_notified(target))
+            if not self._send_notification(target, subject, body.strip(), on_failure=forget):
+                forget()
         else:
             logger.info(
                 f"Check OK for {target.get_url()}. "
                 f"Status code {result.status_code} is not in alert list."
             )
+            if action == "recovery" and previous is not None:
+                since = _format_timestamp(previous.first_failure) if previous.first_failure else "unknown"
+                subject = f"✅ Server Recovered ({result.status_code}) on {target.host}"
+                body = (
+                    f"{target.get_url()} returned status {result.status_code} "
+                    f"and is no longer alerting.\n\n"
+                    f"**Last Alert Status:** {previous.last_status}\n"
+                    f"**Failing Since:** {since}\n"
+                )
+                self._send_notification(target, subject, body)
             
         return result
 
+    def _record_state(
+        self, result: CheckResult, alerting: bool
+    ) -> Tuple[str, Optional[TargetState]]:
+        """
+        Updates the target's alert state and decides which email is due.
+
+        Args:
+            result: A successful check result.
+            alerting: Whether its status code is an alert code.
+
+        Returns:
+            Tuple of (action, previous state). The action is "alert" for a
+            new incident, "reminder" for a re-notification, "recovery" when
+            an incident ended, or "" when no email is due.
+        """
+        store = self._state_store
+        if store is None:
+            return ("alert" if alerting else ""), None
+
+        key = result.target.get_url()
+        now = self._clock()
+        with store.lock:
+            previous = store.get(key)
+            state = (previous or TargetState(key=key)).with_changes(
+                last_status=result.status_code, alerting=alerting
+            )
+            action = ""
+            if alerting and (previous is None or not previous.alerting):
+                state = state.with_changes(first_failure=now, last_notified=now)
+                action = "alert"
+            elif alerting:
+                last = previous.last_notified
+                if last is None or (
+                    self._renotify_interval and now - last >= self._renotify_interval
+                ):
+                    state = state.with_changes(last_notified=now)
+                    action = "reminder"
+            elif previous is not None and previous.alerting:
+                state = state.with_changes(first_failure=None)
+                if self._notify_recovery:
+                    state = state.with_changes(last_notified=now)
+                    action = "recovery"
+            store.put(state)
+        return action, previous
+
+    def _last_notified(self, target: CheckTarget) -> Optional[float]:
+        """Returns when the target was last notified, if there is a store."""
+        store = self._state_store
+        if store is None:
+            return None
+        with store.lock:
+            state = store.get(target.get_url())
+        return state.last_notified if state is not None else None
+
+    def _forget_notification(self, target: CheckTarget, notified_at: Optional[float] = None) -> None:
+        """
+        Clears the last notification time so a failed alert is retried.
+
+        Args:
+            target: The target whose alert was not delivered.
+            notified_at: The notification time recorded for the failed
+                alert; a newer notification recorded since is kept.
+        """
+        store = self._state_store
+        if store is None:
+            return
+        with store.lock:
+            state = store.get(target.get_url())
+            if state is not None and (notified_at is None or state.last_notified == notified_at):
+                store.put(state.with_changes(last_notified=None))
+
+    def _send_notification(
+        self,
+        target: CheckTarget,
+        subject: str,
+        body: str,
+        on_failure: Optional[Callable[[], None]] = None,
+    ) -> bool:
+        """
+        Sends a notification, logging rather than raising on failure.
+
+        Args:
+            target: The target the notification is about.
+            subject: The email subject line.
+            body: The email body text.
+            on_failure: Passed to a QueuedEmailNotifier, which reports
+                failed deliveries after ``notify()`` has returned.
+
+        Returns:
+            True if the notifier accepted the notification.
+        """
+        try:
+            if isinstance(self._notifier, QueuedEmailNotifier):
+                self._notifier.notify(subject, body, on_failure=on_failure)
+            else:
+                self._notifier.notify(subject, body)
+            return True
+        except OpsForgeError as e:
+            # Log the failure, but the program continues
+            logger.error(f"Failed to send notification for {target.get_url()}: {e}")
+            return False
+
+    def run_many(
+        self,
+        targets: Sequence[CheckTarget],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> List[CheckResult]:
+        """
+        Checks many targets concurrently over a bounded worker pool.
+
+        Args:
+            targets: The targets to check.
+            max_workers: Maximum number of checks in flight at once.
+
+        Returns:
+            One CheckResult per target, in the same order as ``targets``.
+        """
+        if not targets:
+            return []
+
+        started = time.monotonic()
+        workers = max(1, min(max_workers, len(targets)))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="http500-check"
+        ) as executor:
+            results = list(executor.map(self.run_check_and_notify, targets))
+
+        elapsed = time.monotonic() - started
+        rate = len(results) / elapsed * 60 if elapsed > 0 else float(len(results))
+        logger.info(
+            f"Checked {len(results)} targets with {workers} workers "
+            f"in {elapsed:.2f}s ({rate:.0f} checks/min)"
+        )
+        return results
+
+    async def run_many_async(self, targets: Sequence[CheckTarget]) -> List[CheckResult]:
+        """
+        Checks many targets on the running event loop.
+
+        Requires the monitor to have been built with an AsyncHttpChecker.
+        Results are processed as each check completes, so alerting does not
+        wait for the slowest target of the sweep.
+
+        Args:
+            targets: The targets to check.
+
+        Returns:
+            One CheckResult per target, in the same order as ``targets``.
+        """
+        checker = self._checker
+        if not isinstance(checker, AsyncHttpChecker):
+            raise HttpCheckError("run_many_async() requires an AsyncHttpChecker")
+        started = time.monotonic()
+
+        async def check_and_process(target: CheckTarget) -> CheckResult:
+            return self.process_result(await checker.check(target))
+
+        results = await asyncio.gather(*(check_and_process(t) for t in targets))
+
+        elapsed = time.monotonic() - started
+        rate = len(results) / elapsed * 60 if elapsed > 0 else float(len(results))
+        logger.info(
+            f"Checked {len(results)} targets on the event loop "
+            f"in {elapsed:.2f}s ({rate:.0f} checks/min)"
+        )
+        return list(results)
+
 
 # Configuration Loading
+def _format_timestamp(epoch_seconds: float) -> str:
+    """Formats epoch seconds as local time for notification bodies."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(epoch_seconds))
+
+
+def resolve_scheme_and_port(
+    scheme: Optional[str], port: Optional[int]
+) -> Tuple[str, int]:
+    """
+    Fills in whichever of scheme and port was not given.
+
+    Args:
+        scheme: 'http', 'https' or None.
+        port: Port number or None.
+
+    Returns:
+        Tuple of (scheme, port). Port 443 implies https; otherwise http is
+        assumed, and the port defaults to the well-known port for the scheme.
+    """
+    if scheme is None:
+        scheme = "https" if port == 443 else "http"
+    if port is None:
+        port = 443 if scheme == "https" else 80
+    return scheme, port
+
+
+def parse_headers(raw_headers: Optional[Sequence[str]]) -> Dict[str, str]:
+    """
+    Parses 'Name: value' strings into a header dictionary.
+
+    Args:
+        raw_headers: Header strings, e.g. from repeated --header options.
+
+    Returns:
+        Dictionary of header names to values. Malformed entries are skipped.
+    """
+    headers: Dict[str, str] = {}
+    for header in raw_headers or []:
+        try:
+            name, value = header.split(":", 1)
+            headers[name.strip()] = value.strip()
+        except ValueError:
+            logger.warning(f"Invalid header format: {header}. Should be 'Name: value'")
+    return headers
+
+
+def _target_from_mapping(
+    entry: Dict[str, Any], default_headers: Dict[str, str], default_probe: str = PROBE_GET
+) -> CheckTarget:
+    """
+    Builds a CheckTarget from one targets-file entry.
+
+    Args:
+        entry: Mapping with at least a 'host' key.
+        default_headers: Headers applied to every target; entry headers win.
+        default_probe: Probe used when the entry does not name one.
+
+    Returns:
+        The corresponding CheckTarget.
+
+    Raises:
+        ValueError: If the entry is missing a host or has invalid values.
+    """
+    host = str(entry.get("host") or "").strip()
+    if not host:
+        raise ValueError("missing 'host'")
+
+    port = entry.get("port")
+    scheme = entry.get("scheme") or None
+    if scheme is not None and scheme not in ("http", "https"):
+        raise ValueError(f"invalid scheme {scheme!r}")
+    scheme, port = resolve_scheme_and_port(
+        scheme, int(port) if port not in (None, "") else None
+    )
+
+    headers = dict(default_headers)
+    raw_headers = entry.get("headers")
+    if isinstance(raw_headers, dict):
+        headers.update({str(k): str(v) for k, v in raw_headers.items()})
+    elif raw_headers:
+        # CSV cells carry headers as 'Name: value; Other: value'
+        headers.update(parse_headers(str(raw_headers).split(";")))
+
+    probe = entry.get("probe") or default_probe
+    if probe not in PROBE_STRATEGIES:
+        raise ValueError(f"invalid probe {probe!r}")
+
+    interval = entry.get("interval")
+    return CheckTarget(
+        host=host,
+        port=port,
+        scheme=scheme,
+        path=entry.get("path") or "/",
+        headers=headers,
+        interval=float(interval) if interval not in (None, "") else None,
+        probe=probe,
+    )
+
+
+def load_targets_from_file(
+    file_path: Union[str, Path],
+    default_headers: Optional[Dict[str, str]] = None,
+    default_probe: str = PROBE_GET,
+) -> List[CheckTarget]:
+    """
+    Loads check targets from a YAML or CSV file.
+
+    YAML files hold a list of mappings (optionally under a top-level
+    ``targets`` key); CSV files need a header row. Both use the CheckTarget
+    field names: ``host`` (required), ``port``, ``scheme``, ``path``,
+    ``headers``, ``interval`` and ``probe``.
+
+    Args:
+        file_path: Path to the targets file (.yaml, .yml or .csv).
+        default_headers: Headers applied to every target.
+        default_probe: Probe for entries that do not name one.
+
+    Returns:
+        List of CheckTarget objects in file order.
+
+    Raises:
+        ConfigurationError: If the file cannot be read or an entry is invalid.
+    """
+    path = Path(file_path)
+    default_headers = default_headers or {}
+
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            if path.suffix.lower() == ".csv":
+                entries: Any = list(csv.DictReader(f))
+            else:
+                import yaml
+
+                entries = yaml.safe_load(f) or []
+    except OSError as e:
+        raise ConfigurationError(f"Cannot read targets file {path}: {e}")
+    except Exception as e:
+        raise ConfigurationError(f"Cannot parse targets file {path}: {e}")
+
+    if isinstance(entries, dict):
+        entries = entries.get("targets") or []
+    if not isinstance(entries, list):
+        raise ConfigurationError(f"Targets file {path} must contain a list of targets")
+
+    targets = []
+    for index, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ConfigurationError(f"Target #{index} in {path} is not a mapping")
+        try:
+            targets.append(_target_from_mapping(entry, default_headers, default_probe))
+        except ValueError as e:
+            raise ConfigurationError(f"Invalid target #{index} in {path}: {e}")
+
+    logger.info(f"Loaded {len(targets)} targets from {path}")
+    return targets
+
+
 def load_smtp_config_from_env() -> SmtpConfig:
     """
     Loads SMTP configuration securely from environment variables.
@@ -346,97 +1460,264 @@ def load_smtp_config_from_env() -> SmtpConfig:
     )
 
 
-def main() -> None:
-    """Parses arguments, sets up components, and runs the check."""
-    # Set up logging
-    setup_logging(log_level=os.getenv("OPSFORGE_LOG_LEVEL", "INFO"))
-    
-    parser = argparse.ArgumentParser(description="Monitor HTTP status codes on a server and notify via email.")
-    parser.add_argument("--email", required=True, help="Destination email address for notifications")
-    parser.add_argument("--host", required=True, help="Host address (e.g., example.com or IP) to check")
-    parser.add_argument("--port", type=int, default=None, help="Port number (default: 80 for http, 443 for https)")
-    parser.add_argument(
-        "--scheme", 
-        choices=["http", "https"], 
-        default=None, 
-        help="Protocol scheme (default: http for port 80, https for 443/other)"
+async def _run_async(
+    args: argparse.Namespace,
+    targets: Sequence[CheckTarget],
+    notifier: Notifier,
+    state_store: Optional[AlertStateStore],
+    metrics: Optional[CheckMetrics] = None,
+) -> List[CheckResult]:
+    """Runs one sweep of all targets with the async engine."""
+    async with AsyncHttpChecker(
+        timeout=args.timeout,
+        verify_ssl=not args.no_verify_ssl,
+        max_in_flight=args.workers,
+        per_host_limit=args.per_host_limit,
+        **_body_limit_kwargs(args),
+    ) as checker:
+        monitor = _build_monitor(args, checker, notifier, state_store, metrics)
+        return await monitor.run_many_async(targets)
+
+
+def _body_limit_kwargs(args: argparse.Namespace) -> Dict[str, Any]:
+    """Maps --max-body-bytes/--alert-bodies-only to checker keyword arguments."""
+    return {
+        "max_body_bytes": args.max_body_bytes or None,
+        "body_status_codes": args.alert_codes if args.alert_bodies_only else None,
+    }
+
+
+def _build_monitor(
+    args: argparse.Namespace,
+    checker: Union[HttpChecker, AsyncHttpChecker],
+    notifier: Notifier,
+    state_store: Optional[AlertStateStore],
+    metrics: Optional[CheckMetrics] = None,
+) -> ServerMonitor:
+    """Builds the ServerMonitor from parsed command-line options."""
+    return ServerMonitor(
+        checker=checker,
+        notifier=notifier,
+        alert_codes=args.alert_codes,
+        state_store=state_store,
+        renotify_interval=args.renotify_interval,
+        notify_recovery=not args.no_recovery,
+        metrics=metrics,
     )
-    parser.add_argument(
-        "--path",
-        default="/",
-        help="Path to check (default: /)"
-    )
-    parser.add_argument(
-        "--header",
-        action="append",
-        dest="headers",
-        help="Add custom HTTP header (format: 'Header-Name: value'). Can be used multiple times."
-    )
-    parser.add_argument(
-        "--codes",
-        type=int,
-        nargs="+",
-        default=[500, 502, 503, 504],  # Default to common server error codes
-        dest="alert_codes",
-        help="HTTP status codes to trigger alerts (default: 500 502 503 504)",
-    )
-    parser.add_argument(
-        "--timeout", 
-        type=int, 
-        default=DEFAULT_TIMEOUT, 
-        help=f"Request timeout in seconds (default: {DEFAULT_TIMEOUT})"
+
+
+def _targets_from_args(args: argparse.Namespace) -> List[CheckTarget]:
+    """
+    Builds the list of targets from --host or --targets-file options.
+
+    Raises:
+        ConfigurationError: If the targets file is invalid.
+    """
+    headers = parse_headers(args.headers)
+    if args.targets_file:
+        return load_targets_from_file(
+            args.targets_file, default_headers=headers, default_probe=args.probe
+        )
+    scheme, port = resolve_scheme_and_port(args.scheme, args.port)
+    return [
+        CheckTarget(
+            host=args.host, port=port, scheme=scheme, path=args.path, headers=headers, probe=args.probe
+        )
+    ]
+
+
+def summarize_results(results: Sequence[CheckResult], alert_codes: Iterable[int]) -> Tuple[int, str]:
+    """
+    Builds the Nagios-style summary of a one-shot run.
+
+    The exit code is CRITICAL if any target answered with an alert code,
+    otherwise UNKNOWN if any check could not be completed, otherwise OK.
+
+    Args:
+        results: Results of every target.
+        alert_codes: Status codes that trigger alerts.
+
+    Returns:
+        Tuple of (exit code, output): a status line with performance data,
+        followed by one line per target with a problem.
+    """
+    alert_codes = frozenset(alert_codes)
+    alerting = [r for r in results if r.success and r.status_code in alert_codes]
+    failed = [r for r in results if not r.success]
+    if alerting:
+        exit_code = EXIT_CRITICAL
+    elif failed:
+        exit_code = EXIT_UNKNOWN
+    else:
+        exit_code = EXIT_OK
+    label = {EXIT_OK: "OK", EXIT_CRITICAL: "CRITICAL", EXIT_UNKNOWN: "UNKNOWN"}[exit_code]
+
+    status = f"HTTP500 {label} - {len(alerting)}/{len(results)} targets returned alert codes"
+    if failed:
+        status += f", {len(failed)} unreachable"
+    status += (
+        f" | targets={len(results)} alerting={len(alerting)} "
+        f"errors={len(failed)} ok={len(results) - len(alerting) - len(failed)}"
     )
-    parser.add_argument(
-        "--no-verify-ssl",
-        action="store_true",
-        help="Disable SSL certificate verification"
+
+    lines = [status]
+    for result in alerting:
+        lines.append(f"{result.target.get_url()}: CRITICAL - HTTP {result.status_code}")
+    for result in failed:
+        lines.append(f"{result.target.get_url()}: UNKNOWN - {result.error_message}")
+    return exit_code, "\n".join(lines)
+
+
+def serve(argv: Sequence[str]) -> None:
+    """Runs the checks continuously on a schedule until SIGTERM/SIGINT.
+
+    Args:
+        argv: Command-line arguments following ``serve``.
+    """
+    # Imported here so one-shot runs do not pay for the scheduler
+    from opsforge.http.scheduler import CheckScheduler
+
+    args = build_parser(serve=True).parse_args(argv)
+
+    try:
+        check_targets = _targets_from_args(args)
+        email_notifier = QueuedEmailNotifier(
+            smtp_config=load_smtp_config_from_env(),
+            details=NotificationDetails(recipient_email=args.email),
+            digest_window=args.digest_window,
+        )
+        # A long-running process always deduplicates alerts
+        state_store = AlertStateStore(args.state_file)
+        metrics = CheckMetrics() if args.metrics_file or args.metrics_port is not None else None
+
+        with contextlib.ExitStack() as stack:
+            if metrics is not None and args.metrics_file:
+                stack.enter_context(TextfileWriter(metrics, args.metrics_file))
+            if metrics is not None and args.metrics_port is not None:
+                stack.enter_context(MetricsServer(metrics, args.metrics_port))
+            stack.enter_context(state_store)
+            stack.enter_context(email_notifier)
+            http_checker = stack.enter_context(HttpChecker(
+                timeout=args.timeout,
+                verify_ssl=not args.no_verify_ssl,
+                pool_size=max(DEFAULT_POOL_SIZE, args.workers),
+                **_body_limit_kwargs(args),
+            ))
+            monitor = _build_monitor(args, http_checker, email_notifier, state_store, metrics)
+            scheduler = CheckScheduler(
+                monitor,
+                check_targets,
+                interval=args.interval,
+                jitter=args.jitter,
+                max_workers=args.workers,
+            )
+
+            if threading.current_thread() is threading.main_thread():
+                for signum in (signal.SIGTERM, signal.SIGINT):
+                    signal.signal(signum, lambda *_: scheduler.stop())
+
+            scheduler.run()
+
+    except OpsForgeError as e:
+        logger.error(f"Configuration or setup error: {e}")
+    except Exception:
+        logger.exception("An unexpected error occurred in the serve loop.")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Parses arguments, sets up components, and runs the check(s).
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``). A
+            leading ``serve`` switches to the long-running scheduler mode.
+
+    Returns:
+        Nagios exit code of the run (see ``run``).
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # One-shot runs are Nagios plugins: stdout is reserved for the status
+    setup_logging(
+        log_level=os.getenv("OPSFORGE_LOG_LEVEL", "INFO"),
+        stream=sys.stdout if argv[:1] == ["serve"] else sys.stderr,
     )
+    return run(argv)
 
-    args = parser.parse_args()
 
-    # Determine scheme and port defaults if not provided
-    port = args.port
-    scheme = args.scheme
-    if scheme is None:
-        if port == 443:
-            scheme = "https"
-        else:
-            scheme = "http"  # Default to http if scheme unspecified and port isn't 443
-    if port is None:
-        port = 443 if scheme == "https" else 80  # Default port based on final scheme
-        
-    # Parse headers if provided
-    headers = {}
-    if args.headers:
-        for header in args.headers:
-            try:
-                name, value = header.split(":", 1)
-                headers[name.strip()] = value.strip()
-            except ValueError:
-                logger.warning(f"Invalid header format: {header}. Should be 'Name: value'")
+def run(
+    argv: Optional[Sequence[str]] = None,
+    *,
+    checker_factory: Callable[..., ContextManager[HttpChecker]] = HttpChecker,
+) -> int:
+    """Checks the targets once, printing a Nagios status line and details.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+        checker_factory: Called with the ``HttpChecker`` keyword arguments
+            for the synchronous engine; returns a context manager giving
+            the checker. The agent passes one that hands out long-lived
+            checkers instead of opening new connection pools.
+
+    Returns:
+        EXIT_CRITICAL if a target answered with an alert code, EXIT_UNKNOWN
+        if a check or the setup failed, EXIT_OK otherwise (and after
+        ``serve`` stops).
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] == "serve":
+        serve(argv[1:])
+        return EXIT_OK
+
+    args = build_parser().parse_args(argv)
 
     # Dependency Setup
     try:
-        check_target = CheckTarget(host=args.host, port=port, scheme=scheme, path=args.path, headers=headers)
+        check_targets = _targets_from_args(args)
         smtp_config = load_smtp_config_from_env()
         notification_details = NotificationDetails(recipient_email=args.email)
 
-        http_checker = HttpChecker(timeout=args.timeout, verify_ssl=not args.no_verify_ssl)
-        email_notifier = EmailNotifier(smtp_config=smtp_config, details=notification_details)
-
-        monitor = ServerMonitor(
-            checker=http_checker, notifier=email_notifier, alert_codes=args.alert_codes
+        email_notifier = QueuedEmailNotifier(
+            smtp_config=smtp_config,
+            details=notification_details,
+            digest_window=args.digest_window,
         )
+        state_store = AlertStateStore(args.state_file) if args.state_file else None
+        state_context = state_store or contextlib.nullcontext()
+        metrics = CheckMetrics() if args.metrics_file else None
 
-        # Run the Monitor
-        monitor.run_check_and_notify(check_target)
+        if args.engine == "async":
+            with state_context, email_notifier:
+                results = asyncio.run(_run_async(args, check_targets, email_notifier, state_store, metrics))
+        else:
+            with state_context, email_notifier, checker_factory(
+                timeout=args.timeout,
+                verify_ssl=not args.no_verify_ssl,
+                pool_size=max(DEFAULT_POOL_SIZE, args.workers),
+                **_body_limit_kwargs(args),
+            ) as http_checker:
+                monitor = _build_monitor(args, http_checker, email_notifier, state_store, metrics)
+
+                # Run the Monitor
+                if len(check_targets) == 1:
+                    results = [monitor.run_check_and_notify(check_targets[0])]
+                else:
+                    results = monitor.run_many(check_targets, max_workers=args.workers)
+        if metrics is not None:
+            metrics.write_textfile(args.metrics_file)
         logger.info("Monitoring check completed.")
 
+        exit_code, output = summarize_results(results, args.alert_codes)
+        print(output)
+        return exit_code
+
     except OpsForgeError as e:
         logger.error(f"Configuration or setup error: {e}")
+        print(f"HTTP500 UNKNOWN - {e}")
+        return EXIT_UNKNOWN
     except Exception as e:
         logger.exception("An unexpected error occurred in the main execution block.")
+        print(f"HTTP500 UNKNOWN - {e}")
+        return EXIT_UNKNOWN
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,373 @@
+"""
+Latency and throughput metrics for HTTP checks.
+
+This module records every check's response time into a fixed-memory,
+log-linear (HDR-style) histogram per target and exposes p50/p95/p99
+latencies, error and alert counts, and overall check throughput. Metrics
+can be written as a Prometheus text file (for the node_exporter textfile
+collector) or served from a small local HTTP endpoint.
+"""
+
+import http.server
+import os
+import tempfile
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from opsforge.common.logging import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Constants
+SUB_BUCKET_BITS = 6  # 64 linear sub-buckets: ~3% relative precision
+MAX_TRACKABLE_SECONDS = 3600.0  # larger values are clamped
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "opsforge_http"
+
+
+class LatencyHistogram:
+    """Log-linear histogram of durations with fixed memory.
+
+    Values are recorded in microseconds. The first ``2**SUB_BUCKET_BITS``
+    microseconds have one bucket each; every further power of two is split
+    into half as many equal buckets, so any recorded value is off by at most
+    about 3% regardless of magnitude, and the bucket array never grows.
+    Not thread-safe on its own; ``CheckMetrics`` serializes access.
+    """
+
+    def __init__(self, max_seconds: float = MAX_TRACKABLE_SECONDS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            max_seconds: Largest value tracked exactly; larger values are
+                counted in the last bucket.
+        """
+        self._sub_count = 1 << SUB_BUCKET_BITS
+        self._half_count = self._sub_count >> 1
+        self._max_value = int(max_seconds * 1_000_000)
+        self.counts = array("Q", bytes(8 * (self._index_of(self._max_value) + 1)))
+        self.total = 0
+        self.sum_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _index_of(self, value: int) -> int:
+        """Returns the bucket index for a value in microseconds."""
+        if value < self._sub_count:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        return self._sub_count + (shift - 1) * self._half_count + (value >> shift) - self._half_count
+
+    def _upper_bound(self, index: int) -> int:
+        """Returns the highest value in microseconds that maps to a bucket."""
+        if index < self._sub_count:
+            return index
+        shift, offset = divmod(index - self._sub_count, self._half_count)
+        shift += 1
+        return ((offset + self._half_count + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        """
+        Records one duration.
+
+        Args:
+            seconds: The duration; negative values are recorded as zero.
+        """
+        value = min(max(int(seconds * 1_000_000), 0), self._max_value)
+        self.counts[self._index_of(value)] += 1
+        self.total += 1
+        self.sum_seconds += max(seconds, 0.0)
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """
+        Returns the value below which ``quantile`` of recorded values fall.
+
+        Args:
+            quantile: A fraction between 0 and 1, e.g. 0.99.
+
+        Returns:
+            The duration in seconds, or None if nothing was recorded.
+        """
+        if self.total == 0:
+            return None
+        rank = max(1, int(quantile * self.total + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_bound(index) / 1_000_000, self.max_seconds)
+        return self.max_seconds
+
+
+@dataclass
+class TargetMetrics:
+    """Counters and latency histogram for one target."""
+
+    checks: int = 0
+    errors: int = 0  # checks that got no HTTP response
+    alerts: int = 0  # responses with an alert status code
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    @property
+    def error_rate(self) -> float:
+        """Fraction of checks that failed outright."""
+        return self.errors / self.checks if self.checks else 0.0
+
+
+class CheckMetrics:
+    """Thread-safe registry of per-target check metrics."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize an empty registry.
+
+        Args:
+            clock: Monotonic clock used to compute throughput.
+        """
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+        self._targets: Dict[str, TargetMetrics] = {}
+
+    def record(
+        self,
+        target: str,
+        success: bool,
+        response_time: Optional[float] = None,
+        alerting: bool = False,
+    ) -> None:
+        """
+        Records the outcome of one check.
+
+        Args:
+            target: Target label, usually its URL.
+            success: Whether an HTTP response was received.
+            response_time: Response time in seconds, if measured.
+            alerting: Whether the status code was an alert code.
+        """
+        with self._lock:
+            metrics = self._targets.get(target)
+            if metrics is None:
+                metrics = self._targets[target] = TargetMetrics()
+            metrics.checks += 1
+            if not success:
+                metrics.errors += 1
+            if alerting:
+                metrics.alerts += 1
+            if response_time is not None:
+                metrics.latency.record(response_time)
+
+    def checks_per_minute(self) -> float:
+        """Returns the average check throughput since the registry was created."""
+        elapsed = self._clock() - self._started
+        with self._lock:
+            total = sum(m.checks for m in self._targets.values())
+        return total / elapsed * 60 if elapsed > 0 else 0.0
+
+    def snapshot(
+        self, quantiles: Tuple[float, ...] = DEFAULT_QUANTILES
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Returns a summary per target.
+
+        Args:
+            quantiles: Latency quantiles to include, e.g. (0.5, 0.95, 0.99).
+
+        Returns:
+            Mapping of target to a dict with ``checks``, ``errors``,
+            ``alerts``, ``error_rate`` and ``p50``/``p95``/... in seconds.
+        """
+        with self._lock:
+            summary: Dict[str, Dict[str, Optional[float]]] = {}
+            for target, metrics in self._targets.items():
+                entry: Dict[str, Optional[float]] = {
+                    "checks": metrics.checks,
+                    "errors": metrics.errors,
+                    "alerts": metrics.alerts,
+                    "error_rate": metrics.error_rate,
+                }
+                for quantile in quantiles:
+                    entry[f"p{quantile * 100:g}"] = metrics.latency.percentile(quantile)
+                summary[target] = entry
+            return summary
+
+    def render_prometheus(self, quantiles: Tuple[float, ...] = DEFAULT_QUANTILES) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format.
+
+        Args:
+            quantiles: Latency quantiles exported in the summary metric.
+
+        Returns:
+            The exposition text.
+        """
+        lines: List[str] = [
+            f"# HELP {METRIC_PREFIX}_checks_total Checks performed.",
+            f"# TYPE {METRIC_PREFIX}_checks_total counter",
+        ]
+        with self._lock:
+            targets = sorted(self._targets.items())
+            for target, metrics in targets:
+                lines.append(f'{METRIC_PREFIX}_checks_total{{target="{_escape(target)}"}} {metrics.checks}')
+
+            lines += [
+                f"# HELP {METRIC_PREFIX}_check_errors_total Checks that got no HTTP response.",
+                f"# TYPE {METRIC_PREFIX}_check_errors_total counter",
+            ]
+            for target, metrics in targets:
+                lines.append(f'{METRIC_PREFIX}_check_errors_total{{target="{_escape(target)}"}} {metrics.errors}')
+
+            lines += [
+                f"# HELP {METRIC_PREFIX}_alerts_total Responses with an alert status code.",
+                f"# TYPE {METRIC_PREFIX}_alerts_total counter",
+            ]
+            for target, metrics in targets:
+                lines.append(f'{METRIC_PREFIX}_alerts_total{{target="{_escape(target)}"}} {metrics.alerts}')
+
+            lines += [
+                f"# HELP {METRIC_PREFIX}_response_seconds Response time of checks.",
+                f"# TYPE {METRIC_PREFIX}_response_seconds summary",
+            ]
+            for target, metrics in targets:
+                label = _escape(target)
+                histogram = metrics.latency
+                for quantile in quantiles:
+                    value = histogram.percentile(quantile)
+                    rendered = "NaN" if value is None else f"{value:.6f}"
+                    lines.append(
+                        f'{METRIC_PREFIX}_response_seconds{{target="{label}",quantile="{quantile:g}"}} {rendered}'
+                    )
+                lines.append(f'{METRIC_PREFIX}_response_seconds_sum{{target="{label}"}} {histogram.sum_seconds:.6f}')
+                lines.append(f'{METRIC_PREFIX}_response_seconds_count{{target="{label}"}} {histogram.total}')
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_checks_per_minute Average check throughput of this process.",
+            f"# TYPE {METRIC_PREFIX}_checks_per_minute gauge",
+            f"{METRIC_PREFIX}_checks_per_minute {self.checks_per_minute():.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Union[str, Path]) -> None:
+        """
+        Atomically writes the Prometheus text to a file.
+
+        The file is replaced in one rename, so a collector never reads a
+        partially written file.
+
+        Args:
+            path: Destination, e.g. in the node_exporter textfile directory.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except Exception:
+            os.unlink(tmp_name)
+            raise
+        logger.debug(f"Wrote metrics to {path}")
+
+
+def _escape(label_value: str) -> str:
+    """Escapes a Prometheus label value."""
+    return label_value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsServer:
+    """Serves ``CheckMetrics`` on ``/metrics`` from a background thread."""
+
+    def __init__(self, metrics: CheckMetrics, port: int, host: str = "127.0.0.1"):
+        """
+        Initialize the server (it starts listening immediately).
+
+        Args:
+            metrics: The registry to expose.
+            port: TCP port to listen on; 0 picks a free port.
+            host: Address to bind; loopback by default.
+        """
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                logger.debug(f"metrics: {format % args}")
+
+        self._httpd = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="http500-metrics", daemon=True
+        )
+
+    def __enter__(self) -> "MetricsServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Starts serving requests."""
+        self._thread.start()
+        logger.info(f"Serving metrics on http://{self._httpd.server_address[0]}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        """Stops the server and releases the port."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class TextfileWriter:
+    """Rewrites a metrics text file periodically from a background thread."""
+
+    def __init__(self, metrics: CheckMetrics, path: Union[str, Path], interval: float = 15.0):
+        """
+        Initialize the writer.
+
+        Args:
+            metrics: The registry to write.
+            path: Destination file.
+            interval: Seconds between writes.
+        """
+        self._metrics = metrics
+        self._path = path
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="http500-metrics-file", daemon=True)
+
+    def __enter__(self) -> "TextfileWriter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop_event.set()
+        self._thread.join()
+        self._write()
+
+    def _write(self) -> None:
+        try:
+            self._metrics.write_textfile(self._path)
+        except OSError as e:
+            logger.error(f"Failed to write metrics to {self._path}: {e}")
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            self._write()
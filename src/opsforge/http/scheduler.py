@@ -0,0 +1,215 @@
+"""
+Interval scheduler for long-running HTTP checks.
+
+This module drives ``ServerMonitor`` from a single long-lived process, so
+checkers, pooled sessions and notifiers stay warm between cycles instead of
+being rebuilt by cron for every check.
+
+Typical usage:
+    $ python -m opsforge.http.http500 serve --targets-file targets.yaml \\
+        --email admin@example.com --interval 60
+"""
+
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from opsforge.common.exceptions import ValidationError
+from opsforge.common.logging import get_logger
+from opsforge.http.http500 import (
+    DEFAULT_MAX_WORKERS,
+    CheckTarget,
+    ServerMonitor,
+)
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Constants
+DEFAULT_INTERVAL = 60.0  # seconds between checks of the same target
+DEFAULT_JITTER = 0.1  # fraction of the interval added at random to each run
+MAX_IDLE_WAIT = 1.0  # seconds; upper bound on one scheduler sleep
+
+
+@dataclass
+class ScheduledCheck:
+    """Scheduling state for one target."""
+
+    target: CheckTarget
+    interval: float
+    next_slot: float  # nominal start of the next period (no jitter)
+    running: bool = False
+    runs: int = 0
+    missed_ticks: int = 0
+
+
+class CheckScheduler:
+    """Runs each target's check on its own interval.
+
+    Every target keeps a fixed grid of slots ``interval`` seconds apart;
+    the actual start is the slot plus a random jitter, so a fleet that was
+    loaded at the same moment does not hit its targets in lock step. The
+    first slot of each target is spread across its whole interval for the
+    same reason.
+
+    A tick is missed, and skipped rather than queued, when the previous
+    check of the same target is still running or when the scheduler wakes
+    up more than one interval late (e.g. after a suspend). Skipping keeps a
+    slow target from building a backlog that would fire in a burst.
+    """
+
+    def __init__(
+        self,
+        monitor: ServerMonitor,
+        targets: Sequence[CheckTarget],
+        interval: float = DEFAULT_INTERVAL,
+        jitter: float = DEFAULT_JITTER,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            monitor: Monitor used to run each check and send notifications.
+            targets: Targets to check. A target's own ``interval`` overrides
+                the default.
+            interval: Default seconds between checks of one target.
+            jitter: Fraction of the interval (0-1) added at random to each run.
+            max_workers: Maximum number of checks in flight at once.
+            clock: Monotonic clock, replaceable for testing.
+            rng: Random source for jitter, replaceable for testing.
+
+        Raises:
+            ValidationError: If an interval or the jitter is out of range.
+        """
+        if not 0 <= jitter <= 1:
+            raise ValidationError(f"jitter must be between 0 and 1, got {jitter}")
+
+        self._monitor = monitor
+        self._jitter = jitter
+        self._max_workers = max_workers
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._queue: List[Tuple[float, int, ScheduledCheck]] = []
+        self._sequence = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        now = self._clock()
+        self.checks: List[ScheduledCheck] = []
+        for target in targets:
+            target_interval = target.interval or interval
+            if target_interval <= 0:
+                raise ValidationError(
+                    f"Interval for {target.get_url()} must be positive, got {target_interval}"
+                )
+            check = ScheduledCheck(
+                target=target,
+                interval=target_interval,
+                next_slot=now + self._rng.uniform(0, target_interval),
+            )
+            self.checks.append(check)
+            self._push(check, check.next_slot)
+
+    def _push(self, check: ScheduledCheck, run_at: float) -> None:
+        """Queues a check to start at ``run_at``."""
+        self._sequence += 1
+        heapq.heappush(self._queue, (run_at, self._sequence, check))
+
+    def _reschedule(self, check: ScheduledCheck, now: float) -> None:
+        """
+        Moves a check to its next slot, skipping slots that already passed.
+
+        Args:
+            check: The check that was just due.
+            now: The current clock value.
+        """
+        check.next_slot += check.interval
+        if check.next_slot <= now:
+            skipped = int((now - check.next_slot) // check.interval) + 1
+            check.missed_ticks += skipped
+            check.next_slot += skipped * check.interval
+            logger.warning(
+                f"Scheduler fell behind; skipped {skipped} tick(s) for {check.target.get_url()}"
+            )
+        jitter = self._rng.uniform(0, self._jitter * check.interval)
+        self._push(check, check.next_slot + jitter)
+
+    def _run_check(self, check: ScheduledCheck) -> None:
+        """Runs one check in a worker thread."""
+        try:
+            self._monitor.run_check_and_notify(check.target)
+        except Exception:
+            logger.exception(f"Scheduled check failed for {check.target.get_url()}")
+
+    def _finished(self, check: ScheduledCheck, _future: "Future[None]") -> None:
+        """Marks a check as no longer running."""
+        with self._lock:
+            check.running = False
+
+    def run_pending(self) -> int:
+        """
+        Dispatches every check that is due.
+
+        Returns:
+            The number of checks submitted to the worker pool.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="http500-serve"
+            )
+
+        now = self._clock()
+        dispatched = 0
+        while self._queue and self._queue[0][0] <= now:
+            _, _, check = heapq.heappop(self._queue)
+            with self._lock:
+                overlapping = check.running
+                if overlapping:
+                    check.missed_ticks += 1
+                else:
+                    check.running = True
+                    check.runs += 1
+
+            if overlapping:
+                logger.warning(
+                    f"Previous check of {check.target.get_url()} still running; skipping tick"
+                )
+            else:
+                future = self._executor.submit(self._run_check, check)
+                future.add_done_callback(lambda f, c=check: self._finished(c, f))
+                dispatched += 1
+            self._reschedule(check, now)
+        return dispatched
+
+    def seconds_until_next(self) -> float:
+        """Returns how long the scheduler may sleep before the next due check."""
+        if not self._queue:
+            return MAX_IDLE_WAIT
+        return max(0.0, min(self._queue[0][0] - self._clock(), MAX_IDLE_WAIT))
+
+    def run(self) -> None:
+        """Runs checks until ``stop()`` is called, then drains in-flight checks."""
+        logger.info(f"Scheduler started with {len(self.checks)} targets")
+        try:
+            while not self._stop_event.is_set():
+                self.run_pending()
+                self._stop_event.wait(self.seconds_until_next())
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            missed = sum(c.missed_ticks for c in self.checks)
+            runs = sum(c.runs for c in self.checks)
+            logger.info(f"Scheduler stopped after {runs} checks ({missed} missed ticks)")
+
+    def stop(self) -> None:
+        """Asks ``run()`` to return after the current iteration."""
+        self._stop_event.set()
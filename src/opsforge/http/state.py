@@ -0,0 +1,158 @@
+"""
+Alert state tracking for HTTP checks.
+
+This module remembers, per target, whether it is currently alerting, when
+the current incident started and when it was last notified about. The
+monitor uses it to send one alert per incident (plus optional reminders and
+recovery notices) instead of one email per failing check.
+
+State lives in memory and, when a path is given, is written through to a
+local SQLite database so one-shot cron runs share it.
+"""
+
+import sqlite3
+import threading
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from opsforge.common.exceptions import ConfigurationError
+from opsforge.common.logging import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class TargetState:
+    """Last known alert state of one target."""
+
+    key: str  # the target URL
+    last_status: Optional[int] = None
+    alerting: bool = False
+    first_failure: Optional[float] = None  # epoch seconds the incident began
+    last_notified: Optional[float] = None  # epoch seconds of the last email
+
+    def with_changes(self, **changes: object) -> "TargetState":
+        """Returns a copy with the given fields replaced."""
+        return replace(self, **changes)
+
+
+class AlertStateStore:
+    """In-memory alert state with optional SQLite write-through.
+
+    Reads are always served from memory. Writes go to the database only
+    when the state actually changes, so steady-state checks cost no I/O.
+    The store is safe to share between worker threads.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS target_state (
+            key TEXT PRIMARY KEY,
+            last_status INTEGER,
+            alerting INTEGER NOT NULL,
+            first_failure REAL,
+            last_notified REAL
+        )
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Initialize the store, loading any state saved at ``path``.
+
+        Args:
+            path: SQLite database file; None keeps state in memory only.
+
+        Raises:
+            ConfigurationError: If the database cannot be opened.
+        """
+        self._lock = threading.RLock()
+        self._states: Dict[str, TargetState] = {}
+        self._db: Optional[sqlite3.Connection] = None
+
+        if path is not None:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(path), check_same_thread=False)
+                self._db.execute(self._SCHEMA)
+                self._db.commit()
+                self._load()
+            except sqlite3.Error as e:
+                raise ConfigurationError(f"Cannot open alert state database {path}: {e}")
+
+    def __enter__(self) -> "AlertStateStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Lock to hold across a read-decide-write sequence."""
+        return self._lock
+
+    def _load(self) -> None:
+        """Reads all persisted state into memory."""
+        assert self._db is not None
+        rows = self._db.execute(
+            "SELECT key, last_status, alerting, first_failure, last_notified FROM target_state"
+        )
+        for key, last_status, alerting, first_failure, last_notified in rows:
+            self._states[key] = TargetState(
+                key=key,
+                last_status=last_status,
+                alerting=bool(alerting),
+                first_failure=first_failure,
+                last_notified=last_notified,
+            )
+        logger.debug(f"Loaded alert state for {len(self._states)} targets")
+
+    def get(self, key: str) -> Optional[TargetState]:
+        """
+        Returns the state of a target.
+
+        Args:
+            key: The target key (its URL).
+
+        Returns:
+            The TargetState, or None if the target was never seen.
+        """
+        with self._lock:
+            return self._states.get(key)
+
+    def put(self, state: TargetState) -> None:
+        """
+        Stores a target's state, persisting it if it changed.
+
+        Args:
+            state: The new state.
+        """
+        with self._lock:
+            if self._states.get(state.key) == state:
+                return
+            self._states[state.key] = state
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO target_state "
+                    "(key, last_status, alerting, first_failure, last_notified) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        state.key,
+                        state.last_status,
+                        int(state.alerting),
+                        state.first_failure,
+                        state.last_notified,
+                    ),
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to persist alert state for {state.key}: {e}")
+
+    def close(self) -> None:
+        """Closes the database, if any."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
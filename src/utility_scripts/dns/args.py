@@ -0,0 +1,100 @@
+"""
+Command-line options of the DNS management tool.
+
+Kept apart from ``utility_scripts.dns.manager`` and free of heavy
+imports, so ``opsforge dns --help`` and mistyped options are answered
+before ``dnspython`` is loaded.
+"""
+
+import argparse
+import importlib.util
+from typing import Optional, Sequence
+
+# Option defaults
+DEFAULT_MAX_WORKERS = 32  # concurrent queries in get_zones
+DEFAULT_QUERY_TIMEOUT = 5.0  # seconds per query, including retries
+
+
+def build_parser(sheets: bool = True) -> argparse.ArgumentParser:
+    """
+    Builds the argument parser of the DNS management tool.
+
+    Args:
+        sheets: Whether to add the ``sheets`` command, which needs
+            ``gspread`` and ``oauth2client``.
+
+    Returns:
+        The configured ArgumentParser.
+    """
+    parser = argparse.ArgumentParser(description="DNS record management tool")
+    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+
+    # Get zone records command
+    get_parser = subparsers.add_parser("get", help="Get zone records for one or more domains")
+    get_parser.add_argument("domains", nargs="+", metavar="domain", help="Domains to retrieve zone records for")
+    get_parser.add_argument("--server", "-s", help="Name server to query")
+    get_parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                            help=f"Maximum concurrent queries (default: {DEFAULT_MAX_WORKERS})")
+    get_parser.add_argument("--timeout", type=float, default=DEFAULT_QUERY_TIMEOUT,
+                            help=f"Seconds per query (default: {DEFAULT_QUERY_TIMEOUT:g})")
+    get_parser.add_argument("--cache-file", help="JSON file to keep cached answers in between runs")
+
+    # Zone transfer command
+    transfer_parser = subparsers.add_parser("transfer", help="Transfer complete zones with AXFR/IXFR")
+    transfer_parser.add_argument("domains", nargs="+", metavar="domain", help="Zones to transfer")
+    transfer_parser.add_argument("--primary", "-p",
+                                 help="Address or hostname of the server to transfer from (default: the SOA primary)")
+    transfer_parser.add_argument("--server", "-s", help="Name server used to find the primary")
+    transfer_parser.add_argument("--zone-dir", help="Directory to keep zones in so unchanged ones are skipped")
+    transfer_parser.add_argument("--timeout", type=float, default=DEFAULT_QUERY_TIMEOUT,
+                                 help=f"Seconds to wait for each message (default: {DEFAULT_QUERY_TIMEOUT:g})")
+
+    # Search file command
+    search_parser = subparsers.add_parser("search", help="Search for hostnames in files")
+    search_parser.add_argument("hostnames", nargs="*", metavar="hostname", help="Hostnames to search for")
+    search_parser.add_argument("--file", "-f", required=True, action="append", dest="files",
+                               help="File to search in (may be repeated)")
+    search_parser.add_argument("--patterns-file", help="File with one hostname to search for per line")
+    search_parser.add_argument("--ignore-case", "-i", action="store_true", help="Match regardless of case")
+    search_parser.add_argument("--exact", action="store_true",
+                               help="Print the records named exactly hostname from TinyDNS data files "
+                                    "(answered from data.cdb when it is up to date and -i is not given)")
+    search_parser.add_argument("--workers", type=int, help="Files searched in parallel (default: one per CPU)")
+
+    # Import TinyDNS command
+    tinydns_parser = subparsers.add_parser("tinydns", help="Import records from TinyDNS data directory")
+    tinydns_parser.add_argument("--directory", "-d",
+                               default="/service/tinydns",
+                               help="TinyDNS data directory (default: /service/tinydns)")
+    tinydns_parser.add_argument("--workers", type=int,
+                               help="Processes used to parse large data files (default: one per CPU)")
+    tinydns_parser.add_argument("--host", action="append", help="Show the records of a hostname")
+    tinydns_parser.add_argument("--ip", action="append", help="Show the hostnames pointing at an address")
+
+    # Google Sheets search command
+    if sheets:
+        gdocs_parser = subparsers.add_parser("sheets", help="Search for a pattern in a Google Sheets spreadsheet")
+        gdocs_parser.add_argument("pattern", help="Pattern to search for")
+        gdocs_parser.add_argument("--key", "-k", required=True, help="Spreadsheet key/ID")
+        gdocs_parser.add_argument("--credentials", "-c", required=True, help="Google API credentials JSON file")
+        gdocs_parser.add_argument("--case-sensitive", action="store_true", help="Enable case-sensitive search")
+        gdocs_parser.add_argument("--exact", action="store_true",
+                                  help="Look the pattern up as a whole cell token instead of a regex")
+        gdocs_parser.add_argument("--cache-dir", help="Directory to keep spreadsheet snapshots in between runs")
+        gdocs_parser.add_argument("--refresh", action="store_true", help="Download the spreadsheet even if unchanged")
+
+    return parser
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parses command-line arguments without importing the Google Sheets client.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+
+    Returns:
+        The parsed arguments.
+    """
+    sheets = all(importlib.util.find_spec(name) is not None for name in ("gspread", "oauth2client"))
+    return build_parser(sheets).parse_args(argv)
@@ -12,20 +12,35 @@ For more options:
     $ python -m utility_scripts.dns.manager --help
 """
 
-import argparse
+import array
+import bisect
 import contextlib
 import getpass
+import gzip
 import ipaddress
+import itertools
+import json
+import mmap
 import os
 import pathlib
 import re
 import secrets
 import shlex
 import tempfile
+import threading
+import time
 import logging
-from typing import Dict, List, Optional, Any, Union, Tuple
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Any, Sequence, Union, Tuple
 
+import dns.exception
+import dns.rdata
+import dns.rdataclass
+import dns.rdatatype
 import dns.resolver
+import dns.xfr
 import dns.zone
 import dns.query
 import dns.name
@@ -38,6 +53,8 @@ except ImportError:
     GOOGLE_SHEETS_AVAILABLE = False
 
 from utility_scripts.common.logging import setup_logging, get_logger
+from utility_scripts.dns.args import DEFAULT_MAX_WORKERS, DEFAULT_QUERY_TIMEOUT, build_parser
+from utility_scripts.dns.tinydns import TinyDNSCDB, TinyDNSData, TinyDNSRecord, fresh_cdb, load_tinydns
 from utility_scripts.common.exceptions import (
     UtilityScriptError,
     ConfigurationError,
@@ -49,6 +66,35 @@ from utility_scripts.common.exceptions import (
 # Set up logger
 logger = get_logger(__name__)
 
+# Constants
+DEFAULT_CACHE_ENTRIES = 10000  # answers kept by ResolverCache before LRU eviction
+
+
+@contextlib.contextmanager
+def _atomic_open(path: pathlib.Path, mode: str = "w"):
+    """
+    Opens a temporary file that replaces ``path`` once written.
+
+    An interrupted write never leaves a truncated file behind.
+
+    Args:
+        path: The file to write.
+        mode: ``"w"`` or ``"wb"``.
+
+    Yields:
+        The open temporary file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
 
 class DNSError(UtilityScriptError):
     """Error during DNS operations."""
@@ -71,14 +117,499 @@ class TinyDNSError(UtilityScriptError):
         super().__init__(f"TinyDNS error: {message}")
 
 
+@dataclass
+class TransferResult:
+    """Outcome of transferring one zone with ``transfer_zone``.
+
+    ``method`` is ``"AXFR"``, ``"IXFR"`` or ``"UNCHANGED"`` when the
+    primary's serial matched the copy already held and nothing was fetched.
+    """
+
+    domain: str
+    primary: str
+    serial: int
+    method: str
+    zone: dns.zone.Zone
+
+    @property
+    def records(self) -> Dict[str, List[Dict[str, Any]]]:
+        """All records of the zone, grouped by type."""
+        return zone_records(self.zone)
+
+
+@dataclass
+class ZoneResult:
+    """Outcome of retrieving one domain's records with ``get_zones``."""
+
+    domain: str
+    records: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    error: Optional[UtilityScriptError] = None
+
+
+def _soa_record(rdata: Any) -> Dict[str, Any]:
+    """Converts an SOA rdata to the record dict used by ``get_zone``."""
+    return {"mname": str(rdata.mname),
+            "rname": str(rdata.rname),
+            "serial": rdata.serial,
+            "refresh": rdata.refresh,
+            "retry": rdata.retry,
+            "expire": rdata.expire,
+            "minimum": rdata.minimum}
+
+
+# How each record type of a zone summary is converted to a dict
+RECORD_FORMATTERS: Dict[str, Callable[[Any], Dict[str, Any]]] = {
+    "SOA": _soa_record,
+    "NS": lambda rdata: {"nameserver": str(rdata)},
+    "A": lambda rdata: {"address": str(rdata)},
+    "MX": lambda rdata: {"preference": rdata.preference, "exchange": str(rdata.exchange)},
+    "TXT": lambda rdata: {"text": str(rdata).strip('"')},
+}
+ZONE_RECORD_TYPES = tuple(RECORD_FORMATTERS)
+
+
+def zone_records(zone: dns.zone.Zone) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Converts a transferred zone to record lists by type.
+
+    Every record carries its absolute ``name`` and ``ttl``; types with an
+    entry in RECORD_FORMATTERS get the same fields as ``get_zone`` returns,
+    all others their rdata text as ``data``.
+
+    Args:
+        zone: The zone to convert.
+
+    Returns:
+        Dictionary of record lists by type.
+    """
+    records: Dict[str, List[Dict[str, Any]]] = {}
+    for name, ttl, rdata in zone.iterate_rdatas():
+        record_type = dns.rdatatype.to_text(rdata.rdtype)
+        record = {"name": name.derelativize(zone.origin).to_text(), "ttl": ttl}
+        formatter = RECORD_FORMATTERS.get(record_type)
+        record.update(formatter(rdata) if formatter else {"data": rdata.to_text(zone.origin, relativize=False)})
+        records.setdefault(record_type, []).append(record)
+    return records
+
+
+def _negative_ttl(error: dns.exception.DNSException) -> int:
+    """
+    Works out how long a negative answer may be cached (RFC 2308).
+
+    The TTL is the lesser of the SOA record's own TTL and its MINIMUM field,
+    taken from the authority section of the response.
+
+    Args:
+        error: The NXDOMAIN or NoAnswer raised by the resolver.
+
+    Returns:
+        Seconds to cache the answer for; 0 if the response carried no SOA.
+    """
+    if isinstance(error, dns.resolver.NXDOMAIN):
+        responses = list(error.responses().values())
+    else:
+        responses = [error.kwargs.get("response")]
+
+    ttls = [min(rrset.ttl, rrset[0].minimum)
+            for response in responses if response is not None
+            for rrset in response.authority if rrset.rdtype == dns.rdatatype.SOA]
+    return min(ttls, default=0)
+
+
+class ResolverCache:
+    """A thread-safe, TTL-aware cache of resolver answers.
+
+    Positive answers are kept for their record TTL and NXDOMAIN/NoAnswer
+    results for their negative TTL (RFC 2308). The least recently used
+    entries are evicted once ``max_entries`` is reached. Records are held
+    as rdata text so the cache can be saved to JSON and loaded again by the
+    next run.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, pathlib.Path]] = None,
+        max_entries: int = DEFAULT_CACHE_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the cache, loading any unexpired entries from ``path``.
+
+        Args:
+            path: Optional JSON file to persist the cache in.
+            max_entries: Maximum number of answers kept.
+            clock: Wall-clock time source; expiry times are absolute so
+                they stay valid across runs.
+        """
+        self.path = pathlib.Path(path) if path else None
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, str, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self._load()
+
+    @staticmethod
+    def key(name_server: Optional[str], domain: str, record_type: str) -> str:
+        """Returns the cache key of one query."""
+        return f"{name_server or ''}|{domain.rstrip('.').lower()}.|{record_type.upper()}"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Union[List[dns.rdata.Rdata], dns.exception.DNSException]]:
+        """
+        Looks up a cached answer.
+
+        Args:
+            key: Key from ``ResolverCache.key``.
+
+        Returns:
+            The records, the negative-answer exception to report, or None
+            if nothing unexpired is cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        _, status, values = entry
+        if status == "NXDOMAIN":
+            return dns.resolver.NXDOMAIN()
+        if status == "NOANSWER":
+            return dns.resolver.NoAnswer()
+        rdtype = dns.rdatatype.from_text(key.rsplit("|", 1)[1])
+        return [dns.rdata.from_text(dns.rdataclass.IN, rdtype, value) for value in values]
+
+    def put(
+        self, key: str, answer: Union[dns.resolver.Answer, dns.exception.DNSException]
+    ) -> None:
+        """
+        Caches a resolver answer or negative result.
+
+        Errors other than NXDOMAIN and NoAnswer, and answers with a TTL of
+        zero, are not cached.
+
+        Args:
+            key: Key from ``ResolverCache.key``.
+            answer: The Answer returned, or the exception raised, by the resolver.
+        """
+        if isinstance(answer, dns.resolver.NXDOMAIN):
+            status, ttl, values = "NXDOMAIN", _negative_ttl(answer), []
+        elif isinstance(answer, dns.resolver.NoAnswer):
+            status, ttl, values = "NOANSWER", _negative_ttl(answer), []
+        elif isinstance(answer, dns.resolver.Answer) and answer.rrset is not None:
+            status, ttl, values = "OK", answer.rrset.ttl, [rdata.to_text() for rdata in answer]
+        else:
+            return
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, status, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the entry count and hit/miss/eviction counters."""
+        with self._lock:
+            return {"entries": len(self._entries),
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions}
+
+    def _load(self) -> None:
+        """Reads unexpired entries from the cache file, if there is one."""
+        try:
+            with self.path.open("r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable DNS cache {self.path}: {str(e)}")
+            return
+
+        now = self.clock()
+        for key, (expires, status, values) in data.get("entries", {}).items():
+            if expires > now:
+                self._entries[key] = (expires, status, values)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        logger.debug(f"Loaded {len(self._entries)} DNS cache entries from {self.path}")
+
+    def save(self) -> None:
+        """
+        Writes unexpired entries to the cache file, replacing it atomically.
+        """
+        if self.path is None:
+            return
+
+        now = self.clock()
+        with self._lock:
+            entries = {key: list(entry) for key, entry in self._entries.items() if entry[0] > now}
+
+        with _atomic_open(self.path) as f:
+            json.dump({"entries": entries}, f)
+        logger.debug(f"Saved {len(entries)} DNS cache entries to {self.path}")
+
+
+class _PatternMatcher:
+    """Finds every occurrence of many literal patterns in one pass.
+
+    A single alternation of all patterns locates matching lines at C speed;
+    only those lines are rescanned, with a lookahead at every position, to
+    report every pattern they contain, including overlapping ones. An
+    empty pattern matches every line, like ``"" in line`` does.
+    """
+
+    def __init__(self, patterns: Sequence[str], ignore_case: bool = False):
+        self.ignore_case = ignore_case
+        self.match_all = "" in patterns
+        self.patterns: Dict[bytes, List[str]] = {}
+        for pattern in dict.fromkeys(patterns):
+            if pattern:
+                self.patterns.setdefault(self._key(pattern.encode("utf-8")), []).append(pattern)
+
+        # Longest first, so the lookahead reports the longest pattern at a
+        # position; shorter ones starting there are found via ``prefixes``
+        keys = sorted(self.patterns, key=len, reverse=True)
+        alternation = b"|".join(re.escape(key) for key in keys)
+        flags = re.IGNORECASE if ignore_case else 0
+        self.any_pattern = re.compile(alternation, flags) if keys else None
+        self.at_position = re.compile(b"(?=(" + alternation + b"))", flags)
+        self.prefixes = {key: [key[:i] for i in range(1, len(key)) if key[:i] in self.patterns]
+                         for key in keys}
+
+    def _key(self, text: bytes) -> bytes:
+        return text.lower() if self.ignore_case else text
+
+    def search(self, buffer: Union[bytes, mmap.mmap]) -> Dict[str, List[str]]:
+        """
+        Scans a buffer for all patterns.
+
+        Args:
+            buffer: File contents, typically memory-mapped.
+
+        Returns:
+            "line_num: line" strings for every matching line, by pattern.
+        """
+        results: Dict[str, List[str]] = {pattern: [] for group in self.patterns.values() for pattern in group}
+        if self.match_all:
+            results[""] = [f"{line_num}: {line.decode('utf-8', 'replace').strip()}"
+                           for line_num, line in enumerate(buffer[:].splitlines(), 1)]
+        if self.any_pattern is None:
+            return results
+
+        line_num, counted, position = 1, 0, 0
+        while True:
+            match = self.any_pattern.search(buffer, position)
+            if match is None:
+                return results
+            start = buffer.rfind(b"\n", 0, match.start()) + 1
+            end = buffer.find(b"\n", match.end())
+            end = len(buffer) if end == -1 else end
+            line_num += buffer[counted:start].count(b"\n")
+            counted = start
+
+            line = buffer[start:end]
+            found = set()
+            for hit in self.at_position.finditer(line):
+                key = self._key(hit.group(1))
+                found.add(key)
+                found.update(self.prefixes[key])
+            text = f"{line_num}: {line.decode('utf-8', 'replace').strip()}"
+            for key in found:
+                for pattern in self.patterns[key]:
+                    results[pattern].append(text)
+            position = end + 1
+
+
+def _search_file(filename: str, patterns: Sequence[str], ignore_case: bool) -> Dict[str, List[str]]:
+    """Searches one memory-mapped file for many patterns; runs in pool workers."""
+    matcher = _PatternMatcher(patterns, ignore_case)
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return matcher.search(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return matcher.search(mm)
+
+
 class DNSManager:
-    """Manages DNS record operations."""
+    """Manages DNS record operations.
+
+    Every query uses its own resolver instance configured from the system
+    resolver, so one manager can be shared between threads. Answers are
+    looked up in, and added to, the manager's ResolverCache.
+    """
     
-    def __init__(self):
-        """Initialize the DNS Manager."""
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_QUERY_TIMEOUT,
+        port: int = 53,
+        cache: Optional[ResolverCache] = None,
+        zone_dir: Optional[Union[str, pathlib.Path]] = None,
+    ):
+        """
+        Initialize the DNS Manager.
+
+        Args:
+            max_workers: Maximum number of queries in flight in ``get_zones``.
+            timeout: Seconds allowed for each query.
+            port: Port the name servers listen on.
+            cache: Cache to share with other managers; a private in-memory
+                cache is created if omitted.
+            zone_dir: Optional directory to keep transferred zones in, as
+                master files, so later runs can use IXFR or skip them.
+        """
+        # Use default configuration from /etc/resolv.conf as the template
+        # for per-query resolvers; it is never modified afterwards
         self.resolver = dns.resolver.Resolver()
-        # Use default configuration from /etc/resolv.conf
-    
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.port = port
+        self.cache = cache if cache is not None else ResolverCache()
+        self.zone_dir = pathlib.Path(zone_dir) if zone_dir else None
+        self._zones: Dict[dns.name.Name, dns.zone.Zone] = {}
+        self._zones_lock = threading.Lock()
+
+    def _new_resolver(self, name_server: Optional[str], timeout: float) -> dns.resolver.Resolver:
+        """
+        Creates a resolver for a single query.
+
+        Args:
+            name_server: Name server to query, or None for the system ones.
+            timeout: Seconds allowed for the query, including retries.
+
+        Returns:
+            A resolver not shared with any other query.
+        """
+        resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = [name_server] if name_server else list(self.resolver.nameservers)
+        resolver.port = self.port
+        resolver.timeout = timeout
+        resolver.lifetime = timeout
+        return resolver
+
+    def _query(
+        self, domain: str, record_type: str, name_server: Optional[str], timeout: float
+    ) -> Union[List[dns.rdata.Rdata], Exception]:
+        """Answers one query from the cache or the resolver.
+
+        Exceptions are returned instead of raised, and negative answers are
+        cached alongside positive ones.
+        """
+        key = self.cache.key(name_server, domain, record_type)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            answer = self._new_resolver(name_server, timeout).resolve(domain, record_type)
+        except Exception as e:
+            self.cache.put(key, e)
+            return e
+        self.cache.put(key, answer)
+        return list(answer)
+
+    def _build_zone(
+        self, domain: str, answers: Dict[str, Union[List[dns.rdata.Rdata], Exception]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Assembles one domain's query answers into the zone record dict.
+
+        Args:
+            domain: The domain queried.
+            answers: Records or exception per record type.
+
+        Returns:
+            Dictionary of record lists by type.
+
+        Raises:
+            DNSError: If the SOA record is missing or a query failed.
+            NetworkError: If no name server could answer.
+        """
+        records: Dict[str, List[Dict[str, Any]]] = {}
+        for record_type, answer in answers.items():
+            if isinstance(answer, (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN)):
+                if record_type == "SOA":
+                    raise DNSError(f"Could not find SOA record for {domain}: {str(answer)}")
+                records[record_type] = []
+                logger.warning(f"No {record_type} records found for {domain}")
+            elif isinstance(answer, dns.resolver.NoNameservers):
+                raise NetworkError(f"No nameservers available for {domain}")
+            elif isinstance(answer, dns.exception.DNSException):
+                raise DNSError(f"DNS error when retrieving zone for {domain}: {str(answer)}")
+            elif isinstance(answer, Exception):
+                raise DNSError(f"Failed to retrieve zone information for {domain}: {str(answer)}")
+            else:
+                records[record_type] = [RECORD_FORMATTERS[record_type](rdata) for rdata in answer]
+
+        logger.debug(f"Primary name server for {domain}: {records['SOA'][0]['mname']}")
+        logger.info(f"Retrieved {sum(len(v) for v in records.values())} records for {domain}")
+        return records
+
+    def get_zones(
+        self,
+        domains: Sequence[str],
+        name_server: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, ZoneResult]:
+        """
+        Retrieves zone records for many domains concurrently.
+
+        The SOA, NS, A, MX and TXT queries of all domains are issued at once
+        on a thread pool, each through its own resolver, instead of one
+        after another.
+
+        Args:
+            domains: Domains to retrieve zone records for.
+            name_server: Optional name server to query. If None, uses the system resolver.
+            max_workers: Maximum queries in flight (default: the manager's).
+            timeout: Seconds allowed per query (default: the manager's).
+
+        Returns:
+            ZoneResult per domain, in input order; failed domains carry the
+            error ``get_zone`` would have raised.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        queries = [(domain, record_type) for domain in dict.fromkeys(domains)
+                   for record_type in ZONE_RECORD_TYPES]
+        logger.info(f"Retrieving zone information for {len(queries) // len(ZONE_RECORD_TYPES)} domains")
+
+        answers: Dict[str, Dict[str, Union[List[dns.rdata.Rdata], Exception]]] = {}
+        if queries:
+            workers = max(1, min(max_workers or self.max_workers, len(queries)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dns-query") as executor:
+                results = executor.map(
+                    lambda query: self._query(query[0], query[1], name_server, timeout), queries
+                )
+                for (domain, record_type), answer in zip(queries, results):
+                    answers.setdefault(domain, {})[record_type] = answer
+
+        zones = {}
+        for domain, domain_answers in answers.items():
+            try:
+                zones[domain] = ZoneResult(domain, records=self._build_zone(domain, domain_answers))
+            except UtilityScriptError as e:
+                zones[domain] = ZoneResult(domain, error=e)
+
+        stats = self.cache.stats()
+        logger.debug(f"DNS cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+        return zones
+
     def get_zone(self, domain: str, name_server: Optional[str] = None) -> Dict[str, Any]:
         """
         Retrieves zone records for a domain.
@@ -93,79 +624,150 @@ class DNSManager:
         Raises:
             DNSError: If retrieving zone information fails.
         """
-        try:
-            if name_server:
-                self.resolver.nameservers = [name_server]
-            
-            logger.info(f"Retrieving zone information for {domain}")
-            
-            # Get the SOA record to find the primary name server
-            try:
-                soa_answers = self.resolver.resolve(domain, 'SOA')
-                primary_ns = str(soa_answers[0].mname)
-                logger.debug(f"Primary name server for {domain}: {primary_ns}")
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN) as e:
-                raise DNSError(f"Could not find SOA record for {domain}: {str(e)}")
-            
-            # Prepare to store records
-            records = {
-                "SOA": [{"mname": str(soa_answers[0].mname), 
-                         "rname": str(soa_answers[0].rname),
-                         "serial": soa_answers[0].serial,
-                         "refresh": soa_answers[0].refresh,
-                         "retry": soa_answers[0].retry,
-                         "expire": soa_answers[0].expire,
-                         "minimum": soa_answers[0].minimum}]
-            }
-            
-            # Get NS records
-            try:
-                ns_answers = self.resolver.resolve(domain, 'NS')
-                records["NS"] = [{"nameserver": str(rdata)} for rdata in ns_answers]
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
-                records["NS"] = []
-                logger.warning(f"No NS records found for {domain}")
-            
-            # Get A records
-            try:
-                a_answers = self.resolver.resolve(domain, 'A')
-                records["A"] = [{"address": str(rdata)} for rdata in a_answers]
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
-                records["A"] = []
-                logger.warning(f"No A records found for {domain}")
-            
-            # Get MX records
-            try:
-                mx_answers = self.resolver.resolve(domain, 'MX')
-                records["MX"] = [{"preference": rdata.preference, 
-                                 "exchange": str(rdata.exchange)} 
-                                for rdata in mx_answers]
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
-                records["MX"] = []
-                logger.warning(f"No MX records found for {domain}")
-            
-            # Get TXT records
+        result = self.get_zones([domain], name_server)[domain]
+        if result.error is not None:
+            raise result.error
+        return result.records
+    
+    def _find_primary(self, domain: str, name_server: Optional[str]) -> str:
+        """
+        Finds the address of a zone's primary from its SOA ``mname``.
+
+        Args:
+            domain: The zone's domain.
+            name_server: Name server for the lookups, or None for the system ones.
+
+        Returns:
+            IP address of the primary name server.
+
+        Raises:
+            DNSError: If the SOA or the primary's address cannot be resolved.
+        """
+        soa = self._query(domain, "SOA", name_server, self.timeout)
+        if isinstance(soa, Exception):
+            raise DNSError(f"Could not find SOA record for {domain}: {str(soa)}")
+        mname = str(soa[0].mname)
+        address = self._address_of(mname, name_server)
+        if address is None:
+            raise DNSError(f"Could not resolve primary name server {mname} for {domain}")
+        logger.debug(f"Primary name server for {domain}: {mname} ({address})")
+        return address
+
+    def _address_of(self, server: str, name_server: Optional[str]) -> Optional[str]:
+        """
+        Returns a name server's IP address, resolving its hostname if needed.
+
+        Args:
+            server: IP address or hostname of the server.
+            name_server: Name server for the lookups, or None for the system ones.
+
+        Returns:
+            The first A (or else AAAA) address, or None if there is none.
+        """
+        with contextlib.suppress(ValueError):
+            return str(ipaddress.ip_address(server.rstrip(".")))
+
+        for record_type in ("A", "AAAA"):
+            addresses = self._query(server, record_type, name_server, self.timeout)
+            if not isinstance(addresses, Exception) and addresses:
+                return str(addresses[0])
+        return None
+
+    def _zone_path(self, origin: dns.name.Name) -> Optional[pathlib.Path]:
+        """Returns where a zone is kept in ``zone_dir``, if one is set."""
+        if self.zone_dir is None:
+            return None
+        return self.zone_dir / f"{origin.to_text(omit_final_dot=True).lower()}.zone"
+
+    def _stored_zone(self, origin: dns.name.Name) -> Optional[dns.zone.Zone]:
+        """Returns the copy of a zone held from an earlier transfer, if any."""
+        with self._zones_lock:
+            zone = self._zones.get(origin)
+        path = self._zone_path(origin)
+        if zone is None and path is not None and path.exists():
             try:
-                txt_answers = self.resolver.resolve(domain, 'TXT')
-                records["TXT"] = [{"text": str(rdata).strip('"')} for rdata in txt_answers]
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
-                records["TXT"] = []
-                logger.warning(f"No TXT records found for {domain}")
-                
-            # Zone retrieval summary
-            logger.info(f"Retrieved {sum(len(v) for v in records.values())} records for {domain}")
-            
-            return records
-            
-        except dns.resolver.NXDOMAIN:
-            raise ResourceNotFoundError("Domain", domain)
-        except dns.resolver.NoNameservers:
-            raise NetworkError(f"No nameservers available for {domain}")
+                zone = dns.zone.from_file(str(path), origin, relativize=False)
+            except (OSError, dns.exception.DNSException) as e:
+                logger.warning(f"Ignoring unreadable zone file {path}: {str(e)}")
+        return zone
+
+    def _store_zone(self, zone: dns.zone.Zone) -> None:
+        """Keeps a transferred zone, writing it to ``zone_dir`` if one is set."""
+        with self._zones_lock:
+            self._zones[zone.origin] = zone
+        path = self._zone_path(zone.origin)
+        if path is None:
+            return
+
+        with _atomic_open(path) as f:
+            zone.to_file(f, relativize=False)
+
+    def transfer_zone(
+        self,
+        domain: str,
+        primary: Optional[str] = None,
+        name_server: Optional[str] = None,
+    ) -> TransferResult:
+        """
+        Transfers a complete zone from its primary name server.
+
+        Unlike ``get_zone``, which only queries a few record types at the
+        apex, this fetches every record of the zone over a single TCP
+        stream. The primary's SOA serial is checked first: a zone whose
+        serial matches the copy already held is not transferred at all, and
+        a changed one is updated with IXFR, which the primary may answer
+        with a full transfer.
+
+        Args:
+            domain: The zone to transfer.
+            primary: Address or hostname of the server to transfer from
+                (default: the SOA ``mname``).
+            name_server: Name server for finding the primary, or None for
+                the system ones.
+
+        Returns:
+            The transfer outcome, including the zone.
+
+        Raises:
+            DNSError: If the transfer is refused or fails, or ``primary``
+                cannot be resolved.
+            NetworkError: If the primary cannot be reached.
+        """
+        origin = dns.name.from_text(domain)
+        if primary:
+            address = self._address_of(primary, name_server)
+            if address is None:
+                raise DNSError(f"Could not resolve primary name server {primary} for {domain}")
+            primary = address
+        else:
+            primary = self._find_primary(domain, name_server)
+        zone = self._stored_zone(origin)
+
+        try:
+            answer = self._new_resolver(primary, self.timeout).resolve(origin, "SOA")
+            serial = answer[0].serial
+            if zone is not None and zone.get_soa().serial == serial:
+                logger.info(f"Zone {domain} unchanged at serial {serial}; skipping transfer")
+                with self._zones_lock:
+                    self._zones[origin] = zone
+                return TransferResult(domain, primary, serial, "UNCHANGED", zone)
+
+            method = "AXFR" if zone is None else "IXFR"
+            zone = zone if zone is not None else dns.zone.Zone(origin, relativize=False)
+            query, _ = dns.xfr.make_query(zone, serial=None if method == "AXFR" else 0)
+            logger.info(f"Transferring zone {domain} from {primary} with {method}")
+            dns.query.inbound_xfr(primary, zone, query, port=self.port, timeout=self.timeout)
+        except dns.xfr.TransferError as e:
+            raise DNSError(f"Zone transfer of {domain} from {primary} refused: {str(e)}")
+        except (dns.resolver.NoNameservers, dns.exception.Timeout, OSError) as e:
+            raise NetworkError(f"Could not transfer zone {domain} from {primary}: {str(e)}")
         except dns.exception.DNSException as e:
-            raise DNSError(f"DNS error when retrieving zone for {domain}: {str(e)}")
-        except Exception as e:
-            logger.exception(f"Unexpected error retrieving zone for {domain}")
-            raise DNSError(f"Failed to retrieve zone information for {domain}: {str(e)}")
+            raise DNSError(f"Zone transfer of {domain} from {primary} failed: {str(e)}")
+
+        self._store_zone(zone)
+        serial = zone.get_soa().serial
+        logger.info(f"Transferred zone {domain} at serial {serial} ({len(zone.nodes)} names)")
+        return TransferResult(domain, primary, serial, method, zone)
     
     def search_file(self, hostname: str, filename: str) -> List[str]:
         """
@@ -182,17 +784,35 @@ class DNSManager:
             FileNotFoundError: If the file doesn't exist.
             PermissionError: If the file cannot be read.
         """
-        try:
-            logger.info(f"Searching for {hostname} in {filename}")
-            matches = []
+        return self.search_patterns([hostname], filename)[hostname]
+
+    def search_patterns(
+        self, patterns: Sequence[str], filename: str, ignore_case: bool = False
+    ) -> Dict[str, List[str]]:
+        """
+        Searches a file for many hostnames or other literal patterns at once.
+
+        The file is memory-mapped and scanned once, whatever the number of
+        patterns. A line containing several patterns is reported for each.
+        
+        Args:
+            patterns: The patterns to search for.
+            filename: The path to the file to search.
+            ignore_case: Whether to match regardless of case.
+            
+        Returns:
+            "line_num: line" strings of the matching lines, by pattern.
             
-            with pathlib.Path(filename).open('r') as file:
-                for line_num, line in enumerate(file, 1):
-                    if hostname in line:
-                        matches.append(f"{line_num}: {line.strip()}")
+        Raises:
+            FileNotFoundError: If the file doesn't exist.
+            PermissionError: If the file cannot be read.
+        """
+        try:
+            logger.info(f"Searching for {len(patterns)} patterns in {filename}")
+            results = _search_file(str(filename), patterns, ignore_case)
             
-            logger.info(f"Found {len(matches)} matches for {hostname} in {filename}")
-            return matches
+            logger.info(f"Found {sum(len(v) for v in results.values())} matches in {filename}")
+            return results
             
         except FileNotFoundError:
             logger.error(f"File not found: {filename}")
@@ -203,13 +823,123 @@ class DNSManager:
         except Exception as e:
             logger.exception(f"Unexpected error searching file {filename}")
             raise UtilityScriptError(f"Error searching file: {str(e)}")
+
+    def search_files(
+        self,
+        patterns: Sequence[str],
+        filenames: Sequence[str],
+        ignore_case: bool = False,
+        workers: Optional[int] = None,
+    ) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Searches many files for many patterns, one file per process.
+
+        Args:
+            patterns: The patterns to search for.
+            filenames: The paths of the files to search.
+            ignore_case: Whether to match regardless of case.
+            workers: Processes to search with (default: one per CPU; 1
+                searches in-process).
+
+        Returns:
+            Results of ``search_patterns`` by file name, in input order.
+
+        Raises:
+            FileNotFoundError: If a file doesn't exist.
+            PermissionError: If a file cannot be read.
+        """
+        filenames = list(dict.fromkeys(str(f) for f in filenames))
+        workers = min(workers or os.cpu_count() or 1, len(filenames))
+        if workers <= 1:
+            return {f: self.search_patterns(patterns, f, ignore_case) for f in filenames}
+
+        try:
+            logger.info(f"Searching {len(filenames)} files for {len(patterns)} patterns on {workers} processes")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_search_file, f, patterns, ignore_case) for f in filenames]
+                return {f: future.result() for f, future in zip(filenames, futures)}
+        except (FileNotFoundError, PermissionError) as e:
+            logger.error(f"Cannot read file: {str(e)}")
+            raise
+        except Exception as e:
+            logger.exception(f"Unexpected error searching files")
+            raise UtilityScriptError(f"Error searching files: {str(e)}")
     
-    def import_tinydns(self, directory: Union[str, pathlib.Path]) -> Dict[str, List[Dict[str, Any]]]:
+    def load_tinydns(
+        self,
+        directory: Union[str, pathlib.Path],
+        workers: Optional[int] = None,
+        use_cdb: bool = True,
+    ) -> Union[TinyDNSData, TinyDNSCDB]:
+        """
+        Loads a TinyDNS data directory for lookups.
+
+        If the directory holds a ``data.cdb`` at least as new as ``data``,
+        it is opened directly instead of parsing ``data``.
+
+        Args:
+            directory: Path to the TinyDNS data directory.
+            workers: Processes used to parse large data files (default: one per CPU).
+            use_cdb: Whether to read an up-to-date data.cdb when there is one.
+
+        Returns:
+            The data.cdb reader, or the records of ``data`` in an indexed,
+            columnar store.
+
+        Raises:
+            TinyDNSError: If loading TinyDNS data fails.
+        """
+        try:
+            directory = pathlib.Path(directory)
+            data_file = directory / "data"
+            
+            if not directory.exists():
+                raise FileNotFoundError(f"TinyDNS directory not found: {directory}")
+
+            cdb_file = fresh_cdb(directory) if use_cdb else None
+            if cdb_file is not None:
+                logger.info(f"Reading TinyDNS data from {cdb_file}")
+                return TinyDNSCDB(cdb_file)
+            
+            if not data_file.exists():
+                raise FileNotFoundError(f"TinyDNS data file not found: {data_file}")
+            
+            logger.info(f"Importing TinyDNS data from {data_file}")
+            data = load_tinydns(data_file, workers)
+            if data.errors:
+                logger.warning(f"Skipped {data.errors} unparsable lines in {data_file}")
+            return data
+            
+        except FileNotFoundError as e:
+            logger.error(f"File not found: {str(e)}")
+            raise
+        except PermissionError:
+            logger.error(f"Permission denied to read TinyDNS data")
+            raise
+        except Exception as e:
+            logger.exception(f"Unexpected error importing TinyDNS data")
+            raise TinyDNSError(f"Error importing TinyDNS data: {str(e)}")
+
+    def import_tinydns(
+        self,
+        directory: Union[str, pathlib.Path],
+        use_cdb: bool = False,
+    ) -> Dict[str, List[Dict[str, Any]]]:
         """
         Imports records from a TinyDNS data directory.
+
+        The result keeps its original shape: string values, the line
+        types this importer has always understood, and everything else
+        under "Other" as ``raw_line``. Use ``load_tinydns`` for typed
+        records of every line type and for large data files.
         
         Args:
             directory: Path to the TinyDNS data directory.
+            use_cdb: Read an up-to-date data.cdb instead of ``data``
+                (default: always read ``data``). Its
+                records are rendered as equivalent data lines and imported
+                the same way, but lines that compile to several records
+                (``=``, ``.``) appear as those records.
             
         Returns:
             Dictionary of imported records by type.
@@ -223,11 +953,19 @@ class DNSManager:
             
             if not directory.exists():
                 raise FileNotFoundError(f"TinyDNS directory not found: {directory}")
-            
-            if not data_file.exists():
-                raise FileNotFoundError(f"TinyDNS data file not found: {data_file}")
-            
-            logger.info(f"Importing TinyDNS data from {data_file}")
+
+            cdb_file = fresh_cdb(directory) if use_cdb else None
+            if cdb_file is not None:
+                logger.info(f"Importing TinyDNS data from {cdb_file}")
+                with TinyDNSCDB(cdb_file) as cdb:
+                    lines = [_tinydns_line(record) for record in cdb.records()]
+            else:
+                if not data_file.exists():
+                    raise FileNotFoundError(f"TinyDNS data file not found: {data_file}")
+
+                logger.info(f"Importing TinyDNS data from {data_file}")
+                with data_file.open('r') as f:
+                    lines = f.read().splitlines()
             
             records = {
                 "A": [],
@@ -240,18 +978,17 @@ class DNSManager:
                 "Other": []
             }
             
-            with data_file.open('r') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    try:
-                        record_type = self._parse_tinydns_line(line, records)
-                        logger.debug(f"Parsed TinyDNS {record_type} record from line {line_num}")
-                    except ValueError as e:
-                        logger.warning(f"Error parsing line {line_num}: {str(e)}")
-                        # Skip invalid lines
+            for line_num, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                
+                try:
+                    record_type = self._parse_tinydns_line(line, records)
+                    logger.debug(f"Parsed TinyDNS {record_type} record from line {line_num}")
+                except ValueError as e:
+                    logger.warning(f"Error parsing line {line_num}: {str(e)}")
+                    # Skip invalid lines
             
             total_records = sum(len(v) for v in records.values())
             logger.info(f"Imported {total_records} records from TinyDNS data")
@@ -358,27 +1095,204 @@ class DNSManager:
             raise ValueError(f"Error parsing TinyDNS line: {str(e)}")
 
 
+def _tinydns_line(record: TinyDNSRecord) -> str:
+    """Renders a compiled record as the data line ``import_tinydns`` parses."""
+    if record.type == "A":
+        return f"+{record.name}:{record.value}:{record.ttl}"
+    if record.type == "MX":
+        priority, exchange = record.value.split(" ", 1)
+        return f"@{record.name}::{exchange}:{priority}:{record.ttl}"
+    if record.type == "CNAME":
+        return f"C{record.name}:{record.value}:{record.ttl}"
+    if record.type == "PTR":
+        return f"^{record.name}:{record.value}:{record.ttl}"
+    if record.type == "NS":
+        return f"&{record.name}::{record.value}:{record.ttl}"
+    if record.type == "SOA":
+        return f"Z{record.name}:" + ":".join(record.value.split()) + f":{record.ttl}"
+    return f":{record.name}:{record.type}:{record.value}:{record.ttl}"
+
+
+def _rowcol_to_a1(row: int, col: int) -> str:
+    """Converts 1-based row and column numbers to A1 notation, e.g. (2, 28) to "AB2"."""
+    letters = ""
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return f"{letters}{row}"
+
+
+def _sheet_range(title: str) -> str:
+    """Quotes a worksheet title for use as an A1 range covering the whole sheet."""
+    return "'" + title.replace("'", "''") + "'"
+
+
+# Cells are indexed by their whitespace, comma or semicolon separated tokens
+_CELL_TOKEN = re.compile(r"[^\s,;]+")
+
+
+@dataclass
+class SheetSnapshot:
+    """Local copy of every worksheet of a spreadsheet.
+
+    ``index`` maps each lower-cased token of every cell to flattened
+    (worksheet, row, column) triples, so exact lookups of hostnames or
+    addresses need no scan at all. Regex searches run over all cells
+    joined into one newline-separated buffer, built on first use.
+    """
+
+    key: str
+    revision: Optional[str]
+    titles: List[str]
+    values: List[List[List[str]]]
+    index: Dict[str, List[int]]
+
+    def __post_init__(self) -> None:
+        # Buffer of all cells, then start offset, worksheet, row and column per cell
+        self._flat: Optional[Tuple[str, array.array, array.array, array.array, array.array]] = None
+
+    @classmethod
+    def build(
+        cls, key: str, revision: Optional[str], titles: List[str], values: List[List[List[str]]]
+    ) -> "SheetSnapshot":
+        """Creates a snapshot of downloaded worksheet values, indexing every cell."""
+        index: Dict[str, List[int]] = {}
+        for sheet, rows in enumerate(values):
+            for row_idx, row in enumerate(rows, 1):
+                for col_idx, cell in enumerate(row, 1):
+                    for token in set(_CELL_TOKEN.findall(cell.lower())):
+                        index.setdefault(token, []).extend((sheet, row_idx, col_idx))
+        return cls(key, revision, titles, values, index)
+
+    def _match(self, sheet: int, row: int, col: int) -> Dict[str, Any]:
+        """Describes one matching cell."""
+        title = self.titles[sheet]
+        return {"sheet": title,
+                "row": row,
+                "column": col,
+                "value": self.values[sheet][row - 1][col - 1],
+                "a1_notation": f"{title}!{_rowcol_to_a1(row, col)}"}
+
+    def lookup(self, term: str) -> List[Dict[str, Any]]:
+        """Returns the cells containing ``term`` as a whole token, ignoring case."""
+        positions = self.index.get(term.strip().lower(), [])
+        return [self._match(*positions[i:i + 3]) for i in range(0, len(positions), 3)]
+
+    def _flatten(self) -> Tuple[str, array.array, array.array, array.array, array.array]:
+        """Joins all cells into one buffer with an index of where each starts."""
+        if self._flat is None:
+            cells: List[str] = []
+            starts, sheets, rows, cols = array.array("Q"), array.array("I"), array.array("I"), array.array("I")
+            offset = 0
+            for sheet, sheet_rows in enumerate(self.values):
+                for row_idx, row in enumerate(sheet_rows, 1):
+                    for col_idx, cell in enumerate(row, 1):
+                        cells.append(cell)
+                        starts.append(offset)
+                        sheets.append(sheet)
+                        rows.append(row_idx)
+                        cols.append(col_idx)
+                        offset += len(cell) + 1
+            self._flat = ("\n".join(cells), starts, sheets, rows, cols)
+        return self._flat
+
+    def _search_cells(self, regex: re.Pattern) -> List[Dict[str, Any]]:
+        """Returns the cells ``regex`` matches anywhere in, testing them one by one."""
+        results = []
+        for sheet, rows in enumerate(self.values):
+            for row_idx, row in enumerate(rows, 1):
+                for col_idx, cell in enumerate(row, 1):
+                    if regex.search(cell):
+                        results.append(self._match(sheet, row_idx, col_idx))
+        return results
+
+    def search(self, regex: re.Pattern) -> List[Dict[str, Any]]:
+        """
+        Returns the cells ``regex`` matches anywhere in.
+
+        The regex runs over the flattened buffer in MULTILINE mode, so ``^``
+        and ``$`` still anchor at cell boundaries, and each hit is mapped
+        back to its cell by binary search on the cell offsets. Only hit
+        cells are matched individually, to reject matches that span cells
+        and keep the results identical to testing every cell.
+
+        Args:
+            regex: Compiled pattern to search for.
+
+        Returns:
+            Matching cells in worksheet, row and column order.
+        """
+        if isinstance(regex.pattern, bytes) or "\\A" in regex.pattern or "\\Z" in regex.pattern:
+            # Absolute anchors only match at the ends of the whole buffer
+            return self._search_cells(regex)
+
+        buffer, starts, sheets, rows, cols = self._flatten()
+        scanner = re.compile(regex.pattern, regex.flags | re.MULTILINE)
+        results = []
+        position = 0
+        while starts:
+            match = scanner.search(buffer, position)
+            if match is None:
+                break
+            cell = bisect.bisect_right(starts, match.start()) - 1
+            value = self.values[sheets[cell]][rows[cell] - 1][cols[cell] - 1]
+            if regex.search(value):
+                results.append(self._match(sheets[cell], rows[cell], cols[cell]))
+            if cell + 1 == len(starts):
+                break
+            position = starts[cell + 1]
+        return results
+
+    def save(self, path: pathlib.Path) -> None:
+        """Writes the snapshot as gzip-compressed JSON, replacing ``path`` atomically."""
+        with _atomic_open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(json.dumps(asdict(self), separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "SheetSnapshot":
+        """Reads a snapshot written by ``save``."""
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
 class GoogleSheetsManager:
-    """Manages Google Sheets integration."""
+    """Manages Google Sheets integration.
+
+    Searches run against a local snapshot of each spreadsheet, which is
+    downloaded again only when the spreadsheet's last update time changes.
+    """
     
-    def __init__(self, credentials_file: Optional[str] = None):
+    def __init__(
+        self,
+        credentials_file: Optional[str] = None,
+        cache_dir: Optional[Union[str, pathlib.Path]] = None,
+        client: Any = None,
+    ):
         """
         Initialize the Google Sheets Manager.
         
         Args:
             credentials_file: Path to Google API credentials JSON file.
+            cache_dir: Optional directory to keep spreadsheet snapshots in
+                between runs.
+            client: An already authorized gspread client to use instead of
+                calling ``authenticate``.
             
         Raises:
             GoogleSheetsError: If Google Sheets dependencies are not available.
         """
-        if not GOOGLE_SHEETS_AVAILABLE:
+        if client is None and not GOOGLE_SHEETS_AVAILABLE:
             raise GoogleSheetsError(
                 "Google Sheets integration requires additional packages. "
                 "Install with: pip install gspread oauth2client"
             )
         
         self.credentials_file = credentials_file
-        self.client = None
+        self.client = client
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir else None
+        self.hits = 0
+        self.refreshes = 0
+        self._snapshots: Dict[str, SheetSnapshot] = {}
     
     def authenticate(self, credentials_file: Optional[str] = None) -> None:
         """
@@ -415,6 +1329,122 @@ class GoogleSheetsManager:
             logger.exception(f"Google Sheets authentication failed")
             raise AuthenticationError(f"Google Sheets authentication failed: {str(e)}")
     
+    def _snapshot_path(self, spreadsheet_key: str) -> Optional[pathlib.Path]:
+        """Returns where a spreadsheet's snapshot is kept, if ``cache_dir`` is set."""
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{spreadsheet_key}.json.gz"
+
+    @staticmethod
+    def _revision(spreadsheet: Any) -> Optional[str]:
+        """Returns the spreadsheet's last update time, or None if it cannot be read."""
+        try:
+            getter = getattr(spreadsheet, "get_lastUpdateTime", None)
+            revision = getter() if getter else spreadsheet.lastUpdateTime
+        except Exception as e:
+            logger.debug(f"Could not read the last update time of {spreadsheet.id}: {str(e)}")
+            return None
+        return str(revision) if revision else None
+
+    @staticmethod
+    def _download(spreadsheet: Any) -> Tuple[List[str], List[List[List[str]]]]:
+        """Downloads the titles and values of all worksheets, in one request where possible."""
+        titles = [worksheet.title for worksheet in spreadsheet.worksheets()]
+        if hasattr(spreadsheet, "values_batch_get"):
+            response = spreadsheet.values_batch_get([_sheet_range(title) for title in titles])
+            values = [value_range.get("values", []) for value_range in response.get("valueRanges", [])]
+        else:
+            values = [worksheet.get_all_values() for worksheet in spreadsheet.worksheets()]
+        return titles, values
+
+    def _sheets_error(self, error: Exception, spreadsheet_key: str) -> UtilityScriptError:
+        """Converts a gspread exception to the error to raise."""
+        if GOOGLE_SHEETS_AVAILABLE:
+            if isinstance(error, gspread.exceptions.SpreadsheetNotFound):
+                return ResourceNotFoundError("Spreadsheet", spreadsheet_key)
+            if isinstance(error, gspread.exceptions.APIError):
+                return GoogleSheetsError(f"Google Sheets API error: {str(error)}")
+        logger.exception(f"Unexpected error reading Google Sheets")
+        return GoogleSheetsError(f"Error reading spreadsheet: {str(error)}")
+
+    def snapshot(self, spreadsheet_key: str, refresh: bool = False) -> SheetSnapshot:
+        """
+        Returns an up-to-date local snapshot of a spreadsheet.
+
+        The spreadsheet's last update time is checked on every call; the
+        worksheets are downloaded again only when it has changed, or when
+        it cannot be read.
+
+        Args:
+            spreadsheet_key: The unique identifier for the spreadsheet.
+            refresh: Download the worksheets even if the snapshot is current.
+
+        Returns:
+            The snapshot.
+
+        Raises:
+            GoogleSheetsError: If spreadsheet operations fail.
+            AuthenticationError: If not authenticated.
+        """
+        if not self.client:
+            raise AuthenticationError("Not authenticated with Google Sheets API")
+
+        try:
+            spreadsheet = self.client.open_by_key(spreadsheet_key)
+            revision = self._revision(spreadsheet)
+
+            snapshot = self._snapshots.get(spreadsheet_key)
+            path = self._snapshot_path(spreadsheet_key)
+            if snapshot is None and path is not None and path.exists():
+                try:
+                    snapshot = SheetSnapshot.load(path)
+                except (OSError, ValueError, TypeError) as e:
+                    logger.warning(f"Ignoring unreadable snapshot {path}: {str(e)}")
+
+            if not refresh and snapshot is not None and revision is not None and snapshot.revision == revision:
+                self.hits += 1
+                self._snapshots[spreadsheet_key] = snapshot
+                logger.debug(f"Using snapshot of spreadsheet {spreadsheet_key} at {revision}")
+                return snapshot
+
+            logger.info(f"Downloading spreadsheet {spreadsheet_key}")
+            titles, values = self._download(spreadsheet)
+        except UtilityScriptError:
+            raise
+        except Exception as e:
+            raise self._sheets_error(e, spreadsheet_key)
+
+        snapshot = SheetSnapshot.build(spreadsheet_key, revision, titles, values)
+        self.refreshes += 1
+        self._snapshots[spreadsheet_key] = snapshot
+        if path is not None:
+            try:
+                snapshot.save(path)
+            except OSError as e:
+                logger.warning(f"Could not save snapshot {path}: {str(e)}")
+        return snapshot
+
+    def lookup_spreadsheet(self, spreadsheet_key: str, term: str) -> List[Dict[str, Any]]:
+        """
+        Finds the cells containing a hostname, address or other whole token.
+
+        Uses the snapshot's inverted index, so no cell is scanned.
+
+        Args:
+            spreadsheet_key: The unique identifier for the spreadsheet.
+            term: The token to look up, ignoring case.
+
+        Returns:
+            List of dictionaries containing matched cells.
+
+        Raises:
+            GoogleSheetsError: If spreadsheet operations fail.
+            AuthenticationError: If not authenticated.
+        """
+        results = self.snapshot(spreadsheet_key).lookup(term)
+        logger.info(f"Found {len(results)} cells containing '{term}'")
+        return results
+    
     def search_spreadsheet(self, 
                          spreadsheet_key: str, 
                          pattern: str, 
@@ -434,181 +1464,218 @@ class GoogleSheetsManager:
             GoogleSheetsError: If spreadsheet operations fail.
             AuthenticationError: If not authenticated.
         """
-        if not self.client:
-            raise AuthenticationError("Not authenticated with Google Sheets API")
+        logger.info(f"Searching for '{pattern}' in spreadsheet {spreadsheet_key}")
+        snapshot = self.snapshot(spreadsheet_key)
         
         try:
-            logger.info(f"Searching for '{pattern}' in spreadsheet {spreadsheet_key}")
-            
-            # Open the spreadsheet
-            spreadsheet = self.client.open_by_key(spreadsheet_key)
-            
-            # Prepare results
-            results = []
-            
             # Compile regex pattern
             flags = 0 if case_sensitive else re.IGNORECASE
             regex = re.compile(pattern, flags)
-            
-            # Search all worksheets
-            for worksheet in spreadsheet.worksheets():
-                logger.debug(f"Searching worksheet: {worksheet.title}")
-                
-                # Get all values
-                values = worksheet.get_all_values()
-                
-                # Search each cell
-                for row_idx, row in enumerate(values, 1):
-                    for col_idx, cell in enumerate(row, 1):
-                        if regex.search(cell):
-                            results.append({
-                                "sheet": worksheet.title,
-                                "row": row_idx,
-                                "column": col_idx,
-                                "value": cell,
-                                "a1_notation": f"{worksheet.title}!{gspread.utils.rowcol_to_a1(row_idx, col_idx)}"
-                            })
-            
-            logger.info(f"Found {len(results)} matches for '{pattern}'")
-            return results
-            
-        except gspread.exceptions.SpreadsheetNotFound:
-            raise ResourceNotFoundError("Spreadsheet", spreadsheet_key)
-        except gspread.exceptions.APIError as e:
-            raise GoogleSheetsError(f"Google Sheets API error: {str(e)}")
-        except Exception as e:
-            logger.exception(f"Unexpected error searching Google Sheets")
-            raise GoogleSheetsError(f"Error searching spreadsheet: {str(e)}")
+        except re.error as e:
+            raise GoogleSheetsError(f"Invalid search pattern '{pattern}': {str(e)}")
+        
+        results = snapshot.search(regex)
+        logger.info(f"Found {len(results)} matches for '{pattern}'")
+        return results
 
 
-def main() -> None:
-    """Parse arguments and execute the requested operation."""
-    # Set up logging
-    setup_logging()
-    
-    parser = argparse.ArgumentParser(description="DNS record management tool")
-    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+def _print_zone(domain: str, records: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Prints one domain's zone records in a readable format."""
+    print(f"\nZone information for {domain}:\n")
     
-    # Get zone records command
-    get_parser = subparsers.add_parser("get", help="Get zone records for a domain")
-    get_parser.add_argument("domain", help="Domain to retrieve zone records for")
-    get_parser.add_argument("--server", "-s", help="Name server to query")
+    # SOA Records
+    if records["SOA"]:
+        print("SOA Records:")
+        for soa in records["SOA"]:
+            print(f"  Primary NS: {soa['mname']}")
+            print(f"  Admin: {soa['rname']}")
+            print(f"  Serial: {soa['serial']}")
+            print(f"  Refresh: {soa['refresh']}")
+            print(f"  Retry: {soa['retry']}")
+            print(f"  Expire: {soa['expire']}")
+            print(f"  Minimum TTL: {soa['minimum']}")
+        print()
     
-    # Search file command
-    search_parser = subparsers.add_parser("search", help="Search for a hostname in a file")
-    search_parser.add_argument("hostname", help="Hostname to search for")
-    search_parser.add_argument("--file", "-f", required=True, help="File to search in")
+    # NS Records
+    if records["NS"]:
+        print("NS Records:")
+        for ns in records["NS"]:
+            print(f"  {ns['nameserver']}")
+        print()
     
-    # Import TinyDNS command
-    tinydns_parser = subparsers.add_parser("tinydns", help="Import records from TinyDNS data directory")
-    tinydns_parser.add_argument("--directory", "-d", 
-                               default="/service/tinydns", 
-                               help="TinyDNS data directory (default: /service/tinydns)")
+    # A Records
+    if records["A"]:
+        print("A Records:")
+        for a in records["A"]:
+            print(f"  {domain} -> {a['address']}")
+        print()
     
-    # Google Sheets search command
-    if GOOGLE_SHEETS_AVAILABLE:
-        gdocs_parser = subparsers.add_parser("sheets", help="Search for a pattern in a Google Sheets spreadsheet")
-        gdocs_parser.add_argument("pattern", help="Pattern to search for")
-        gdocs_parser.add_argument("--key", "-k", required=True, help="Spreadsheet key/ID")
-        gdocs_parser.add_argument("--credentials", "-c", required=True, help="Google API credentials JSON file")
-        gdocs_parser.add_argument("--case-sensitive", action="store_true", help="Enable case-sensitive search")
+    # MX Records
+    if records["MX"]:
+        print("MX Records:")
+        for mx in records["MX"]:
+            print(f"  {mx['preference']} {mx['exchange']}")
+        print()
     
-    args = parser.parse_args()
+    # TXT Records
+    if records["TXT"]:
+        print("TXT Records:")
+        for txt in records["TXT"]:
+            print(f"  {txt['text']}")
+        print()
+
+
+def _print_tinydns(
+    directory: str,
+    data: Union[TinyDNSData, TinyDNSCDB],
+    hosts: Optional[List[str]] = None,
+    ips: Optional[List[str]] = None,
+) -> int:
+    """Prints the requested lookups, or a summary, of loaded TinyDNS data."""
+    if hosts or ips:
+        matches = [record for host in hosts or [] for record in data.lookup(host)]
+        matches += [record for ip in ips or [] for record in data.lookup_address(ip)]
+        print(f"\n{len(matches)} matching records in TinyDNS data in {directory}:\n")
+        for record in matches:
+            print(f"  {record.name} {record.ttl} {record.type} {record.value}")
+        return 0 if matches else 1
+
+    # Print a summary of imported records
+    counts = data.counts()
+    print(f"\nImported records from TinyDNS data in {directory}:\n")
+    for record_type, count in counts.items():
+        print(f"{record_type} Records: {count}")
+
+    # Print some sample records
+    for record_type, count in counts.items():
+        print(f"\nSample {record_type} Records:")
+        for record in itertools.islice(data.records(record_type), 5):
+            print(f"  {record.name} -> {record.value}")
+        if count > 5:
+            print(f"  ... and {count - 5} more")
+
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Optional[int]:
+    """Parse arguments and execute the requested operation.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+    """
+    # Set up logging
+    setup_logging()
+    return run(argv)
+
+
+def run(argv: Optional[Sequence[str]] = None, *, resolver_cache: Optional[ResolverCache] = None) -> Optional[int]:
+    """Parses a get, transfer, search, tinydns or sheets command and runs it.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+        resolver_cache: Cache used by ``get`` instead of one loaded from
+            ``--cache-file``; it is kept warm by the caller.
+
+    Returns:
+        Exit code, or None for success.
+    """
+    parser = build_parser(sheets=GOOGLE_SHEETS_AVAILABLE)
+    args = parser.parse_args(argv)
     
     try:
         if args.command == "get":
-            dns_manager = DNSManager()
-            records = dns_manager.get_zone(args.domain, args.server)
-            
-            # Print results in a readable format
-            print(f"\nZone information for {args.domain}:\n")
-            
-            # SOA Records
-            if records["SOA"]:
-                print("SOA Records:")
-                for soa in records["SOA"]:
-                    print(f"  Primary NS: {soa['mname']}")
-                    print(f"  Admin: {soa['rname']}")
-                    print(f"  Serial: {soa['serial']}")
-                    print(f"  Refresh: {soa['refresh']}")
-                    print(f"  Retry: {soa['retry']}")
-                    print(f"  Expire: {soa['expire']}")
-                    print(f"  Minimum TTL: {soa['minimum']}")
-                print()
-            
-            # NS Records
-            if records["NS"]:
-                print("NS Records:")
-                for ns in records["NS"]:
-                    print(f"  {ns['nameserver']}")
-                print()
-            
-            # A Records
-            if records["A"]:
-                print("A Records:")
-                for a in records["A"]:
-                    print(f"  {args.domain} -> {a['address']}")
-                print()
-            
-            # MX Records
-            if records["MX"]:
-                print("MX Records:")
-                for mx in records["MX"]:
-                    print(f"  {mx['preference']} {mx['exchange']}")
-                print()
-            
-            # TXT Records
-            if records["TXT"]:
-                print("TXT Records:")
-                for txt in records["TXT"]:
-                    print(f"  {txt['text']}")
-                print()
+            cache = resolver_cache if resolver_cache is not None else ResolverCache(args.cache_file)
+            dns_manager = DNSManager(max_workers=args.workers, timeout=args.timeout, cache=cache)
+            zones = dns_manager.get_zones(args.domains, args.server)
+            try:
+                cache.save()
+            except OSError as e:
+                logger.warning(f"Could not save DNS cache {args.cache_file}: {str(e)}")
+            failed = 0
+
+            for domain, zone in zones.items():
+                if zone.error is not None:
+                    failed += 1
+                    logger.error(str(zone.error))
+                    print(f"\nError for {domain}: {zone.error}")
+                    continue
+                _print_zone(domain, zone.records)
+
+            if failed == len(zones):
+                return 1
+            
+        elif args.command == "transfer":
+            dns_manager = DNSManager(timeout=args.timeout, zone_dir=args.zone_dir)
+            failed = 0
+
+            for domain in args.domains:
+                try:
+                    result = dns_manager.transfer_zone(domain, args.primary, args.server)
+                except UtilityScriptError as e:
+                    failed += 1
+                    logger.error(str(e))
+                    print(f"\nError for {domain}: {e}")
+                    continue
+
+                records = result.records
+                print(f"\nZone {domain} from {result.primary}: serial {result.serial} ({result.method})")
+                for record_type, entries in sorted(records.items()):
+                    print(f"  {record_type} Records: {len(entries)}")
+
+            if failed == len(args.domains):
+                return 1
             
         elif args.command == "search":
             dns_manager = DNSManager()
-            matches = dns_manager.search_file(args.hostname, args.file)
-            
-            if matches:
-                print(f"\nMatches for '{args.hostname}' in {args.file}:\n")
-                for match in matches:
-                    print(match)
+            hostnames = list(args.hostnames)
+            if args.patterns_file:
+                with open(args.patterns_file) as f:
+                    hostnames += [line.strip() for line in f if line.strip()]
+            if not hostnames:
+                parser.error("search requires at least one hostname or --patterns-file")
+
+            if args.exact:
+                not_tinydns = [f for f in args.files if pathlib.Path(f).name not in ("data", "data.cdb")]
+                if not_tinydns:
+                    parser.error(f"--exact only searches TinyDNS data or data.cdb files, not {not_tinydns[0]}")
+                # Whole names can be looked up in an up-to-date data.cdb
+                # instead of parsing data; both give the same records
+                results = {}
+                for filename in args.files:
+                    with dns_manager.load_tinydns(pathlib.Path(filename).parent, args.workers,
+                                                  use_cdb=not args.ignore_case) as data:
+                        results[filename] = {
+                            hostname: [f"{r.name} {r.ttl} {r.type} {r.value}" for r in data.lookup(hostname)]
+                            for hostname in hostnames
+                        }
             else:
-                print(f"\nNo matches found for '{args.hostname}' in {args.file}\n")
+                results = dns_manager.search_files(hostnames, args.files, args.ignore_case, args.workers)
+
+            for filename in args.files:
+                for hostname, matches in results[filename].items():
+                    if matches:
+                        print(f"\nMatches for '{hostname}' in {filename}:\n")
+                        for match in matches:
+                            print(match)
+                    else:
+                        print(f"\nNo matches found for '{hostname}' in {filename}\n")
             
         elif args.command == "tinydns":
             dns_manager = DNSManager()
-            records = dns_manager.import_tinydns(args.directory)
-            
-            # Print a summary of imported records
-            print(f"\nImported records from TinyDNS data in {args.directory}:\n")
-            for record_type, entries in records.items():
-                if entries:
-                    print(f"{record_type} Records: {len(entries)}")
-            
-            # Print some sample records
-            for record_type, entries in records.items():
-                if entries and record_type != "Other":
-                    print(f"\nSample {record_type} Records:")
-                    for i, entry in enumerate(entries[:5]):
-                        if record_type == "A":
-                            print(f"  {entry['hostname']} -> {entry['ip']}")
-                        elif record_type == "MX":
-                            print(f"  {entry['hostname']} -> {entry['priority']} {entry['ip']}")
-                        elif record_type == "CNAME":
-                            print(f"  {entry['alias']} -> {entry['hostname']}")
-                        elif record_type == "NS":
-                            print(f"  {entry['domain']} -> {entry['ns']}")
-                        # Add other record types as needed
-                    
-                    if len(entries) > 5:
-                        print(f"  ... and {len(entries) - 5} more")
+            with dns_manager.load_tinydns(args.directory, args.workers) as data:
+                return _print_tinydns(args.directory, data, args.host, args.ip)
             
         elif args.command == "sheets" and GOOGLE_SHEETS_AVAILABLE:
-            sheets_manager = GoogleSheetsManager()
+            sheets_manager = GoogleSheetsManager(cache_dir=args.cache_dir)
             sheets_manager.authenticate(args.credentials)
-            results = sheets_manager.search_spreadsheet(
-                args.key, args.pattern, args.case_sensitive
-            )
+            if args.refresh:
+                sheets_manager.snapshot(args.key, refresh=True)
+            if args.exact:
+                results = sheets_manager.lookup_spreadsheet(args.key, args.pattern)
+            else:
+                results = sheets_manager.search_spreadsheet(
+                    args.key, args.pattern, args.case_sensitive
+                )
             
             if results:
                 print(f"\nMatches for '{args.pattern}' in spreadsheet:\n")
@@ -0,0 +1,617 @@
+"""
+Indexed loader for TinyDNS data files.
+
+This module parses tinydns-data ``data`` files into a compact columnar
+store with hostname and address indexes. Large files are memory-mapped,
+split into newline-aligned chunks and parsed on a process pool. The
+``data.cdb`` that tinydns-data compiles from them can also be read
+directly with TinyDNSCDB, without parsing anything.
+
+Typical usage:
+    data = load_tinydns("/service/tinydns/root/data")
+    for record in data.lookup("www.example.com", "A"):
+        print(record.value)
+"""
+
+import array
+import ipaddress
+import mmap
+import os
+import pathlib
+import re
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import dns.rdatatype
+
+from utility_scripts.common.logging import get_logger
+
+# Set up logger
+logger = get_logger(__name__)
+
+# Constants
+CHUNK_SIZE = 16 * 1024 * 1024  # bytes of data file per parse task
+PARALLEL_THRESHOLD = 8 * 1024 * 1024  # smaller files are parsed in-process
+
+# Default TTLs and SOA timers used by tinydns-data
+TTL_DEFAULT = 86400
+TTL_NS = 259200
+TTL_SOA = 2560
+SOA_REFRESH = 16384
+SOA_RETRY = 2048
+SOA_EXPIRE = 1048576
+SOA_MINIMUM = 2560
+
+A = dns.rdatatype.A
+NS = dns.rdatatype.NS
+CNAME = dns.rdatatype.CNAME
+SOA = dns.rdatatype.SOA
+PTR = dns.rdatatype.PTR
+MX = dns.rdatatype.MX
+TXT = dns.rdatatype.TXT
+AAAA = dns.rdatatype.AAAA
+
+_OCTAL_ESCAPE = re.compile(rb"\\([0-7]{3})")
+
+# One parsed chunk: local name table, name ids, types, TTLs, values,
+# lines read and (chunk line number, message) for every rejected line
+ChunkResult = Tuple[List[str], array.array, array.array, array.array, List[str], int, List[Tuple[int, str]]]
+
+
+@dataclass(frozen=True, slots=True)
+class TinyDNSRecord:
+    """A single record materialised from a TinyDNSData store."""
+
+    name: str
+    type: str
+    ttl: int
+    value: str
+
+
+def _unescape(field: bytes) -> bytes:
+    """Decodes tinydns ``\\ooo`` octal escapes."""
+    if b"\\" not in field:
+        return field
+    return _OCTAL_ESCAPE.sub(lambda m: bytes([int(m.group(1), 8) & 0xFF]), field)
+
+
+def _name(field: bytes) -> str:
+    """Decodes a domain name field to its lower-case text form."""
+    return _unescape(field).decode("latin-1").strip(".").lower()
+
+
+def _ttl(fields: Sequence[bytes], index: int, default: int) -> int:
+    """Returns the TTL at ``fields[index]``, or ``default`` when absent."""
+    if len(fields) > index and fields[index]:
+        return int(fields[index])
+    return default
+
+
+def _server_name(x: str, fqdn: str, label: str) -> str:
+    """Expands the ``x`` field of ``.``, ``&`` and ``@`` lines."""
+    return x if "." in x else f"{x}.{label}.{fqdn}"
+
+
+def _reverse_name(address: Union[ipaddress.IPv4Address, ipaddress.IPv6Address]) -> str:
+    """Returns the in-addr.arpa or ip6.arpa name of an address."""
+    return address.reverse_pointer.lower()
+
+
+def _ipv6(field: bytes) -> ipaddress.IPv6Address:
+    """Parses the 32 hex digit IPv6 address used by ``3`` and ``6`` lines."""
+    return ipaddress.IPv6Address(int(field, 16))
+
+
+def _quote(text: str) -> str:
+    """Quotes a TXT string as in zone files."""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def parse_line(line: bytes, serial: int = 0) -> List[Tuple[str, int, int, str]]:
+    """
+    Parses one line of a tinydns-data ``data`` file.
+
+    Args:
+        line: The line, without its newline.
+        serial: SOA serial for ``.`` lines, normally the file's mtime.
+
+    Returns:
+        (name, type, ttl, value) for every record the line defines; empty
+        for comments, blank, location and disabled lines.
+
+    Raises:
+        ValueError: If the line cannot be parsed.
+    """
+    if not line or line[:1] in b"#-%":
+        return []
+
+    kind = line[:1]
+    fields = line[1:].split(b":")
+    fqdn = _name(fields[0])
+    ip = fields[1].decode("ascii") if len(fields) > 1 else ""
+
+    if kind in b"+=":
+        address = ipaddress.IPv4Address(ip)
+        ttl = _ttl(fields, 2, TTL_DEFAULT)
+        records = [(fqdn, A, ttl, str(address))]
+        if kind == b"=":
+            records.append((_reverse_name(address), PTR, ttl, fqdn))
+        return records
+
+    if kind in b".&":
+        server = _server_name(_name(fields[2]), fqdn, "ns")
+        ttl = _ttl(fields, 3, TTL_NS)
+        records = [(fqdn, NS, ttl, server)]
+        if ip:
+            records.append((server, A, ttl, str(ipaddress.IPv4Address(ip))))
+        if kind == b".":
+            soa = f"{server} hostmaster.{fqdn} {serial} {SOA_REFRESH} {SOA_RETRY} {SOA_EXPIRE} {SOA_MINIMUM}"
+            records.append((fqdn, SOA, TTL_SOA, soa))
+        return records
+
+    if kind == b"@":
+        server = _server_name(_name(fields[2]), fqdn, "mx")
+        distance = int(fields[3]) if len(fields) > 3 and fields[3] else 0
+        ttl = _ttl(fields, 4, TTL_DEFAULT)
+        records = [(fqdn, MX, ttl, f"{distance} {server}")]
+        if ip:
+            records.append((server, A, ttl, str(ipaddress.IPv4Address(ip))))
+        return records
+
+    if kind in b"36":
+        address = _ipv6(fields[1])
+        ttl = _ttl(fields, 2, TTL_DEFAULT)
+        records = [(fqdn, AAAA, ttl, str(address))]
+        if kind == b"6":
+            records.append((_reverse_name(address), PTR, ttl, fqdn))
+        return records
+
+    if kind == b"'":
+        return [(fqdn, TXT, _ttl(fields, 2, TTL_DEFAULT), _quote(_unescape(fields[1]).decode("latin-1")))]
+
+    if kind in b"^C":
+        return [(fqdn, PTR if kind == b"^" else CNAME, _ttl(fields, 2, TTL_DEFAULT), _name(fields[1]))]
+
+    if kind == b"Z":
+        timers = [int(f) if f else default for f, default in zip(
+            fields[3:8], (serial, SOA_REFRESH, SOA_RETRY, SOA_EXPIRE, SOA_MINIMUM))]
+        timers += [serial, SOA_REFRESH, SOA_RETRY, SOA_EXPIRE, SOA_MINIMUM][len(timers):]
+        soa = " ".join([_name(fields[1]), _name(fields[2])] + [str(t) for t in timers])
+        return [(fqdn, SOA, _ttl(fields, 8, TTL_SOA), soa)]
+
+    if kind == b":":
+        rdata = _unescape(fields[2])
+        return [(fqdn, int(fields[1]), _ttl(fields, 3, TTL_DEFAULT), f"\\# {len(rdata)} {rdata.hex()}".rstrip())]
+
+    raise ValueError(f"unknown record type {kind.decode('latin-1')!r}")
+
+
+def _parse_chunk(path: str, start: int, end: int, serial: int) -> ChunkResult:
+    """
+    Parses the lines between two byte offsets of a data file.
+
+    Runs in pool workers, so it maps the file itself rather than receiving
+    the data. Names are interned into a chunk-local table to keep the
+    result small to pickle.
+
+    Args:
+        path: Path of the data file.
+        start: Offset of the first line of the chunk.
+        end: Offset just past the last line of the chunk.
+        serial: SOA serial for ``.`` lines.
+
+    Returns:
+        The chunk's columns, line count and rejected lines.
+    """
+    names: List[str] = []
+    name_ids: Dict[str, int] = {}
+    name_col = array.array("I")
+    type_col = array.array("H")
+    ttl_col = array.array("I")
+    values: List[str] = []
+    errors: List[Tuple[int, str]] = []
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = mm[start:end].split(b"\n")
+    if lines and not lines[-1]:
+        lines.pop()
+
+    for line_num, line in enumerate(lines, 1):
+        try:
+            records = parse_line(line.rstrip(b"\r"), serial)
+        except (ValueError, IndexError) as e:
+            errors.append((line_num, str(e)))
+            continue
+        for name, rdtype, ttl, value in records:
+            name_id = name_ids.get(name)
+            if name_id is None:
+                name_id = name_ids[name] = len(names)
+                names.append(name)
+            name_col.append(name_id)
+            type_col.append(rdtype)
+            ttl_col.append(ttl)
+            values.append(value)
+
+    return names, name_col, type_col, ttl_col, values, len(lines), errors
+
+
+def _chunk_bounds(mm: mmap.mmap, chunk_size: int) -> List[Tuple[int, int]]:
+    """Splits a mapped file into chunks of about ``chunk_size`` bytes ending at newlines."""
+    bounds = []
+    start = 0
+    size = len(mm)
+    while start < size:
+        end = mm.find(b"\n", min(start + chunk_size, size) - 1)
+        end = size if end == -1 else end + 1
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+class TinyDNSData:
+    """Columnar store of TinyDNS records with hostname and address indexes.
+
+    Records live in parallel arrays (name id, type, TTL) plus a list of
+    rdata text, with each distinct name stored once. ``lookup`` and
+    ``lookup_address`` are dictionary lookups into prebuilt indexes.
+    """
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.name_col = array.array("I")
+        self.type_col = array.array("H")
+        self.ttl_col = array.array("I")
+        self.values: List[str] = []
+        self.lines = 0
+        self.errors = 0
+        self._name_ids: Dict[str, int] = {}
+        self._by_name: Dict[int, array.array] = {}
+        self._by_address: Dict[str, array.array] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def close(self) -> None:
+        """Does nothing; lets the store be used like TinyDNSCDB."""
+
+    def __enter__(self) -> "TinyDNSData":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _add_chunk(self, chunk: ChunkResult, first_line: int) -> None:
+        """Appends a parsed chunk, mapping its names onto the store's table."""
+        names, name_col, type_col, ttl_col, values, lines, errors = chunk
+        mapping = []
+        for name in names:
+            name_id = self._name_ids.get(name)
+            if name_id is None:
+                name_id = self._name_ids[name] = len(self.names)
+                self.names.append(name)
+            mapping.append(name_id)
+
+        self.name_col.extend(mapping[i] for i in name_col)
+        self.type_col.extend(type_col)
+        self.ttl_col.extend(ttl_col)
+        self.values.extend(values)
+        self.lines += lines
+        self.errors += len(errors)
+        for line_num, message in errors:
+            logger.warning(f"Error parsing line {first_line + line_num}: {message}")
+
+    def _build_indexes(self) -> None:
+        """Builds the name and address indexes over all records."""
+        by_name: Dict[int, array.array] = {}
+        by_address: Dict[str, array.array] = {}
+        for index, (name_id, rdtype) in enumerate(zip(self.name_col, self.type_col)):
+            by_name.setdefault(name_id, array.array("I")).append(index)
+            if rdtype == A or rdtype == AAAA:
+                by_address.setdefault(self.values[index], array.array("I")).append(index)
+        self._by_name = by_name
+        self._by_address = by_address
+
+    def record(self, index: int) -> TinyDNSRecord:
+        """Materialises the record at ``index``."""
+        return TinyDNSRecord(self.names[self.name_col[index]],
+                             dns.rdatatype.to_text(self.type_col[index]),
+                             self.ttl_col[index],
+                             self.values[index])
+
+    def records(self, record_type: Optional[str] = None) -> Iterator[TinyDNSRecord]:
+        """Iterates over all records, or those of one type, in file order."""
+        rdtype = dns.rdatatype.from_text(record_type) if record_type else None
+        for index, current in enumerate(self.type_col):
+            if rdtype is None or current == rdtype:
+                yield self.record(index)
+
+    def lookup(self, name: str, record_type: Optional[str] = None) -> List[TinyDNSRecord]:
+        """
+        Returns the records of a name.
+
+        Args:
+            name: Domain name, with or without the trailing dot.
+            record_type: Optional type to restrict the result to.
+
+        Returns:
+            Matching records in file order.
+        """
+        name_id = self._name_ids.get(name.strip(".").lower())
+        if name_id is None:
+            return []
+        rdtype = dns.rdatatype.from_text(record_type) if record_type else None
+        return [self.record(i) for i in self._by_name.get(name_id, ())
+                if rdtype is None or self.type_col[i] == rdtype]
+
+    def lookup_address(self, address: str) -> List[TinyDNSRecord]:
+        """Returns the A and AAAA records pointing at an address."""
+        try:
+            address = str(ipaddress.ip_address(address))
+        except ValueError:
+            return []
+        return [self.record(i) for i in self._by_address.get(address, ())]
+
+    def counts(self) -> Dict[str, int]:
+        """Returns the number of records of each type."""
+        counts: Dict[int, int] = {}
+        for rdtype in self.type_col:
+            counts[rdtype] = counts.get(rdtype, 0) + 1
+        return {dns.rdatatype.to_text(rdtype): count for rdtype, count in counts.items()}
+
+
+def _cdb_hash(key: bytes) -> int:
+    """The djb hash cdb files are keyed by."""
+    h = 5381
+    for byte in key:
+        h = ((h << 5) + h) & 0xFFFFFFFF ^ byte
+    return h
+
+
+def _wire_name(name: str) -> bytes:
+    """Encodes a domain name as tinydns-data keys it: lower-case DNS wire format."""
+    labels = [label.encode("latin-1") for label in name.strip(".").lower().split(".") if label]
+    return b"".join(bytes([len(label)]) + label for label in labels) + b"\0"
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Decodes an uncompressed wire-format name, returning it and the offset past it."""
+    labels = []
+    while data[offset]:
+        length = data[offset]
+        labels.append(data[offset + 1:offset + 1 + length].decode("latin-1"))
+        offset += length + 1
+    return ".".join(labels).lower(), offset + 1
+
+
+def _rdata_text(rdtype: int, rdata: bytes) -> str:
+    """Converts tinydns-data's rdata to the value text used by TinyDNSData."""
+    if rdtype == A:
+        return str(ipaddress.IPv4Address(rdata))
+    if rdtype == AAAA:
+        return str(ipaddress.IPv6Address(rdata))
+    if rdtype in (NS, CNAME, PTR):
+        return _read_name(rdata, 0)[0]
+    if rdtype == MX:
+        return f"{struct.unpack('>H', rdata[:2])[0]} {_read_name(rdata, 2)[0]}"
+    if rdtype == SOA:
+        mname, offset = _read_name(rdata, 0)
+        rname, offset = _read_name(rdata, offset)
+        return " ".join([mname, rname] + [str(t) for t in struct.unpack(">5I", rdata[offset:offset + 20])])
+    if rdtype == TXT:
+        chunks, offset = [], 0
+        while offset < len(rdata):
+            chunks.append(rdata[offset + 1:offset + 1 + rdata[offset]])
+            offset += rdata[offset] + 1
+        return _quote(b"".join(chunks).decode("latin-1"))
+    return f"\\# {len(rdata)} {rdata.hex()}".rstrip()
+
+
+class TinyDNSCDB:
+    """Reads records straight from the ``data.cdb`` compiled by tinydns-data.
+
+    The file is memory-mapped and looked up through the cdb hash tables,
+    so ``lookup`` costs the same however large the data is and nothing is
+    parsed up front. ``lookup_address``, ``records`` and ``counts`` have to
+    scan every record. Location-restricted records are returned for all
+    locations, and timestamps are ignored.
+    """
+
+    errors = 0
+
+    def __init__(self, path: Union[str, pathlib.Path]):
+        """
+        Open a data.cdb file.
+
+        Args:
+            path: Path of the cdb file.
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist.
+            ValueError: If the file is not a cdb.
+        """
+        self.path = pathlib.Path(path)
+        with self.path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < 2048:
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a cdb file")
+        self._tables = [struct.unpack_from("<II", self._mm, i * 8) for i in range(256)]
+        # Records run from the header to the first hash table
+        self._end = min(position for position, _ in self._tables)
+
+    def close(self) -> None:
+        """Unmaps the file."""
+        self._mm.close()
+
+    def __enter__(self) -> "TinyDNSCDB":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_all(self, key: bytes) -> Iterator[bytes]:
+        """Yields every value stored under ``key``, in insertion order."""
+        h = _cdb_hash(key)
+        table, slots = self._tables[h & 0xFF]
+        if not slots:
+            return
+        slot = (h >> 8) % slots
+        for _ in range(slots):
+            slot_hash, position = struct.unpack_from("<II", self._mm, table + slot * 8)
+            if position == 0:
+                return
+            if slot_hash == h:
+                key_length, value_length = struct.unpack_from("<II", self._mm, position)
+                if self._mm[position + 8:position + 8 + key_length] == key:
+                    start = position + 8 + key_length
+                    yield self._mm[start:start + value_length]
+            slot = (slot + 1) % slots
+
+    def _items(self) -> Iterator[Tuple[bytes, bytes]]:
+        """Yields every (key, value) pair in file order."""
+        position = 2048
+        while position < self._end:
+            key_length, value_length = struct.unpack_from("<II", self._mm, position)
+            start = position + 8
+            yield self._mm[start:start + key_length], self._mm[start + key_length:start + key_length + value_length]
+            position = start + key_length + value_length
+
+    @staticmethod
+    def _decode(name: str, value: bytes) -> TinyDNSRecord:
+        """Decodes one tinydns-data value stored under ``name``."""
+        rdtype, flag = struct.unpack_from(">HB", value)
+        offset = 3
+        if flag in b"+>":  # restricted to a location
+            offset += 2
+        if flag in b"*+":  # wildcard, stored under the parent name
+            name = f"*.{name}" if name else "*"
+        ttl = struct.unpack_from(">I", value, offset)[0]
+        return TinyDNSRecord(name, dns.rdatatype.to_text(rdtype), ttl, _rdata_text(rdtype, value[offset + 12:]))
+
+    def lookup(self, name: str, record_type: Optional[str] = None) -> List[TinyDNSRecord]:
+        """
+        Returns the records of a name.
+
+        Args:
+            name: Domain name, with or without the trailing dot.
+            record_type: Optional type to restrict the result to.
+
+        Returns:
+            Matching records in file order.
+        """
+        wanted = dns.rdatatype.from_text(record_type) if record_type else None
+        name = name.strip(".").lower()
+        if name.startswith("*."):
+            name, wildcard = name[2:], True
+        else:
+            wildcard = False
+
+        records = []
+        for value in self.get_all(_wire_name(name)):
+            if wanted is not None and struct.unpack_from(">H", value)[0] != wanted:
+                continue
+            if (value[2:3] in (b"*", b"+")) == wildcard:
+                records.append(self._decode(name, value))
+        return records
+
+    def records(self, record_type: Optional[str] = None) -> Iterator[TinyDNSRecord]:
+        """Iterates over all records, or those of one type, in file order."""
+        wanted = dns.rdatatype.from_text(record_type) if record_type else None
+        for key, value in self._items():
+            # Keys starting with a zero byte hold location prefixes, not names
+            if key[:1] == b"\0" or len(value) < 15:
+                continue
+            if wanted is None or struct.unpack_from(">H", value)[0] == wanted:
+                yield self._decode(_read_name(key, 0)[0], value)
+
+    def lookup_address(self, address: str) -> List[TinyDNSRecord]:
+        """Returns the A and AAAA records pointing at an address, by scanning all records."""
+        try:
+            address = str(ipaddress.ip_address(address))
+        except ValueError:
+            return []
+        record_type = "AAAA" if ":" in address else "A"
+        return [record for record in self.records(record_type) if record.value == address]
+
+    def counts(self) -> Dict[str, int]:
+        """Returns the number of records of each type."""
+        counts: Dict[str, int] = {}
+        for record in self.records():
+            counts[record.type] = counts.get(record.type, 0) + 1
+        return counts
+
+    def __len__(self) -> int:
+        return sum(self.counts().values())
+
+
+def fresh_cdb(directory: Union[str, pathlib.Path]) -> Optional[pathlib.Path]:
+    """
+    Returns a TinyDNS directory's data.cdb if it is at least as new as ``data``.
+
+    Args:
+        directory: The TinyDNS data directory.
+
+    Returns:
+        Path of data.cdb, or None if it is missing or older than ``data``.
+    """
+    directory = pathlib.Path(directory)
+    cdb_file = directory / "data.cdb"
+    data_file = directory / "data"
+    if not cdb_file.exists():
+        return None
+    if data_file.exists() and cdb_file.stat().st_mtime < data_file.stat().st_mtime:
+        logger.info(f"Ignoring {cdb_file}: older than {data_file}")
+        return None
+    return cdb_file
+
+
+def load_tinydns(
+    path: Union[str, pathlib.Path],
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> TinyDNSData:
+    """
+    Loads a tinydns-data ``data`` file into an indexed store.
+
+    Files of PARALLEL_THRESHOLD bytes or more are parsed on a process pool
+    in newline-aligned chunks; smaller ones in-process. Unparsable lines
+    are logged and skipped.
+
+    Args:
+        path: Path of the data file.
+        workers: Worker processes (default: one per CPU; 1 disables the pool).
+        chunk_size: Approximate bytes per parse task.
+
+    Returns:
+        The loaded records.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist.
+        PermissionError: If the file cannot be read.
+    """
+    path = pathlib.Path(path)
+    stat = path.stat()
+    serial = int(stat.st_mtime)
+    data = TinyDNSData()
+    if stat.st_size == 0:
+        return data
+
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = _chunk_bounds(mm, chunk_size)
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(bounds) > 1 and stat.st_size >= PARALLEL_THRESHOLD:
+        logger.info(f"Parsing {path} in {len(bounds)} chunks on {workers} processes")
+        with ProcessPoolExecutor(max_workers=min(workers, len(bounds))) as executor:
+            chunks = executor.map(_parse_chunk, *zip(*[(str(path), start, end, serial) for start, end in bounds]))
+            for chunk in chunks:
+                data._add_chunk(chunk, data.lines)
+    else:
+        for start, end in bounds:
+            data._add_chunk(_parse_chunk(str(path), start, end, serial), data.lines)
+
+    data._build_indexes()
+    logger.info(f"Loaded {len(data)} records for {len(data.names)} names from {path}")
+    return data
@@ -0,0 +1,483 @@
+"""
+Unit tests for the DNS manager module.
+"""
+
+import contextlib
+import copy
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import dns.rrset
+
+from utility_scripts.common.exceptions import NetworkError
+from utility_scripts.dns.manager import DNSError, DNSManager, ResolverCache
+
+from tests.unit.helpers import FakeClock
+
+
+class StandInDNSServer:
+    """Answers UDP and TCP queries from a dict of records, in background threads.
+
+    ``records`` maps (name, type) to a list of rdata strings, e.g.
+    ``{("example.com.", "A"): ["192.0.2.1"]}``. Names absent from every key
+    get NXDOMAIN; known names without the type get an empty answer. Negative
+    answers carry the enclosing zone's SOA in the authority section.
+
+    Over TCP, AXFR streams one message per RRset and IXFR sends the
+    differences from any earlier version set with ``update``.
+    """
+
+    def __init__(self, records, ttl=300, delay=0.0):
+        self.ttl = ttl
+        self.delay = delay
+        self.queries = []
+        self.transfers = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.update(records)
+        server = self
+
+        class UDPHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                data, sock = self.request
+                # The socket is closed under slow answers when a test ends early
+                with contextlib.suppress(OSError):
+                    sock.sendto(server.answer(data), self.client_address)
+
+        class TCPHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    length = self.rfile.read(2)
+                    if len(length) < 2:
+                        return
+                    data = self.rfile.read(int.from_bytes(length, "big"))
+                    query = dns.message.from_wire(data)
+                    if query.question[0].rdtype in (dns.rdatatype.AXFR, dns.rdatatype.IXFR):
+                        wires = [message.to_wire() for message in server.transfer(query)]
+                    else:
+                        wires = [server.answer(data)]
+                    for wire in wires:
+                        self.wfile.write(len(wire).to_bytes(2, "big") + wire)
+
+        # TCP and UDP share one port, as on a real name server
+        for _ in range(20):
+            tcp = socketserver.ThreadingTCPServer(("127.0.0.1", 0), TCPHandler)
+            try:
+                self.udp = socketserver.ThreadingUDPServer(("127.0.0.1", tcp.server_address[1]), UDPHandler)
+                break
+            except OSError:
+                tcp.server_close()
+        self.tcp = tcp
+        self.tcp.daemon_threads = self.udp.daemon_threads = True
+        self.port = self.udp.server_address[1]
+        self._threads = [
+            threading.Thread(target=s.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+            for s in (self.udp, self.tcp)
+        ]
+
+    def update(self, records):
+        """Replaces the records, keeping each SOA serial's version for IXFR."""
+        self.records = {(dns.name.from_text(name), dns.rdatatype.from_text(rtype)): values
+                        for (name, rtype), values in records.items()}
+        self.names = {name for name, _ in self.records}
+        for (name, rdtype), values in self.records.items():
+            if rdtype == dns.rdatatype.SOA:
+                self._versions[(name, self._rrset(name, rdtype, values)[0].serial)] = self.records
+
+    def _rrset(self, name, rdtype, values):
+        return dns.rrset.from_text_list(name, self.ttl, dns.rdataclass.IN, rdtype, values)
+
+    def answer(self, data):
+        query = dns.message.from_wire(data)
+        question = query.question[0]
+        with self._lock:
+            self.queries.append((question.name.to_text(), dns.rdatatype.to_text(question.rdtype)))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            response = dns.message.make_response(query)
+            values = self.records.get((question.name, question.rdtype))
+            if values:
+                response.answer.append(self._rrset(question.name, question.rdtype, values))
+            else:
+                if question.name not in self.names:
+                    response.set_rcode(dns.rcode.NXDOMAIN)
+                soa = self._enclosing_soa(question.name)
+                if soa is not None:
+                    response.authority.append(soa)
+            return response.to_wire()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _enclosing_soa(self, name):
+        while True:
+            values = self.records.get((name, dns.rdatatype.SOA))
+            if values:
+                return self._rrset(name, dns.rdatatype.SOA, values)
+            if name == dns.name.root:
+                return None
+            name = name.parent()
+
+    def _zone_rrsets(self, origin, records):
+        return [self._rrset(name, rdtype, values)
+                for (name, rdtype), values in records.items()
+                if name.is_subdomain(origin) and rdtype != dns.rdatatype.SOA]
+
+    def transfer(self, query):
+        """Returns the response messages of an AXFR or IXFR query."""
+        origin = query.question[0].name
+        self.transfers.append(dns.rdatatype.to_text(query.question[0].rdtype))
+        soa = self._enclosing_soa(origin)
+        if soa is None or soa.name != origin:
+            response = dns.message.make_response(query)
+            response.set_rcode(dns.rcode.REFUSED)
+            return [response]
+
+        if query.question[0].rdtype == dns.rdatatype.IXFR:
+            serial = query.authority[0][0].serial
+            old = self._versions.get((origin, serial))
+            if serial == soa[0].serial:
+                sections = [[soa]]
+            elif old is not None:
+                old_soa = self._rrset(origin, dns.rdatatype.SOA, old[(origin, dns.rdatatype.SOA)])
+                deleted = self._difference(origin, old, self.records)
+                added = self._difference(origin, self.records, old)
+                sections = [[soa, old_soa], deleted, [soa], added, [soa]]
+            else:
+                sections = [[soa], self._zone_rrsets(origin, self.records), [soa]]
+        else:
+            sections = [[soa], self._zone_rrsets(origin, self.records), [soa]]
+
+        messages = []
+        for rrset in [rrset for section in sections for rrset in section]:
+            message = dns.message.make_response(query)
+            message.answer.append(rrset)
+            messages.append(message)
+        return messages
+
+    def _difference(self, origin, records, other):
+        rrsets = []
+        for (name, rdtype), values in records.items():
+            missing = [v for v in values if v not in other.get((name, rdtype), [])]
+            if missing and name.is_subdomain(origin) and rdtype != dns.rdatatype.SOA:
+                rrsets.append(self._rrset(name, rdtype, missing))
+        return rrsets
+
+    def __enter__(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        for server in (self.udp, self.tcp):
+            server.shutdown()
+            server.server_close()
+
+
+ZONE = {
+    ("example.com.", "SOA"): ["ns1.example.com. hostmaster.example.com. 2024010101 3600 600 86400 300"],
+    ("example.com.", "NS"): ["ns1.example.com.", "ns2.example.com."],
+    ("example.com.", "A"): ["192.0.2.1"],
+    ("example.com.", "MX"): ["10 mail.example.com."],
+    ("example.com.", "TXT"): ['"v=spf1 -all"'],
+    ("example.com.", "AAAA"): ["2001:db8::1"],
+    ("ns1.example.com.", "A"): ["127.0.0.1"],
+    ("www.example.com.", "CNAME"): ["example.com."],
+    ("_sip._tcp.example.com.", "SRV"): ["10 5 5060 sip.example.com."],
+    ("example.org.", "SOA"): ["ns1.example.org. hostmaster.example.org. 7 3600 600 86400 300"],
+    ("example.org.", "A"): ["198.51.100.7"],
+}
+
+
+class TestGetZones(unittest.TestCase):
+    """Tests for concurrent zone retrieval against a stand-in server."""
+
+    def _manager(self, server, **kwargs):
+        return DNSManager(port=server.port, **kwargs)
+
+    def test_get_zone(self):
+        """get_zone returns the familiar record dict."""
+        with StandInDNSServer(ZONE) as server:
+            records = self._manager(server).get_zone("example.com", "127.0.0.1")
+
+        self.assertEqual(records["SOA"][0]["serial"], 2024010101)
+        self.assertEqual(records["SOA"][0]["mname"], "ns1.example.com.")
+        self.assertEqual(sorted(ns["nameserver"] for ns in records["NS"]),
+                         ["ns1.example.com.", "ns2.example.com."])
+        self.assertEqual(records["A"], [{"address": "192.0.2.1"}])
+        self.assertEqual(records["MX"], [{"preference": 10, "exchange": "mail.example.com."}])
+        self.assertEqual(records["TXT"], [{"text": "v=spf1 -all"}])
+
+    def test_get_zones_runs_queries_concurrently(self):
+        """All record types of all domains are in flight together."""
+        with StandInDNSServer(ZONE, delay=0.2) as server:
+            started = time.monotonic()
+            zones = self._manager(server).get_zones(["example.com", "example.org"], "127.0.0.1")
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(list(zones), ["example.com", "example.org"])
+        self.assertEqual(zones["example.org"].records["NS"], [])
+        self.assertEqual(len(server.queries), 10)
+        self.assertGreater(server.max_in_flight, 5)
+        self.assertLess(elapsed, 1.5)
+
+    def test_missing_domain_is_reported_not_raised(self):
+        """A domain without SOA fails alone; others still succeed."""
+        with StandInDNSServer(ZONE) as server:
+            zones = self._manager(server).get_zones(["example.com", "missing.test"], "127.0.0.1")
+
+        self.assertIsNotNone(zones["example.com"].records)
+        self.assertIsInstance(zones["missing.test"].error, DNSError)
+        with StandInDNSServer(ZONE) as server:
+            with self.assertRaises(DNSError):
+                self._manager(server).get_zone("missing.test", "127.0.0.1")
+
+    def test_timeout(self):
+        """Queries are bounded by the per-query timeout."""
+        with StandInDNSServer(ZONE, delay=1.0) as server:
+            started = time.monotonic()
+            zones = self._manager(server, timeout=0.3).get_zones(["example.com"], "127.0.0.1")
+            elapsed = time.monotonic() - started
+
+        self.assertIsInstance(zones["example.com"].error, (DNSError, NetworkError))
+        self.assertLess(elapsed, 1.0)
+
+    def test_name_server_does_not_mutate_manager(self):
+        """Querying a specific server leaves the shared resolver alone."""
+        with StandInDNSServer(ZONE) as server:
+            manager = self._manager(server)
+            before = list(manager.resolver.nameservers)
+            manager.get_zone("example.com", "127.0.0.1")
+        self.assertEqual(manager.resolver.nameservers, before)
+
+
+class TestResolverCache(unittest.TestCase):
+    """Tests for TTL-aware caching of resolver answers."""
+
+    def setUp(self):
+        self.clock = FakeClock(1_700_000_000.0)
+
+    def _manager(self, server, **kwargs):
+        cache = ResolverCache(clock=self.clock, **kwargs)
+        return DNSManager(port=server.port, cache=cache)
+
+    def test_repeat_lookups_are_served_from_cache(self):
+        """A second get_zone sends no queries."""
+        with StandInDNSServer(ZONE) as server:
+            manager = self._manager(server)
+            first = manager.get_zone("example.com", "127.0.0.1")
+            second = manager.get_zone("example.com", "127.0.0.1")
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(server.queries), 5)
+        self.assertEqual(manager.cache.stats()["hits"], 5)
+        self.assertEqual(manager.cache.stats()["misses"], 5)
+
+    def test_positive_and_negative_ttls(self):
+        """Answers expire with their TTL, negative ones with the SOA minimum."""
+        with StandInDNSServer(ZONE, ttl=600) as server:
+            manager = self._manager(server)
+            self.assertEqual(manager.get_zone("example.org", "127.0.0.1")["NS"], [])
+
+            self.clock.now += 301
+            manager.get_zone("example.org", "127.0.0.1")
+            self.assertEqual(sorted(server.queries[5:]),
+                             [("example.org.", "MX"), ("example.org.", "NS"), ("example.org.", "TXT")])
+
+            self.clock.now += 300
+            manager.get_zone("example.org", "127.0.0.1")
+            self.assertEqual(len(server.queries), 13)
+
+    def test_nxdomain_is_cached(self):
+        """NXDOMAIN answers carrying an SOA are cached too."""
+        with StandInDNSServer(ZONE) as server:
+            manager = self._manager(server)
+            for _ in range(2):
+                with self.assertRaises(DNSError):
+                    manager.get_zone("gone.example.com", "127.0.0.1")
+        self.assertEqual(len(server.queries), 5)
+
+    def test_lru_eviction(self):
+        """The cache never holds more than max_entries answers."""
+        with StandInDNSServer(ZONE) as server:
+            manager = self._manager(server, max_entries=3)
+            manager.get_zone("example.com", "127.0.0.1")
+        self.assertEqual(len(manager.cache), 3)
+        self.assertEqual(manager.cache.stats()["evictions"], 2)
+
+    def test_persistence(self):
+        """Saved answers are reused by the next run until they expire."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/dns-cache.json"
+            with StandInDNSServer(ZONE) as server:
+                manager = self._manager(server, path=path)
+                manager.get_zone("example.com", "127.0.0.1")
+                manager.cache.save()
+
+                manager = self._manager(server, path=path)
+                records = manager.get_zone("example.com", "127.0.0.1")
+            self.assertEqual(len(server.queries), 5)
+            self.assertEqual(records["SOA"][0]["serial"], 2024010101)
+
+            self.clock.now += 301
+            self.assertEqual(len(ResolverCache(path, clock=self.clock)), 0)
+
+
+class TestTransferZone(unittest.TestCase):
+    """Tests for AXFR/IXFR zone transfers."""
+
+    def _manager(self, server, **kwargs):
+        return DNSManager(port=server.port, **kwargs)
+
+    def test_axfr_fetches_every_record(self):
+        """The whole zone is transferred from the SOA primary."""
+        with StandInDNSServer(ZONE) as server:
+            result = self._manager(server).transfer_zone("example.com", name_server="127.0.0.1")
+
+        self.assertEqual((result.primary, result.serial, result.method), ("127.0.0.1", 2024010101, "AXFR"))
+        records = result.records
+        self.assertEqual(records["CNAME"], [{"name": "www.example.com.", "ttl": 300, "data": "example.com."}])
+        self.assertEqual(records["SRV"][0]["data"], "10 5 5060 sip.example.com.")
+        self.assertEqual(records["AAAA"][0]["data"], "2001:db8::1")
+        self.assertEqual(records["A"], [{"name": "example.com.", "ttl": 300, "address": "192.0.2.1"},
+                                        {"name": "ns1.example.com.", "ttl": 300, "address": "127.0.0.1"}])
+        self.assertEqual(server.transfers, ["AXFR"])
+
+    def test_unchanged_serial_skips_transfer(self):
+        """A zone whose serial has not moved is not transferred again."""
+        with StandInDNSServer(ZONE) as server:
+            manager = self._manager(server)
+            manager.transfer_zone("example.com", primary="127.0.0.1")
+            result = manager.transfer_zone("example.com", primary="127.0.0.1")
+
+        self.assertEqual(result.method, "UNCHANGED")
+        self.assertEqual(len(result.records["A"]), 2)
+        self.assertEqual(server.transfers, ["AXFR"])
+
+    def test_ixfr_applies_changes(self):
+        """A changed zone is brought up to date incrementally."""
+        changed = copy.deepcopy(ZONE)
+        changed[("example.com.", "SOA")] = ["ns1.example.com. hostmaster.example.com. 2024010102 3600 600 86400 300"]
+        changed[("example.com.", "A")] = ["192.0.2.2"]
+        del changed[("www.example.com.", "CNAME")]
+
+        with StandInDNSServer(ZONE) as server:
+            manager = self._manager(server)
+            manager.transfer_zone("example.com", primary="127.0.0.1")
+            server.update(changed)
+            result = manager.transfer_zone("example.com", primary="127.0.0.1")
+
+        self.assertEqual((result.serial, result.method), (2024010102, "IXFR"))
+        self.assertEqual(server.transfers, ["AXFR", "IXFR"])
+        self.assertNotIn("CNAME", result.records)
+        self.assertIn({"name": "example.com.", "ttl": 300, "address": "192.0.2.2"}, result.records["A"])
+        self.assertEqual(len(result.records["A"]), 2)
+
+    def test_zone_dir_is_reused_between_runs(self):
+        """A zone kept in zone_dir lets the next manager skip the transfer."""
+        with tempfile.TemporaryDirectory() as directory, StandInDNSServer(ZONE) as server:
+            self._manager(server, zone_dir=directory).transfer_zone("example.com", primary="127.0.0.1")
+            result = self._manager(server, zone_dir=directory).transfer_zone("example.com", primary="127.0.0.1")
+
+        self.assertEqual(result.method, "UNCHANGED")
+        self.assertEqual(result.records["SRV"][0]["name"], "_sip._tcp.example.com.")
+        self.assertEqual(server.transfers, ["AXFR"])
+
+    def test_unknown_zone(self):
+        """Transferring a zone the primary does not serve is an error."""
+        with StandInDNSServer(ZONE) as server:
+            with self.assertRaises(DNSError):
+                self._manager(server).transfer_zone("example.net", primary="127.0.0.1")
+
+    def test_primary_hostname_is_resolved(self):
+        """A --primary hostname is resolved first; an unknown one is a DNSError."""
+        with StandInDNSServer(ZONE) as server:
+            manager = self._manager(server)
+            result = manager.transfer_zone("example.com", primary="ns1.example.com", name_server="127.0.0.1")
+            self.assertEqual((result.primary, result.method), ("127.0.0.1", "AXFR"))
+            with self.assertRaisesRegex(DNSError, "Could not resolve primary name server missing.example.com"):
+                manager.transfer_zone("example.com", primary="missing.example.com", name_server="127.0.0.1")
+
+
+class TestSearchPatterns(unittest.TestCase):
+    """Tests for single-pass multi-pattern file search."""
+
+    HOSTS = (
+        "127.0.0.1 localhost\n"
+        "192.0.2.10 www.example.com www\n"
+        "# example.org is elsewhere\n"
+        "\n"
+        "192.0.2.11 mail.EXAMPLE.com\n"
+        "192.0.2.12 example.co"
+    )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = f"{self.directory.name}/hosts"
+        with open(self.path, "w") as f:
+            f.write(self.HOSTS)
+        self.manager = DNSManager()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_overlapping_patterns(self):
+        """Every pattern on a line is reported, including ones inside others."""
+        results = self.manager.search_patterns(
+            ["www.example.com", "example.com", "example.co", "example.org", "nowhere"], self.path
+        )
+        self.assertEqual(results, {
+            "www.example.com": ["2: 192.0.2.10 www.example.com www"],
+            "example.com": ["2: 192.0.2.10 www.example.com www"],
+            "example.co": ["2: 192.0.2.10 www.example.com www", "6: 192.0.2.12 example.co"],
+            "example.org": ["3: # example.org is elsewhere"],
+            "nowhere": [],
+        })
+
+    def test_ignore_case(self):
+        """Matching can ignore case; the default is case-sensitive."""
+        self.assertEqual(self.manager.search_file("mail.example.com", self.path), [])
+        results = self.manager.search_patterns(["mail.example.com", "MAIL.example.COM"], self.path, ignore_case=True)
+        self.assertEqual(results["mail.example.com"], ["5: 192.0.2.11 mail.EXAMPLE.com"])
+        self.assertEqual(results["MAIL.example.COM"], ["5: 192.0.2.11 mail.EXAMPLE.com"])
+
+    def test_search_file(self):
+        """search_file keeps its single-hostname interface."""
+        self.assertEqual(self.manager.search_file("localhost", self.path), ["1: 127.0.0.1 localhost"])
+        with self.assertRaises(FileNotFoundError):
+            self.manager.search_file("localhost", f"{self.directory.name}/missing")
+
+    def test_empty_pattern_matches_every_line(self):
+        """An empty hostname matches every line, as it always has."""
+        expected = [f"{n}: {line.strip()}" for n, line in enumerate(self.HOSTS.splitlines(), 1)]
+        self.assertEqual(self.manager.search_file("", self.path), expected)
+        results = self.manager.search_patterns(["", "localhost"], self.path)
+        self.assertEqual(results, {"": expected, "localhost": ["1: 127.0.0.1 localhost"]})
+
+    def test_search_files_in_parallel(self):
+        """Searching files on a process pool matches searching them in turn."""
+        empty = f"{self.directory.name}/empty"
+        open(empty, "w").close()
+        patterns = ["example", "localhost"]
+        parallel = self.manager.search_files(patterns, [self.path, empty], workers=2)
+        self.assertEqual(list(parallel), [self.path, empty])
+        self.assertEqual(parallel, self.manager.search_files(patterns, [self.path, empty], workers=1))
+        self.assertEqual(parallel[empty], {"example": [], "localhost": []})
+        self.assertEqual(len(parallel[self.path]["example"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
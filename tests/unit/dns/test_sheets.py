@@ -0,0 +1,174 @@
+"""
+Unit tests for Google Sheets search with local snapshots.
+"""
+
+import re
+import tempfile
+import time
+import unittest
+
+from utility_scripts.common.exceptions import AuthenticationError
+from utility_scripts.dns.manager import GoogleSheetsError, GoogleSheetsManager, SheetSnapshot, _rowcol_to_a1
+
+
+class FakeWorksheet:
+    """A worksheet holding a list of rows."""
+
+    def __init__(self, title, rows):
+        self.title = title
+        self.rows = rows
+
+    def get_all_values(self):
+        return self.rows
+
+
+class FakeSpreadsheet:
+    """A spreadsheet that counts the API calls made against it."""
+
+    def __init__(self, key, sheets, revision="2024-01-01T00:00:00Z"):
+        self.id = key
+        self.sheets = sheets
+        self.revision = revision
+        self.downloads = 0
+
+    def get_lastUpdateTime(self):
+        return self.revision
+
+    def worksheets(self):
+        return [FakeWorksheet(title, rows) for title, rows in self.sheets.items()]
+
+    def values_batch_get(self, ranges):
+        self.downloads += 1
+        titles = [r.strip("'").replace("''", "'") for r in ranges]
+        return {"valueRanges": [{"range": r, "values": self.sheets[t]} for r, t in zip(ranges, titles)]}
+
+
+class FakeClient:
+    """A gspread client serving FakeSpreadsheets by key."""
+
+    def __init__(self, *spreadsheets):
+        self.spreadsheets = {s.id: s for s in spreadsheets}
+
+    def open_by_key(self, key):
+        if key not in self.spreadsheets:
+            raise KeyError(key)
+        return self.spreadsheets[key]
+
+
+SHEETS = {
+    "Servers": [["Host", "IP"], ["web1.example.com", "10.0.0.1"], ["db1.example.com", "10.0.0.2"]],
+    "Bob's VLANs": [["VLAN", "Hosts"], ["10", "web1.example.com, db1.example.com"]],
+}
+
+
+class TestRowColToA1(unittest.TestCase):
+    """Tests for A1 notation."""
+
+    def test_columns(self):
+        """Columns past Z use two or more letters."""
+        self.assertEqual([_rowcol_to_a1(1, c) for c in (1, 26, 27, 52, 703)], ["A1", "Z1", "AA1", "AZ1", "AAA1"])
+
+
+class TestGoogleSheetsManager(unittest.TestCase):
+    """Tests for snapshot-backed spreadsheet searches."""
+
+    def setUp(self):
+        self.spreadsheet = FakeSpreadsheet("key1", SHEETS)
+        self.client = FakeClient(self.spreadsheet)
+
+    def test_search(self):
+        """Regex searches report every matching cell."""
+        manager = GoogleSheetsManager(client=self.client)
+        results = manager.search_spreadsheet("key1", r"^web1\.example\.com$")
+        self.assertEqual(results, [{"sheet": "Servers", "row": 2, "column": 1,
+                                    "value": "web1.example.com", "a1_notation": "Servers!A2"}])
+        self.assertEqual(len(manager.search_spreadsheet("key1", "DB1")), 2)
+        self.assertEqual(manager.search_spreadsheet("key1", "DB1", case_sensitive=True), [])
+
+    def test_unchanged_spreadsheet_is_not_downloaded_again(self):
+        """Repeated searches use the snapshot until the revision changes."""
+        manager = GoogleSheetsManager(client=self.client)
+        manager.search_spreadsheet("key1", "web1")
+        manager.search_spreadsheet("key1", "db1")
+        self.assertEqual((self.spreadsheet.downloads, manager.hits), (1, 1))
+
+        self.spreadsheet.sheets = dict(SHEETS, Servers=[["Host"], ["web2.example.com"]])
+        self.spreadsheet.revision = "2024-01-02T00:00:00Z"
+        self.assertEqual(len(manager.search_spreadsheet("key1", "web2")), 1)
+        self.assertEqual(self.spreadsheet.downloads, 2)
+
+    def test_lookup_uses_index(self):
+        """Whole-token lookups find cells holding several values."""
+        manager = GoogleSheetsManager(client=self.client)
+        cells = [r["a1_notation"] for r in manager.lookup_spreadsheet("key1", "DB1.example.com")]
+        self.assertEqual(cells, ["Servers!A3", "Bob's VLANs!B2"])
+        self.assertEqual(manager.lookup_spreadsheet("key1", "db1"), [])
+
+    def test_snapshots_persist_between_runs(self):
+        """A snapshot saved in cache_dir is reused by the next manager."""
+        with tempfile.TemporaryDirectory() as directory:
+            GoogleSheetsManager(client=self.client, cache_dir=directory).search_spreadsheet("key1", "web1")
+            manager = GoogleSheetsManager(client=self.client, cache_dir=directory)
+            self.assertEqual(len(manager.lookup_spreadsheet("key1", "10.0.0.2")), 1)
+        self.assertEqual((self.spreadsheet.downloads, manager.hits), (1, 1))
+
+    def test_refresh(self):
+        """refresh downloads the spreadsheet even when unchanged."""
+        manager = GoogleSheetsManager(client=self.client)
+        manager.snapshot("key1")
+        manager.snapshot("key1", refresh=True)
+        self.assertEqual(self.spreadsheet.downloads, 2)
+
+    def test_errors(self):
+        """Unauthenticated use, bad keys and bad patterns raise."""
+        manager = GoogleSheetsManager(client=self.client)
+        manager.client = None
+        with self.assertRaises(AuthenticationError):
+            manager.search_spreadsheet("key1", "web1")
+
+        manager = GoogleSheetsManager(client=self.client)
+        with self.assertRaises(GoogleSheetsError):
+            manager.search_spreadsheet("missing", "web1")
+        with self.assertRaises(GoogleSheetsError):
+            manager.search_spreadsheet("key1", "(")
+
+
+class TestSnapshotSearch(unittest.TestCase):
+    """Tests for searching the flattened snapshot buffer."""
+
+    VALUES = [
+        [["Host", "IP", ""], ["web1.example.com", "10.0.0.1"], ["multi\nline web1", " lead"]],
+        [],
+        [["a"], ["b", "ab"], ["", "x\ny"]],
+    ]
+
+    def setUp(self):
+        self.snapshot = SheetSnapshot.build("key", "r1", ["One", "Empty", "Two"], self.VALUES)
+
+    def test_matches_cell_by_cell_search(self):
+        """Every pattern finds exactly the cells a per-cell search does."""
+        patterns = ["web1", "^web1", "web1$", "^$", "", "a.*b", "a\\nb", "b$", "^\\s", "(?<=\\s)lead",
+                    "\\Aab\\Z", "^line", "x.y", "1\\.0\\.0", "nomatch", "(?i)HOST"]
+        for pattern in patterns:
+            with self.subTest(pattern=pattern):
+                regex = re.compile(pattern)
+                self.assertEqual(self.snapshot.search(regex), self.snapshot._search_cells(regex))
+
+    def test_large_sheet(self):
+        """A 100k-cell worksheet is searched in well under a second."""
+        rows = [[f"host{r}.example.com", f"10.{r // 65536}.{r // 256 % 256}.{r % 256}", "prod", "rack 7"]
+                for r in range(25000)]
+        snapshot = SheetSnapshot.build("big", "r1", ["Hosts"], [rows])
+        regex = re.compile(r"^10\.0\.9[0-9]\.1$")
+
+        started = time.perf_counter()
+        results = snapshot.search(regex)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual([r["a1_notation"] for r in results][:2], ["Hosts!B23042", "Hosts!B23298"])
+        self.assertEqual(results, snapshot._search_cells(regex))
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,267 @@
+"""
+Unit tests for the TinyDNS data loader.
+"""
+
+import io
+import operator
+import os
+import pathlib
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+import dns.name
+import dns.rdata
+import dns.rdataclass
+import dns.rdatatype
+
+from utility_scripts.dns import tinydns
+from utility_scripts.dns.manager import DNSManager
+from utility_scripts.dns.manager import run as manager_run
+from utility_scripts.dns.tinydns import TinyDNSCDB, TinyDNSRecord, fresh_cdb, load_tinydns, parse_line
+
+DATA = b"""\
+# example.com
+.example.com:192.0.2.53:a:3600
+&sub.example.com::ns.other.net.
+=www.example.com:192.0.2.10:300
++alias.example.com:192.0.2.10
++*.wild.example.com:192.0.2.77
+@example.com:192.0.2.25:mail:10
+Cftp.example.com:www.example.com
+'example.com:v=spf1 a\\072mx -all:600
+^11.2.0.192.in-addr.arpa:host11.example.com
+Zzone.example.net:ns1.example.net:admin.example.net:7::::60:900
+3v6.example.com:20010db8000000000000000000000001
+6dual.example.com:20010db8000000000000000000000002:120
+:_sip._tcp.example.com:33:\\000\\012\\000\\005\\023\\304\\003sip\\007example\\003com\\000
+-disabled.example.com:192.0.2.99
+%lo:192.0.2
++broken.example.com:not-an-ip
+"""
+
+
+def write_cdb(path, items):
+    """Writes (key, value) pairs as a cdb file, as cdbmake does."""
+    def cdb_hash(key):
+        h = 5381
+        for byte in key:
+            h = ((h << 5) + h) & 0xFFFFFFFF ^ byte
+        return h
+
+    tables = [[] for _ in range(256)]
+    out = bytearray(2048)
+    for key, value in items:
+        h = cdb_hash(key)
+        tables[h & 0xFF].append((h, len(out)))
+        out += struct.pack("<II", len(key), len(value)) + key + value
+
+    header = bytearray()
+    for table in tables:
+        slots = [(0, 0)] * (len(table) * 2)
+        for h, position in table:
+            slot = (h >> 8) % len(slots)
+            while slots[slot][1]:
+                slot = (slot + 1) % len(slots)
+            slots[slot] = (h, position)
+        header += struct.pack("<II", len(out), len(slots))
+        for h, position in slots:
+            out += struct.pack("<II", h, position)
+    out[:2048] = header
+    pathlib.Path(path).write_bytes(bytes(out))
+
+
+def compile_data(data, serial=0):
+    """Compiles data file lines into data.cdb items the way tinydns-data does."""
+    items = []
+    for line in data.splitlines():
+        try:
+            records = parse_line(line, serial)
+        except ValueError:
+            continue
+        for name, rdtype, ttl, value in records:
+            flag = b"="
+            if name.startswith("*."):
+                name, flag = name[2:], b"*"
+            rdata = dns.rdata.from_text(dns.rdataclass.IN, rdtype, value, origin=dns.name.root, relativize=False)
+            key = dns.name.from_text(name).canonicalize().to_wire()
+            items.append((key, struct.pack(">H", rdtype) + flag + struct.pack(">I", ttl)
+                          + bytes(8) + rdata.to_wire()))
+    items.append((b"\0%192.0.2", b"lo"))
+    return items
+
+
+class TestParseLine(unittest.TestCase):
+    """Tests for parsing single data lines."""
+
+    def test_dot_line_defines_ns_a_and_soa(self):
+        """A '.' line yields NS, glue A and SOA records."""
+        records = parse_line(b".example.com:192.0.2.53:a:3600", serial=42)
+        self.assertEqual(records, [
+            ("example.com", tinydns.NS, 3600, "a.ns.example.com"),
+            ("a.ns.example.com", tinydns.A, 3600, "192.0.2.53"),
+            ("example.com", tinydns.SOA, 2560,
+             "a.ns.example.com hostmaster.example.com 42 16384 2048 1048576 2560"),
+        ])
+
+    def test_ipv6_and_reverse(self):
+        """'6' lines yield AAAA and an ip6.arpa PTR."""
+        (_, aaaa, ttl, address), (ptr_name, ptr, _, target) = parse_line(
+            b"6dual.example.com:20010db8000000000000000000000002:120")
+        self.assertEqual((aaaa, ttl, address), (tinydns.AAAA, 120, "2001:db8::2"))
+        self.assertTrue(ptr_name.endswith(".8.b.d.0.1.0.0.2.ip6.arpa"))
+        self.assertEqual((ptr, target), (tinydns.PTR, "dual.example.com"))
+
+    def test_generic_record(self):
+        """':' lines keep their rdata in RFC 3597 form."""
+        [(name, rdtype, ttl, value)] = parse_line(b":x.example.com:65280:\\001\\002")
+        self.assertEqual((name, rdtype, ttl, value), ("x.example.com", 65280, 86400, "\\# 2 0102"))
+
+    def test_skipped_lines(self):
+        """Comments, disabled and location lines define no records."""
+        for line in (b"", b"# comment", b"-www.example.com:192.0.2.1", b"%lo:192.0.2"):
+            self.assertEqual(parse_line(line), [])
+
+    def test_unknown_type(self):
+        """Unknown line types are rejected."""
+        with self.assertRaises(ValueError):
+            parse_line(b"!what:ever")
+
+
+class TestLoadTinyDNS(unittest.TestCase):
+    """Tests for loading and indexing data files."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.directory.name) / "data"
+        self.path.write_bytes(DATA)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _check(self, data):
+        self.assertEqual(data.errors, 1)
+        self.assertEqual(data.lines, len(DATA.splitlines()))
+        self.assertEqual(data.lookup("WWW.example.com."), [
+            TinyDNSRecord("www.example.com", "A", 300, "192.0.2.10"),
+        ])
+        self.assertEqual(data.lookup("10.2.0.192.in-addr.arpa", "PTR")[0].value, "www.example.com")
+        self.assertEqual(sorted(r.name for r in data.lookup_address("192.0.2.10")),
+                         ["alias.example.com", "www.example.com"])
+        self.assertEqual(data.lookup_address("2001:0db8::1")[0].name, "v6.example.com")
+        self.assertEqual(data.lookup("example.com", "TXT")[0].value, '"v=spf1 a:mx -all"')
+        self.assertEqual(data.lookup("_sip._tcp.example.com")[0].type, "SRV")
+        self.assertEqual(data.lookup("zone.example.net")[0].value,
+                         "ns1.example.net admin.example.net 7 16384 2048 1048576 60")
+        self.assertEqual(data.lookup("*.wild.example.com")[0].value, "192.0.2.77")
+        self.assertEqual(data.counts()["A"], 5)
+        self.assertEqual(data.lookup("missing.example.com"), [])
+
+    def test_load_in_process(self):
+        """Small files are parsed in-process."""
+        self._check(load_tinydns(self.path, workers=1))
+
+    def test_load_in_parallel_chunks(self):
+        """Chunked parsing on a process pool gives the same store."""
+        with mock.patch.object(tinydns, "PARALLEL_THRESHOLD", 0):
+            data = load_tinydns(self.path, workers=2, chunk_size=64)
+        self._check(data)
+        self.assertEqual(list(data.records()), list(load_tinydns(self.path, workers=1).records()))
+
+    def test_empty_file(self):
+        """An empty data file loads as an empty store."""
+        self.path.write_bytes(b"")
+        self.assertEqual(len(load_tinydns(self.path)), 0)
+
+    def test_import_tinydns(self):
+        """import_tinydns keeps its original keys and string values."""
+        records = DNSManager().import_tinydns(self.directory.name, use_cdb=False)
+        self.assertEqual(list(records), ["A", "NS", "MX", "CNAME", "TXT", "SOA", "PTR", "Other"])
+        self.assertEqual(records["PTR"], [{"ip": "11.2.0.192.in-addr.arpa", "hostname": "host11.example.com",
+                                           "ttl": "86400"}])
+        self.assertEqual(records["MX"], [{"hostname": "example.com", "ip": "192.0.2.25",
+                                          "priority": "mail", "ttl": "10"}])
+        self.assertEqual(records["CNAME"], [{"alias": "ftp.example.com", "hostname": "www.example.com",
+                                             "ttl": "86400"}])
+        self.assertIn({"raw_line": "=www.example.com:192.0.2.10:300"}, records["Other"])
+
+
+class TestTinyDNSCDB(unittest.TestCase):
+    """Tests for reading compiled data.cdb files."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.directory.name)
+        (self.root / "data").write_bytes(DATA)
+        serial = int((self.root / "data").stat().st_mtime)
+        write_cdb(self.root / "data.cdb", compile_data(DATA, serial))
+        self.cdb = TinyDNSCDB(self.root / "data.cdb")
+
+    def tearDown(self):
+        self.cdb.close()
+        self.directory.cleanup()
+
+    def test_lookup(self):
+        """Lookups by name and type are answered from the cdb."""
+        self.assertEqual(self.cdb.lookup("WWW.Example.com."), [
+            TinyDNSRecord("www.example.com", "A", 300, "192.0.2.10"),
+        ])
+        self.assertEqual([r.value for r in self.cdb.lookup("example.com", "MX")], ["10 mail.mx.example.com"])
+        self.assertEqual(self.cdb.lookup("*.wild.example.com")[0].value, "192.0.2.77")
+        self.assertEqual(self.cdb.lookup("wild.example.com"), [])
+        self.assertEqual(self.cdb.lookup("missing.example.com"), [])
+        self.assertEqual(self.cdb.lookup_address("192.0.2.25")[0].name, "mail.mx.example.com")
+
+    def test_matches_text_loader(self):
+        """Every record parsed from data is read back from data.cdb."""
+        key = operator.attrgetter("name", "type", "ttl", "value")
+        text = load_tinydns(self.root / "data", workers=1)
+        self.assertEqual(sorted(self.cdb.records(), key=key), sorted(text.records(), key=key))
+        self.assertEqual(self.cdb.counts(), text.counts())
+
+    def test_fresh_cdb(self):
+        """data.cdb is only used when it is not older than data."""
+        self.assertEqual(fresh_cdb(self.root), self.root / "data.cdb")
+        os.utime(self.root / "data.cdb", (0, 0))
+        self.assertIsNone(fresh_cdb(self.root))
+
+    def test_manager_prefers_cdb(self):
+        """load_tinydns reads an up-to-date data.cdb; import_tinydns only when asked."""
+        manager = DNSManager()
+        with manager.load_tinydns(self.root) as data:
+            self.assertIsInstance(data, TinyDNSCDB)
+        with manager.load_tinydns(self.root, use_cdb=False) as data:
+            self.assertNotIsInstance(data, TinyDNSCDB)
+
+        self.assertEqual(manager.import_tinydns(self.root)["MX"][0]["ip"], "192.0.2.25")
+        (self.root / "data").write_bytes(b"")
+        os.utime(self.root / "data", (0, 0))
+        self.assertEqual(manager.import_tinydns(self.root)["MX"], [])
+        records = manager.import_tinydns(self.root, use_cdb=True)
+        self.assertIn({"hostname": "www.example.com", "ip": "192.0.2.10", "ttl": "300"}, records["A"])
+        self.assertIn({"hostname": "example.com", "ip": "", "priority": "mail.mx.example.com", "ttl": "10"},
+                      records["MX"])
+
+    def _search(self, *argv):
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as out:
+            self.assertFalse(manager_run(["search", *argv, "--file", str(self.root / "data"), "--workers", "1"]))
+        return out.getvalue()
+
+    def test_search_command(self):
+        """Substring searches scan data; --exact reads the same records from data.cdb or data."""
+        self.assertIn("4: =www.example.com:192.0.2.10:300", self._search("www.example"))
+        self.assertIn("4: =www.example.com:192.0.2.10:300", self._search("-i", "WWW.EXAMPLE"))
+
+        with mock.patch.object(tinydns.TinyDNSCDB, "lookup", wraps=self.cdb.lookup) as cdb_lookup:
+            from_cdb = self._search("--exact", "www.example.com")
+            self.assertEqual(cdb_lookup.call_count, 1)
+            self.assertEqual(self._search("--exact", "-i", "www.example.com"), from_cdb)
+            os.utime(self.root / "data.cdb", (0, 0))
+            self.assertEqual(self._search("--exact", "www.example.com"), from_cdb)
+            self.assertEqual(cdb_lookup.call_count, 1)
+        self.assertIn("www.example.com 300 A 192.0.2.10", from_cdb)
+
+
+if __name__ == "__main__":
+    unittest.main()
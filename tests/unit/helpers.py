@@ -0,0 +1,13 @@
+"""
+Helpers shared by the unit tests.
+"""
+
+
+class FakeClock:
+    """A manually advanced clock, standing in for time.monotonic or time.time."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1 @@
+"""Unit tests for the opsforge package."""
\ No newline at end of file
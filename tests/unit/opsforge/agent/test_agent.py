@@ -0,0 +1,268 @@
+"""
+Unit tests for the opsforge agent and its client.
+"""
+
+import contextlib
+import http.server
+import io
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from opsforge.agent import client
+from opsforge.agent.server import AGENT_COMMANDS, OpsForgeAgent, WarmResources
+from opsforge.common.exceptions import ConfigurationError
+
+
+def _fake_run(argv, resources):
+    """A check that echoes its arguments; 'exit=N' sets the exit code."""
+    resources_seen.append(resources)
+    if "sleep" in argv:
+        time.sleep(0.05)
+    if "bad-option" in argv:
+        import argparse
+        argparse.ArgumentParser(prog="fake").parse_args(argv)
+    if "boom" in argv:
+        raise RuntimeError("boom")
+    print(f"FAKE OK - {' '.join(argv)}")
+    print("details on stderr", file=sys.stderr)
+    codes = [int(arg[5:]) for arg in argv if arg.startswith("exit=")]
+    return codes[0] if codes else 0
+
+
+resources_seen = []
+
+
+class AgentTestCase(unittest.TestCase):
+    """Starts an agent on a temporary socket with a fake 'fake' command."""
+
+    def setUp(self):
+        resources_seen.clear()
+        module = types.ModuleType("opsforge_agent_fake_check")
+        module.run = _fake_run
+        modules = patch.dict(sys.modules, {"opsforge_agent_fake_check": module})
+        modules.start()
+        self.addCleanup(modules.stop)
+        commands = patch.dict(AGENT_COMMANDS, {
+            "fake": ("opsforge_agent_fake_check:run", lambda r: {"resources": r}),
+        })
+        commands.start()
+        self.addCleanup(commands.stop)
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.socket_path = os.path.join(self.directory, "agent.sock")
+        self.agent = OpsForgeAgent(self.socket_path, max_concurrent=4)
+        self.agent.start()
+        self.addCleanup(self.agent.close)
+
+        environment = patch.dict(os.environ, {"OPSFORGE_AGENT_SOCKET": self.socket_path,
+                                              "OPSFORGE_AGENT_FALLBACK": "0"})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def check(self, *argv):
+        """Runs opsforge-check and returns (exit code, stdout, stderr)."""
+        with contextlib.redirect_stdout(io.StringIO()) as out, contextlib.redirect_stderr(io.StringIO()) as err:
+            exit_code = client.main(list(argv))
+        return exit_code, out.getvalue(), err.getvalue()
+
+
+class TestAgent(AgentTestCase):
+    """Tests for running checks through the agent."""
+
+    def test_output_and_exit_code(self):
+        """The client prints the check's output and returns its exit code."""
+        self.assertEqual(self.check("fake", "--host", "db1", "exit=2"),
+                         (2, "FAKE OK - --host db1 exit=2\n", "details on stderr\n"))
+        self.assertEqual(self.check("fake")[0], 0)
+
+    def test_resources_are_shared(self):
+        """Every check is handed the same warm resources."""
+        self.check("fake")
+        self.check("fake")
+        self.assertEqual(len(resources_seen), 2)
+        self.assertIs(resources_seen[0], resources_seen[1])
+        self.assertIs(resources_seen[0], self.agent.resources)
+
+    def test_concurrent_checks_keep_their_output(self):
+        """Output of checks running at the same time is not mixed up."""
+        results = {}
+
+        def run(n):
+            results[n] = client.send_request(self.socket_path, {"command": "fake", "argv": ["sleep", str(n)]})
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual({n: r["stdout"] for n, r in results.items()},
+                         {n: f"FAKE OK - sleep {n}\n" for n in range(8)})
+
+    def test_errors(self):
+        """Usage errors, exceptions and unknown commands get exit codes."""
+        exit_code, _, stderr = self.check("fake", "bad-option")
+        self.assertEqual(exit_code, 2)
+        self.assertIn("usage: fake", stderr)
+
+        self.assertEqual(self.check("fake", "boom")[::2], (1, "Unexpected error: boom\n"))
+        self.assertEqual(self.check("missing")[:2], (3, "UNKNOWN - agent cannot run 'missing'\n"))
+        self.assertEqual(self.check("http500", "serve")[0], 3)
+        self.assertEqual(self.agent.stats()["failures"], 2)
+
+    def test_real_commands(self):
+        """The built-in commands run through their run() functions."""
+        hosts = os.path.join(self.directory, "hosts")
+        with open(hosts, "w") as f:
+            f.write("192.0.2.1 web1.example.com\n")
+        exit_code, stdout, _ = self.check("dns", "search", "web1.example.com", "--file", hosts)
+        self.assertEqual(exit_code, 0)
+        self.assertIn("1: 192.0.2.1 web1.example.com", stdout)
+
+        exit_code, _, stderr = self.check("readonly")
+        self.assertEqual(exit_code, 2)
+        self.assertIn("usage:", stderr)
+
+    def test_failing_http_target(self):
+        """An http500 check prints its status line and exits CRITICAL through the agent."""
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(500)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.addCleanup(httpd.server_close)
+        threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        self.addCleanup(httpd.shutdown)
+
+        with patch("opsforge.http.http500.smtplib.SMTP"):
+            exit_code, stdout, _ = self.check("http500", "--email", "ops@example.com", "--host", "127.0.0.1",
+                                              "--port", str(httpd.server_address[1]), "--scheme", "http")
+        self.assertEqual(exit_code, 2)
+        lines = stdout.splitlines()
+        self.assertTrue(lines[0].startswith("HTTP500 CRITICAL - 1/1 targets returned alert codes |"))
+        self.assertEqual(lines[1], f"http://127.0.0.1:{httpd.server_address[1]}/: CRITICAL - HTTP 500")
+
+    def test_ping_stats_and_bad_requests(self):
+        """ping, stats and malformed requests are answered."""
+        self.assertEqual(client.send_request(self.socket_path, {"command": "ping"})["stdout"], "pong\n")
+        self.check("fake")
+        stats = json.loads(client.send_request(self.socket_path, {"command": "stats"})["stdout"])
+        self.assertEqual((stats["requests"], stats["failures"]), (1, 0))
+
+        self.assertEqual(client.send_request(self.socket_path, {"command": "fake", "argv": [1]})["exit_code"], 3)
+        with socket.socket(socket.AF_UNIX) as sock:
+            sock.connect(self.socket_path)
+            sock.sendall(b"[1, 2]\n")
+            response = json.loads(sock.makefile().readline())
+        self.assertTrue(response["stdout"].startswith("UNKNOWN - bad agent request"))
+
+    def test_socket_ownership(self):
+        """A running agent keeps its socket; a stale one is replaced."""
+        with self.assertRaises(ConfigurationError):
+            OpsForgeAgent(self.socket_path).start()
+
+        stale = os.path.join(self.directory, "stale.sock")
+        with socket.socket(socket.AF_UNIX) as sock:
+            sock.bind(stale)
+        with OpsForgeAgent(stale):
+            self.assertEqual(client.send_request(stale, {"command": "ping"})["exit_code"], 0)
+        self.assertFalse(os.path.exists(stale))
+
+
+class TestClient(unittest.TestCase):
+    """Tests for the client when no agent is running."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.environment = {"OPSFORGE_AGENT_SOCKET": os.path.join(self.directory, "missing.sock")}
+
+    def test_falls_back_to_running_the_check(self):
+        """Without an agent the check is run directly."""
+        with patch.dict(os.environ, self.environment), \
+                patch.object(client, "_run_directly", side_effect=SystemExit(0)) as run_directly:
+            with self.assertRaises(SystemExit):
+                client.main(["readonly", "--host", "db1"])
+        run_directly.assert_called_once_with("readonly", ["--host", "db1"])
+
+    def test_unknown_without_fallback(self):
+        """With the fallback disabled a missing agent is UNKNOWN."""
+        with patch.dict(os.environ, dict(self.environment, OPSFORGE_AGENT_FALLBACK="0")), \
+                contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(client.main(["readonly"]), 3)
+        self.assertTrue(out.getvalue().startswith("UNKNOWN - opsforge agent is not running"))
+
+    def test_client_imports_are_light(self):
+        """The client only imports the standard library."""
+        src = Path(__file__).resolve().parents[4] / "src"
+        script = "import sys, opsforge.agent.client; print(' '.join(sys.modules))"
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                env=dict(os.environ, PYTHONPATH=str(src)), check=True)
+        modules = {name.split(".")[0] for name in result.stdout.split()}
+        self.assertFalse(modules & {"requests", "paramiko", "dns", "yaml", "dotenv", "utility_scripts"})
+        self.assertNotIn("opsforge.common", result.stdout.split())
+
+
+class TestWarmResources(unittest.TestCase):
+    """Tests for the resources shared between checks."""
+
+    def test_resources_are_created_once(self):
+        """Accessors hand out the same objects and do not close them."""
+        resources = WarmResources()
+        with resources.http_checker(timeout=5, body_status_codes=[500]) as first:
+            pass
+        with resources.http_checker(timeout=5, body_status_codes=[500]) as second:
+            pass
+        with resources.http_checker(timeout=10) as other:
+            pass
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+        with resources.ssh_pool(max_connections=4) as pool, resources.ssh_pool() as same_pool:
+            self.assertIs(pool, same_pool)
+        with resources.ssh_pool(max_connections=64) as pool:
+            self.assertEqual(pool.max_connections, 64)
+        with resources.ssh_pool(max_connections=8) as pool:
+            self.assertEqual(pool.max_connections, 64)
+        self.assertIs(resources.resolver_cache, resources.resolver_cache)
+        self.assertEqual(resources.stats()["http_checkers"], 2)
+        resources.close()
+        self.assertEqual(resources.stats(), {"http_checkers": 0, "dns_cache": resources.resolver_cache.stats()})
+
+    def test_http_checkers_are_evicted_least_recently_used(self):
+        """Past the limit the oldest checker is closed, once no check is using it."""
+        resources = WarmResources(max_http_checkers=2)
+        with patch("opsforge.http.http500.HttpChecker", side_effect=lambda **kwargs: MagicMock()):
+            with resources.http_checker(timeout=1) as in_use:
+                with resources.http_checker(timeout=2) as second:
+                    pass
+                with resources.http_checker(timeout=1):
+                    pass
+                with resources.http_checker(timeout=3):
+                    pass
+                second.close.assert_called_once_with()
+                with resources.http_checker(timeout=4):
+                    pass
+                in_use.close.assert_not_called()
+            in_use.close.assert_called_once_with()
+        self.assertEqual(resources.stats()["http_checkers"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
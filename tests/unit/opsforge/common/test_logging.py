@@ -0,0 +1,130 @@
+"""
+Unit tests for the opsforge logging setup.
+"""
+
+import io
+import json
+import logging
+import os
+import queue
+import sys
+import unittest
+from unittest.mock import patch
+
+from opsforge.common.logging import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    logging_stats,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+class LoggingTestCase(unittest.TestCase):
+    """Captures what setup_logging's console handler writes."""
+
+    def setUp(self):
+        root = logging.getLogger()
+        self.addCleanup(root.setLevel, root.level)
+        self.addCleanup(shutdown_logging)
+        self.output = io.StringIO()
+        stdout = patch.object(sys, "stdout", self.output)
+        stdout.start()
+        self.addCleanup(stdout.stop)
+        environment = patch.dict(os.environ)
+        environment.start()
+        self.addCleanup(environment.stop)
+        os.environ.pop("OPSFORGE_LOG_QUEUE", None)
+        os.environ.pop("OPSFORGE_LOG_FORMAT", None)
+        self.logger = logging.getLogger("opsforge.tests.logging")
+
+
+class TestSetupLogging(LoggingTestCase):
+    """Tests for configuring the root logger."""
+
+    def test_repeated_calls_do_not_duplicate_records(self):
+        """Each call replaces the handlers of the previous one."""
+        foreign = logging.NullHandler()
+        logging.getLogger().addHandler(foreign)
+        self.addCleanup(logging.getLogger().removeHandler, foreign)
+
+        setup_logging(log_format="%(message)s")
+        setup_logging(log_format="%(message)s")
+        setup_logging(log_format="%(message)s")
+        self.logger.info("once")
+        self.assertEqual(self.output.getvalue(), "once\n")
+        self.assertIn(foreign, logging.getLogger().handlers)
+
+    def test_queue_mode(self):
+        """In queue mode records are written by the listener thread."""
+        setup_logging(log_format="%(levelname)s %(message)s", use_queue=True)
+        root_handlers = [h for h in logging.getLogger().handlers if isinstance(h, DroppingQueueHandler)]
+        self.assertEqual(len(root_handlers), 1)
+
+        self.logger.warning("checked %s in %.1fs", "web1", 0.25)
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            self.logger.exception("failed")
+        self.logger.debug("not written %s", "at INFO")
+        shutdown_logging()
+        lines = self.output.getvalue().splitlines()
+        self.assertEqual(lines[:2], ["WARNING checked web1 in 0.2s", "ERROR failed"])
+        self.assertEqual(lines[-1], "ValueError: bad")
+        self.assertEqual(logging_stats(), {})
+
+    def test_json_from_environment(self):
+        """OPSFORGE_LOG_FORMAT=json selects the JSON formatter."""
+        os.environ["OPSFORGE_LOG_FORMAT"] = "json"
+        setup_logging()
+        self.logger.info("hello %s", "world", extra={"target": "web1", "status": 500})
+        record = json.loads(self.output.getvalue())
+        self.assertEqual({k: record[k] for k in ("level", "logger", "message", "target", "status")},
+                         {"level": "INFO", "logger": "opsforge.tests.logging", "message": "hello world",
+                          "target": "web1", "status": 500})
+        self.assertTrue(record["time"].endswith("Z"))
+
+
+class TestDroppingQueueHandler(unittest.TestCase):
+    """Tests for the bounded queue handler."""
+
+    def test_drops_and_counts_when_full(self):
+        """Records that do not fit are dropped instead of blocking."""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        logger = logging.Logger("bounded")
+        logger.addHandler(handler)
+        for n in range(3):
+            logger.info("info %d", n)
+        logger.error("error")
+        self.assertEqual((handler.queue.qsize(), handler.dropped), (2, 2))
+        self.assertEqual(handler.dropped_by_level, {"INFO": 1, "ERROR": 1})
+
+    def test_prepare_snapshots_the_message(self):
+        """Arguments are merged on the caller's thread; formatting is left to the listener."""
+        handler = DroppingQueueHandler(queue.Queue())
+        hosts = ["web1"]
+        record = logging.makeLogRecord({"msg": "hosts %s", "args": (hosts,)})
+        prepared = handler.prepare(record)
+        hosts.append("web2")
+        self.assertEqual((prepared.msg, prepared.args), ("hosts ['web1']", None))
+        self.assertEqual(record.args, (hosts,))
+
+
+class TestJsonFormatter(unittest.TestCase):
+    """Tests for the structured formatter."""
+
+    def test_exception_and_non_json_values(self):
+        """Tracebacks are included and other values are converted to strings."""
+        try:
+            raise KeyError("missing")
+        except KeyError:
+            record = logging.makeLogRecord({"msg": "lookup failed", "exc_info": sys.exc_info(),
+                                            "path": os.path.join("a", "b"), "when": object})
+        data = json.loads(JsonFormatter().format(record))
+        self.assertIn("KeyError: 'missing'", data["exception"])
+        self.assertEqual(data["when"], str(object))
+        self.assertNotIn("exc_info", data)
+
+
+if __name__ == "__main__":
+    unittest.main()
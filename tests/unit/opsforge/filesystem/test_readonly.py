@@ -0,0 +1,530 @@
+"""
+Unit tests for the opsforge read-only mount checker.
+"""
+
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import paramiko
+
+from opsforge.common.exceptions import ConfigurationError
+from opsforge.filesystem.readonly import (
+    EXIT_CRITICAL,
+    EXIT_ERROR,
+    EXIT_OK,
+    CheckConfig,
+    FleetSweeper,
+    HostReport,
+    MountFilter,
+    MountInfo,
+    MountService,
+    MountTableCache,
+    SSHCommandExecutor,
+    SSHConfig,
+    SSHConnectionPool,
+    SSHExecutionError,
+    load_hosts_file,
+    summarize_fleet,
+)
+
+from tests.unit.helpers import FakeClock
+
+RW_MOUNTS = b"/dev/sda1 / ext4 rw,relatime 0 0\n"
+RO_MOUNTS = RW_MOUNTS + b"/dev/sdb1 /data xfs ro,noatime 0 0\n"
+
+
+def fake_client(output=b"", exit_status=0):
+    """Returns a mock SSHClient whose commands print ``output``."""
+    client = MagicMock(spec=paramiko.SSHClient)
+    transport = client.get_transport.return_value
+    transport.is_active.return_value = True
+    stdout = MagicMock()
+    stdout.read.return_value = output
+    stdout.channel.recv_exit_status.return_value = exit_status
+    stderr = MagicMock()
+    stderr.read.return_value = b""
+    client.exec_command.return_value = (MagicMock(), stdout, stderr)
+    return client
+
+
+class TestSSHConnectionPool(unittest.TestCase):
+    """Tests for SSHConnectionPool."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.opened = []
+
+        def connect(config):
+            client = fake_client(f"{config.host}\n".encode())
+            self.opened.append((config.host, client))
+            return client
+
+        self.connect = connect
+        self.config = SSHConfig(host="a", user="root", port=22)
+
+    def _pool(self, **kwargs):
+        return SSHConnectionPool(connect=self.connect, clock=self.clock, **kwargs)
+
+    def test_connection_is_reused(self):
+        """Commands to the same host, port and user share one connection."""
+        with self._pool() as pool:
+            executor = SSHCommandExecutor(self.config, pool=pool)
+            outputs = [executor.execute("cat /proc/mounts") for _ in range(3)]
+
+        self.assertEqual(outputs, ["a\n"] * 3)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual((pool.connects, pool.reuses), (1, 2))
+        self.opened[0][1].close.assert_called()
+
+    def test_keys_are_separate(self):
+        """A different user or port gets its own connection."""
+        with self._pool() as pool:
+            for config in (self.config, SSHConfig(host="a", user="ops", port=22),
+                           SSHConfig(host="a", user="root", port=2222)):
+                pool.acquire(config)
+                pool.release(config)
+        self.assertEqual(len(self.opened), 3)
+
+    def test_stale_connection_is_replaced(self):
+        """A connection whose transport died is reopened before reuse."""
+        with self._pool() as pool:
+            first = pool.acquire(self.config)
+            pool.release(self.config)
+            first.get_transport.return_value.is_active.return_value = False
+            second = pool.acquire(self.config)
+            pool.release(self.config)
+
+        self.assertIsNot(first, second)
+        first.close.assert_called()
+
+    def test_idle_connections_are_evicted(self):
+        """Connections unused past the idle timeout are closed."""
+        with self._pool(idle_timeout=60) as pool:
+            pool.acquire(self.config)
+            pool.release(self.config)
+            self.clock.now += 61
+            pool.acquire(SSHConfig(host="b", user="root", port=22))
+            self.opened[0][1].close.assert_called_once()
+            pool.acquire(self.config)
+        self.assertEqual([host for host, _ in self.opened], ["a", "b", "a"])
+
+    def test_max_connections_evicts_least_recently_used(self):
+        """A full pool closes its least recently used idle connection."""
+        with self._pool(max_connections=2) as pool:
+            for host in ("a", "b", "c"):
+                config = SSHConfig(host=host, user="root", port=22)
+                pool.acquire(config)
+                pool.release(config)
+                self.clock.now += 1
+            self.opened[0][1].close.assert_called_once()
+            self.opened[1][1].close.assert_not_called()
+
+    def test_full_pool_waits_for_release(self):
+        """When every connection is busy, a new key waits for a release."""
+        pool = self._pool(max_connections=1)
+        pool.acquire(self.config)
+        other = SSHConfig(host="b", user="root", port=22)
+        acquired = threading.Event()
+
+        def worker():
+            pool.acquire(other)
+            acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        pool.release(self.config)
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+        pool.close()
+
+    def test_grow_wakes_waiting_acquire(self):
+        """Raising the limit lets a waiting key in without a release."""
+        pool = self._pool(max_connections=1)
+        pool.acquire(self.config)
+        other = SSHConfig(host="b", user="root", port=22)
+        acquired = threading.Event()
+
+        def worker():
+            pool.acquire(other)
+            acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        pool.grow(0)
+        self.assertEqual(pool.max_connections, 1)
+        pool.grow(2)
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+        self.opened[0][1].close.assert_not_called()
+        pool.close()
+
+    def test_failed_connect_is_not_pooled(self):
+        """A connection error propagates and leaves no entry behind."""
+
+        def connect(config):
+            raise SSHExecutionError("refused")
+
+        pool = SSHConnectionPool(connect=connect, max_connections=1)
+        with self.assertRaises(SSHExecutionError):
+            SSHCommandExecutor(self.config, pool=pool).execute("true")
+        self.opened.clear()
+        pool._connect = self.connect
+        pool.acquire(SSHConfig(host="b", user="root", port=22))
+        self.assertEqual(len(self.opened), 1)
+
+    def test_channel_error_discards_connection(self):
+        """A transport failure during a command forces a reconnect next time."""
+        with self._pool() as pool:
+            executor = SSHCommandExecutor(self.config, pool=pool)
+            executor.execute("true")
+            self.opened[0][1].exec_command.side_effect = paramiko.SSHException("channel closed")
+            with self.assertRaises(SSHExecutionError):
+                executor.execute("true")
+            self.assertEqual(executor.execute("true"), "a\n")
+        self.assertEqual(len(self.opened), 2)
+
+
+class TestMountInfo(unittest.TestCase):
+    """Tests for MountInfo parsing."""
+
+    def test_from_bytes_and_text(self):
+        """Bytes and text lines parse to equal entries."""
+        line = b"/dev/sdb1 /data xfs ro,noatime 0 0"
+        self.assertEqual(MountInfo.from_line(line), MountInfo.from_line(line.decode()))
+        mount = MountInfo.from_line(line)
+        self.assertEqual(mount.options, ["ro", "noatime"])
+        self.assertEqual(mount.option_set, frozenset({"ro", "noatime"}))
+        self.assertTrue(mount.is_read_only())
+        self.assertIsNone(MountInfo.from_line(b"garbage line"))
+
+    def test_compact_and_shared(self):
+        """Entries are slotted and share option sets and type strings."""
+        first = MountInfo.from_line(b"tmpfs /run tmpfs rw,nosuid 0 0")
+        second = MountInfo.from_line(b"tmpfs /dev/shm tmpfs rw,nosuid 0 0")
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertIs(first.option_set, second.option_set)
+        self.assertIs(first.filesystem_type, second.filesystem_type)
+
+    def test_options_from_list(self):
+        """Options stay a list; option_set is derived from it."""
+        mount = MountInfo("/dev/sda1", "/", "ext4", ["rw", "relatime"])
+        self.assertEqual(mount.options, ["rw", "relatime"])
+        self.assertEqual(mount.option_set, frozenset({"rw", "relatime"}))
+        self.assertFalse(mount.is_read_only())
+
+
+class TestMountFilter(unittest.TestCase):
+    """Tests for compiled mount filters."""
+
+    MOUNTS = [
+        MountInfo.from_line(line) for line in (
+            "/dev/sda1 / ext4 rw 0 0",
+            "/dev/sdb1 /data xfs ro 0 0",
+            "/dev/sdc1 /data2 xfs ro 0 0",
+            "tmpfs /run tmpfs rw 0 0",
+            "overlay /var/lib/docker/overlay2/abc/merged overlay rw 0 0",
+        )
+    ]
+
+    def _kept(self, **kwargs):
+        config = CheckConfig(ssh_config=SSHConfig(host="h", user="root", port=22),
+                             mount_tab_path="/proc/mounts", **kwargs)
+        kept = MountService(MagicMock()).filter_mounts(self.MOUNTS, config)
+        return [m.mountpoint for m in kept], config.mount_filter.hit_counts()
+
+    def test_substring_partitions_and_types(self):
+        """Substring includes and type exclusions behave as before."""
+        kept, hits = self._kept(partition_filters=["sdb", "/run"], exclude_types={"tmpfs"})
+        self.assertEqual(kept, ["/data"])
+        self.assertEqual(hits["exclude-type:tmpfs"], 1)
+        self.assertEqual(hits["partition:sdb"], 1)
+        self.assertEqual(hits["partition:<no match>"], 3)
+
+    def test_exclude_ignored_with_partitions(self):
+        """The exclude pattern only applies without partition patterns."""
+        kept, _ = self._kept(exclude_filter="data")
+        self.assertEqual(kept, ["/", "/run", "/var/lib/docker/overlay2/abc/merged"])
+        kept, _ = self._kept(partition_filters=["data"], exclude_filter="data")
+        self.assertEqual(kept, ["/data", "/data2"])
+
+    def test_glob_and_regex(self):
+        """glob: matches a whole field; re: searches it."""
+        kept, hits = self._kept(partition_filters=["glob:/data", r"re:^/dev/sd[a]\d$"])
+        self.assertEqual(kept, ["/", "/data"])
+        self.assertEqual(hits["partition:glob:/data"], 1)
+        kept, _ = self._kept(exclude_filter="glob:/var/lib/docker/*")
+        self.assertNotIn("/var/lib/docker/overlay2/abc/merged", kept)
+
+    def test_regex_flags_groups_and_backreferences(self):
+        """re: patterns keep inline flags, numbered groups and any group names."""
+        kept, hits = self._kept(partition_filters=["re:(?i)/DATA2", "/run"])
+        self.assertEqual(kept, ["/data2", "/run"])
+        self.assertEqual(hits["partition:re:(?i)/DATA2"], 1)
+
+        mounts = [MountInfo("/dev/sda1", "/srv/aax", "ext4", ["rw"]),
+                  MountInfo("/dev/sdb1", "/srv/abx", "ext4", ["rw"])]
+        mount_filter = MountFilter(include_patterns=["sdz", r"re:(a)\1x", r"re:(?P<f0>b)(?P=f0)?x"])
+        self.assertEqual(mount_filter.apply(mounts), mounts)
+        self.assertEqual(mount_filter.hit_counts(),
+                         {r"partition:re:(a)\1x": 1, r"partition:re:(?P<f0>b)(?P=f0)?x": 1})
+
+    def test_invalid_regex(self):
+        """A broken regex is a configuration error."""
+        with self.assertRaises(ConfigurationError):
+            MountFilter(include_patterns=["re:("])
+
+    def test_hits_accumulate(self):
+        """Hit counts add up across calls."""
+        mount_filter = MountFilter(exclude_types={"xfs"})
+        mount_filter.apply(self.MOUNTS)
+        mount_filter.apply(self.MOUNTS)
+        self.assertEqual(mount_filter.hit_counts(), {"exclude-type:xfs": 4})
+
+
+class TestRemoteFilter(unittest.TestCase):
+    """Tests for remote awk pre-filtering."""
+
+    TABLE = (
+        "/dev/sda1 / ext4 rw,relatime 0 0\n"
+        "/dev/sdb1 /data xfs ro,noatime 0 0\n"
+        "/dev/sdc1 /backup xfs ro 0 0\n"
+        "tmpfs /run/ro tmpfs ro,nosuid 0 0\n"
+        "/dev/loop0 /snap/core ext4 rw,errors=remount-ro 0 0\n"
+    )
+
+    def _config(self, **kwargs):
+        return CheckConfig(ssh_config=SSHConfig(host="h", user="root", port=22),
+                           mount_tab_path="/proc/mounts", remote_filter=True, **kwargs)
+
+    def _run_awk(self, config):
+        with tempfile.NamedTemporaryFile("w", suffix=".mounts") as table:
+            table.write(self.TABLE)
+            table.flush()
+            result = subprocess.run(
+                ["awk", config.mount_filter.awk_program(), table.name],
+                capture_output=True, text=True, check=True,
+            )
+        return [line.split()[1] for line in result.stdout.splitlines()]
+
+    @unittest.skipUnless(shutil.which("awk"), "awk is not installed")
+    def test_awk_keeps_only_candidates(self):
+        """Only read-only lines passing type and substring filters come back."""
+        self.assertEqual(self._run_awk(self._config()), ["/data", "/backup", "/run/ro"])
+        self.assertEqual(self._run_awk(self._config(exclude_types={"tmpfs"}, exclude_filter="sdc")),
+                         ["/data"])
+        self.assertEqual(self._run_awk(self._config(partition_filters=['sdc', 'q"uote\\'])),
+                         ["/backup"])
+
+    @unittest.skipUnless(shutil.which("awk"), "awk is not installed")
+    def test_glob_patterns_stay_local(self):
+        """Glob and regex patterns are not sent to awk, only applied locally."""
+        config = self._config(partition_filters=["glob:/data", "sdc"])
+        self.assertEqual(self._run_awk(config), ["/data", "/backup", "/run/ro"])
+
+    def test_falls_back_to_cat(self):
+        """A failing awk falls back to fetching the full table."""
+        executor = MagicMock()
+        executor.execute.side_effect = [
+            SSHExecutionError("Command failed with exit code 127", "awk: not found", 127),
+            self.TABLE,
+        ]
+        mounts = MountService(executor).get_remote_mounts("/proc/mounts", self._config())
+
+        self.assertEqual(len(mounts), 5)
+        self.assertTrue(executor.execute.call_args_list[0][0][0].startswith("awk "))
+        self.assertEqual(executor.execute.call_args_list[1][0][0], "cat /proc/mounts")
+
+    def test_connection_errors_do_not_fall_back(self):
+        """An SSH failure is raised without a second attempt."""
+        executor = MagicMock()
+        executor.execute.side_effect = SSHExecutionError("Socket error")
+        with self.assertRaises(SSHExecutionError):
+            MountService(executor).get_remote_mounts("/proc/mounts", self._config())
+        self.assertEqual(executor.execute.call_count, 1)
+
+
+class LocalExecutor:
+    """Runs 'remote' commands with the local shell."""
+
+    def __init__(self):
+        self.config = SSHConfig(host="local", user="root", port=22)
+        self.outputs = []
+
+    def execute(self, command, decode=True):
+        result = subprocess.run(["sh", "-c", command], capture_output=True)
+        if result.returncode != 0:
+            raise SSHExecutionError(f"Command failed with exit code {result.returncode}",
+                                    result.stderr.decode(), result.returncode)
+        self.outputs.append(result.stdout.decode())
+        return result.stdout.decode() if decode else result.stdout
+
+
+@unittest.skipUnless(shutil.which("awk") and shutil.which("cut"), "POSIX tools are not installed")
+class TestMountTableCache(unittest.TestCase):
+    """Tests for digest-based incremental mount checks."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.table = self.directory / "mounts"
+        self.table.write_text(RO_MOUNTS.decode())
+        self.executor = LocalExecutor()
+
+    def _check(self, cache, **kwargs):
+        config = CheckConfig(ssh_config=self.executor.config, mount_tab_path=str(self.table), **kwargs)
+        return [m.mountpoint for m in MountService(self.executor).check_read_only(config, cache)]
+
+    def test_unchanged_table_is_not_transferred(self):
+        """The second check gets only a digest and reuses the result."""
+        cache = MountTableCache()
+        self.assertEqual(self._check(cache), ["/data"])
+        self.assertEqual(self._check(cache), ["/data"])
+
+        self.assertTrue(self.executor.outputs[0].startswith("DIGEST "))
+        self.assertEqual(len(self.executor.outputs[1].splitlines()), 1)
+        self.assertTrue(self.executor.outputs[1].startswith("UNCHANGED "))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_changed_table_is_reparsed(self):
+        """A changed table is transferred and checked again."""
+        cache = MountTableCache()
+        self._check(cache)
+        self.table.write_text(RW_MOUNTS.decode())
+        self.assertEqual(self._check(cache), [])
+        self.assertEqual(cache.misses, 2)
+
+    def test_filters_are_part_of_the_key(self):
+        """A different filter never reuses another filter's result."""
+        cache = MountTableCache()
+        self._check(cache)
+        self.assertEqual(self._check(cache, exclude_types={"xfs"}), [])
+        self.assertEqual(cache.hits, 0)
+
+    def test_with_remote_filter(self):
+        """Digests combine with remote awk filtering."""
+        cache = MountTableCache()
+        self.assertEqual(self._check(cache, remote_filter=True), ["/data"])
+        self.assertEqual(self.executor.outputs[0].splitlines()[1:], ["/dev/sdb1 /data xfs ro,noatime 0 0"])
+        self.assertEqual(self._check(cache, remote_filter=True), ["/data"])
+        self.assertEqual(cache.hits, 1)
+
+    def test_persistence(self):
+        """A saved cache lets the next process skip the transfer."""
+        path = str(self.directory / "cache.json")
+        cache = MountTableCache(path)
+        self._check(cache)
+        cache.save()
+
+        reloaded = MountTableCache(path)
+        self.assertEqual(self._check(reloaded), ["/data"])
+        self.assertEqual(reloaded.hits, 1)
+
+    def test_failed_save_removes_temporary_file(self):
+        """A save that fails part way leaves neither a temp file nor a cache file."""
+        path = str(self.directory / "cache.json")
+        cache = MountTableCache(path)
+        self._check(cache)
+        with patch("opsforge.filesystem.readonly.os.replace", side_effect=OSError("read-only")):
+            cache.save()
+        self.assertEqual([p.name for p in self.directory.iterdir()], ["mounts"])
+
+
+class TestLoadHostsFile(unittest.TestCase):
+    """Tests for load_hosts_file."""
+
+    def setUp(self):
+        self.defaults = SSHConfig(host="", user="root", port=22, identity_file="/k")
+
+    def _load(self, content):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "hosts"
+            path.write_text(content)
+            return load_hosts_file(str(path), self.defaults)
+
+    def test_formats(self):
+        """Users and ports are optional; comments and blanks are skipped."""
+        hosts = self._load("# fleet\nweb1\n\nops@db1:2222  # primary\nlb1:2200\n")
+        self.assertEqual(
+            [(h.user, h.host, h.port) for h in hosts],
+            [("root", "web1", 22), ("ops", "db1", 2222), ("root", "lb1", 2200)],
+        )
+        self.assertTrue(all(h.identity_file == "/k" for h in hosts))
+
+    def test_invalid_port(self):
+        """A non-numeric port is a configuration error."""
+        with self.assertRaises(ConfigurationError):
+            self._load("web1:ssh\n")
+
+
+class TestFleetSweep(unittest.TestCase):
+    """Tests for FleetSweeper and summarize_fleet."""
+
+    def setUp(self):
+        self.hung_clients = []
+
+    def connect(self, config):
+        if config.host.startswith("down"):
+            raise SSHExecutionError(f"Socket error when connecting to {config.host}")
+        client = fake_client(RO_MOUNTS if config.host.startswith("ro") else RW_MOUNTS)
+        if config.host.startswith("hung"):
+            # Reads block until the connection is closed, like a stuck NFS mount
+            closed = threading.Event()
+            client.close.side_effect = closed.set
+            stdout = client.exec_command.return_value[1]
+            stdout.read.side_effect = lambda: closed.wait(5) and b""
+            self.hung_clients.append(closed)
+        return client
+
+    def _sweep(self, names, host_timeout=5.0):
+        hosts = [SSHConfig(host=name, user="root", port=22) for name in names]
+        config = CheckConfig(ssh_config=hosts[0], mount_tab_path="/proc/mounts")
+        with SSHConnectionPool(connect=self.connect) as pool:
+            return FleetSweeper(pool, max_workers=8, host_timeout=host_timeout).sweep(config, hosts)
+
+    def test_reports_in_host_order(self):
+        """Every host gets a report, in inventory order."""
+        names = [f"web{i}" for i in range(20)] + ["ro1", "down1"]
+        reports = self._sweep(names)
+        self.assertEqual([r.host for r in reports], names)
+        self.assertEqual(reports[-2].exit_code, EXIT_CRITICAL)
+        self.assertEqual(reports[-2].ro_mounts[0].mountpoint, "/data")
+        self.assertEqual(reports[-1].exit_code, EXIT_ERROR)
+
+    def test_host_timeout(self):
+        """A host exceeding its budget is reported without stalling the sweep."""
+        sweep_threads = threading.active_count()
+        reports = self._sweep(["web1", "hung1"], host_timeout=0.2)
+        self.assertEqual(reports[0].exit_code, EXIT_OK)
+        self.assertEqual(reports[1].exit_code, EXIT_ERROR)
+        self.assertIn("timed out", reports[1].error)
+
+        # The hung host's connection was closed and its worker has finished
+        self.assertTrue(self.hung_clients[0].is_set())
+        self.assertEqual(threading.active_count(), sweep_threads)
+
+    def test_summary_worst_exit_code(self):
+        """CRITICAL wins over unreachable hosts, which win over OK."""
+        ok = HostReport(host="a", exit_code=EXIT_OK)
+        down = HostReport(host="b", exit_code=EXIT_ERROR, error="refused")
+        self.assertEqual(summarize_fleet([ok])[0], EXIT_OK)
+        self.assertEqual(summarize_fleet([ok, down])[0], EXIT_ERROR)
+
+        reports = self._sweep(["web1", "ro1", "down1"])
+        exit_code, output = summarize_fleet(reports)
+        self.assertEqual(exit_code, EXIT_CRITICAL)
+        lines = output.splitlines()
+        self.assertTrue(lines[0].startswith("RO_MOUNTS CRITICAL - 1/3 hosts with ro mounts, 1 unreachable |"))
+        self.assertIn("ro1: CRITICAL - /dev/sdb1 on /data", lines)
+        self.assertTrue(any(line.startswith("down1: UNKNOWN") for line in lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
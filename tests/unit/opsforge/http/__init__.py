@@ -0,0 +1 @@
+"""Unit tests for opsforge HTTP modules."""
\ No newline at end of file
@@ -0,0 +1,471 @@
+"""
+Unit tests for the opsforge HTTP 500 monitoring module.
+"""
+
+import asyncio
+import contextlib
+import http.server
+import io
+import logging
+import smtplib
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from opsforge.common.exceptions import ConfigurationError
+from opsforge.common.logging import shutdown_logging
+from opsforge.http.http500 import (
+    AIOHTTP_AVAILABLE,
+    AsyncHttpChecker,
+    CheckTarget,
+    HttpChecker,
+    NotificationDetails,
+    PROBE_CONDITIONAL,
+    PROBE_HEAD,
+    PROBE_RANGE,
+    QueuedEmailNotifier,
+    ServerMonitor,
+    SmtpConfig,
+    load_targets_from_file,
+    main,
+)
+
+
+class _StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Answers every GET with the status code given in the path.
+
+    A ``?size=N`` query pads the body to N bytes.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        status = int(path.strip("/") or 200)
+        body = f"status {status}".encode()
+        if query.startswith("size="):
+            body = body.ljust(int(query[5:]), b"x")
+        self.server.client_ports.add(self.client_address[1])
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+    """A local HTTP server running in a background thread."""
+
+    def __init__(self, handler=_StandInHandler):
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.client_ports = set()
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def target(self, path="/"):
+        return CheckTarget(host="127.0.0.1", port=self.port, scheme="http", path=path)
+
+
+class TestHttpCheckerPooling(unittest.TestCase):
+    """Tests for session reuse in HttpChecker."""
+
+    def test_connections_are_reused_across_checks(self):
+        """Repeated checks against one host:port share a keep-alive connection."""
+        with StandInServer() as server, HttpChecker(timeout=5) as checker:
+            results = [checker.check(server.target("/200")) for _ in range(5)]
+
+        self.assertTrue(all(r.success and r.status_code == 200 for r in results))
+        self.assertEqual(len(server.httpd.client_ports), 1)
+
+    def test_least_recently_used_session_is_closed(self):
+        """Past max_sessions the oldest host:port pool is closed and reopened on demand."""
+        with StandInServer() as first, StandInServer() as second, \
+                HttpChecker(timeout=5, max_sessions=1) as checker:
+            checker.check(first.target("/200"))
+            checker.check(second.target("/200"))
+            self.assertEqual(len(checker._sessions), 1)
+            checker.check(first.target("/200"))
+
+        self.assertEqual(len(first.httpd.client_ports), 2)
+        self.assertEqual(len(second.httpd.client_ports), 1)
+
+    def test_target_headers_are_sent(self):
+        """Per-target headers are merged into the request."""
+        seen = {}
+
+        class HeaderHandler(_StandInHandler):
+            def do_GET(self):
+                seen.update(self.headers)
+                super().do_GET()
+
+        with StandInServer(HeaderHandler) as server, HttpChecker() as checker:
+            target = CheckTarget(
+                host="127.0.0.1", port=server.port, scheme="http",
+                path="/200", headers={"X-Probe": "yes"},
+            )
+            checker.check(target)
+
+        self.assertEqual(seen.get("X-Probe"), "yes")
+        self.assertIn("OpsForge", seen.get("User-Agent"))
+
+
+class TestHttpCheckerBodyLimit(unittest.TestCase):
+    """Tests for streaming, size-capped body reads."""
+
+    def test_large_body_is_truncated(self):
+        """Only max_body_bytes of a large body are kept."""
+        with StandInServer() as server, HttpChecker(max_body_bytes=1000) as checker:
+            result = checker.check(server.target("/500?size=200000"))
+
+        self.assertEqual(result.status_code, 500)
+        self.assertEqual(len(result.content), 1000)
+        self.assertTrue(result.content.startswith("status 500"))
+        self.assertTrue(result.truncated)
+
+    def test_small_body_is_complete(self):
+        """Bodies within the budget are returned whole."""
+        with StandInServer() as server, HttpChecker(max_body_bytes=1000) as checker:
+            result = checker.check(server.target("/200?size=999"))
+
+        self.assertEqual(len(result.content), 999)
+        self.assertFalse(result.truncated)
+
+    def test_bodies_kept_only_for_selected_codes(self):
+        """With body_status_codes, other responses carry no content."""
+        with StandInServer() as server, HttpChecker(body_status_codes=[500]) as checker:
+            ok = checker.check(server.target("/200"))
+            error = checker.check(server.target("/500"))
+
+        self.assertIsNone(ok.content)
+        self.assertEqual(error.content, "status 500")
+        self.assertEqual(len(server.httpd.client_ports), 1)
+
+    @unittest.skipUnless(AIOHTTP_AVAILABLE, "aiohttp is not installed")
+    def test_async_large_body_is_truncated(self):
+        """The async engine applies the same byte budget."""
+        async def check(target):
+            async with AsyncHttpChecker(max_body_bytes=1000) as checker:
+                return await checker.check(target)
+
+        with StandInServer() as server:
+            result = asyncio.run(check(server.target("/503?size=200000")))
+
+        self.assertEqual(len(result.content), 1000)
+        self.assertTrue(result.truncated)
+
+
+class _RecordingHandler(_StandInHandler):
+    """Records each request's method and headers; answers HEAD and ranges."""
+
+    etag = '"v1"'
+
+    def do_GET(self):
+        self.server.requests.append((self.command, dict(self.headers)))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        status = int(self.path.strip("/") or 200)
+        body = b"0123456789"
+        if self.headers.get("Range") == "bytes=0-0" and status == 200:
+            status, body = 206, body[:1]
+        self.send_response(status)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+
+class TestHttpCheckerProbes(unittest.TestCase):
+    """Tests for HEAD, range and conditional probes."""
+
+    def _target(self, server, probe, path="/200"):
+        return CheckTarget(host="127.0.0.1", port=server.port, scheme="http", path=path, probe=probe)
+
+    def _run(self, handler, probe, checks=2, path="/200"):
+        with StandInServer(handler) as server, HttpChecker(timeout=5) as checker:
+            server.httpd.requests = []
+            results = [checker.check(self._target(server, probe, path)) for _ in range(checks)]
+        return results, server.httpd.requests
+
+    def test_head_probe(self):
+        """HEAD probes fetch no body."""
+        results, requests_seen = self._run(_RecordingHandler, PROBE_HEAD)
+        self.assertEqual([m for m, _ in requests_seen], ["HEAD", "HEAD"])
+        self.assertEqual(results[0].status_code, 200)
+        self.assertEqual(results[0].content, "")
+
+    def test_head_falls_back_to_get(self):
+        """A server rejecting HEAD is checked with GET from then on."""
+
+        class NoHeadHandler(_RecordingHandler):
+            def do_HEAD(self):
+                self.server.requests.append(("HEAD", {}))
+                self.send_error(405)
+
+        results, requests_seen = self._run(NoHeadHandler, PROBE_HEAD)
+        self.assertEqual([m for m, _ in requests_seen], ["HEAD", "GET", "GET"])
+        self.assertEqual([r.status_code for r in results], [200, 200])
+
+    def test_range_probe(self):
+        """Range probes ask for the first byte only."""
+        results, requests_seen = self._run(_RecordingHandler, PROBE_RANGE, checks=1)
+        self.assertEqual(requests_seen[0][1].get("Range"), "bytes=0-0")
+        self.assertEqual((results[0].status_code, results[0].content), (206, "0"))
+
+    def test_range_probe_keeps_error_status(self):
+        """Servers ignoring the range still report their error status."""
+        results, _ = self._run(_RecordingHandler, PROBE_RANGE, checks=1, path="/500")
+        self.assertEqual(results[0].status_code, 500)
+
+    def test_conditional_probe_revalidates(self):
+        """The second check sends the cached ETag and gets a 304."""
+        results, requests_seen = self._run(_RecordingHandler, PROBE_CONDITIONAL)
+        self.assertNotIn("If-None-Match", requests_seen[0][1])
+        self.assertEqual(requests_seen[1][1].get("If-None-Match"), '"v1"')
+        self.assertEqual([r.status_code for r in results], [200, 304])
+
+
+class TestServerMonitorRunMany(unittest.TestCase):
+    """Tests for concurrent multi-target checks."""
+
+    def test_results_preserve_target_order(self):
+        """run_many returns one result per target in input order."""
+        notifier = MagicMock()
+        with StandInServer() as server, HttpChecker(timeout=5) as checker:
+            targets = [server.target(f"/{code}") for code in (200, 500, 404, 503) * 5]
+            monitor = ServerMonitor(checker, notifier, alert_codes=[500, 503])
+            results = monitor.run_many(targets, max_workers=4)
+
+        self.assertEqual([r.target for r in results], targets)
+        self.assertEqual([r.status_code for r in results], [200, 500, 404, 503] * 5)
+        self.assertEqual(notifier.notify.call_count, 10)
+
+    def test_run_many_empty(self):
+        """No targets means no work and no results."""
+        monitor = ServerMonitor(MagicMock(), MagicMock(), alert_codes=[500])
+        self.assertEqual(monitor.run_many([]), [])
+
+
+@unittest.skipUnless(AIOHTTP_AVAILABLE, "aiohttp is not installed")
+class TestAsyncHttpChecker(unittest.TestCase):
+    """Tests for the asyncio check engine."""
+
+    def test_check_many(self):
+        """Async checks return the same CheckResult objects as the sync checker."""
+        async def sweep(targets):
+            async with AsyncHttpChecker(timeout=5) as checker:
+                return await checker.check_many(targets)
+
+        with StandInServer() as server:
+            targets = [server.target(f"/{code}") for code in (200, 500, 503)]
+            results = asyncio.run(sweep(targets))
+
+        self.assertEqual([r.status_code for r in results], [200, 500, 503])
+        self.assertEqual(results[1].content, "status 500")
+        self.assertTrue(all(r.success and r.response_time is not None for r in results))
+
+    def test_per_host_limit(self):
+        """No more than per_host_limit checks hit one host at the same time."""
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        class SlowHandler(_StandInHandler):
+            def do_GET(self):
+                with lock:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                time.sleep(0.05)
+                with lock:
+                    state["active"] -= 1
+                super().do_GET()
+
+        async def sweep(targets):
+            async with AsyncHttpChecker(timeout=5, per_host_limit=2) as checker:
+                return await checker.check_many(targets)
+
+        with StandInServer(SlowHandler) as server:
+            results = asyncio.run(sweep([server.target("/200")] * 8))
+
+        self.assertTrue(all(r.status_code == 200 for r in results))
+        self.assertLessEqual(state["peak"], 2)
+
+    def test_connection_error(self):
+        """Unreachable targets produce a failed result instead of raising."""
+        async def check(target):
+            async with AsyncHttpChecker(timeout=2) as checker:
+                return await checker.check(target)
+
+        with StandInServer() as server:
+            port = server.port
+        result = asyncio.run(check(CheckTarget(host="127.0.0.1", port=port, scheme="http")))
+
+        self.assertFalse(result.success)
+        self.assertIn("Connection error", result.error_message)
+
+    def test_monitor_run_many_async(self):
+        """ServerMonitor notifies for alert codes found by the async engine."""
+        notifier = MagicMock()
+
+        async def sweep(targets):
+            async with AsyncHttpChecker(timeout=5) as checker:
+                monitor = ServerMonitor(checker, notifier, alert_codes=[500])
+                return await monitor.run_many_async(targets)
+
+        with StandInServer() as server:
+            results = asyncio.run(sweep([server.target("/200"), server.target("/500")]))
+
+        self.assertEqual([r.status_code for r in results], [200, 500])
+        notifier.notify.assert_called_once()
+
+
+class TestQueuedEmailNotifier(unittest.TestCase):
+    """Tests for the pooled, queued email notifier."""
+
+    def setUp(self):
+        patcher = patch("opsforge.http.http500.smtplib.SMTP")
+        self.mock_smtp = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.smtp = self.mock_smtp.return_value
+        self.smtp.noop.return_value = (250, b"OK")
+        self.config = SmtpConfig(
+            server="smtp.example.com", port=25, use_tls=True,
+            sender_address="sender@example.com", username="u", password="p",
+        )
+        self.details = NotificationDetails(recipient_email="ops@example.com")
+
+    def test_alerts_share_one_connection(self):
+        """Many alerts are delivered over a single SMTP session."""
+        with QueuedEmailNotifier(self.config, self.details) as notifier:
+            for i in range(5):
+                notifier.notify(f"Alert {i}", "body")
+
+        self.mock_smtp.assert_called_once_with("smtp.example.com", 25)
+        self.smtp.starttls.assert_called_once()
+        self.smtp.login.assert_called_once_with("u", "p")
+        self.assertEqual(self.smtp.sendmail.call_count, 5)
+        self.assertEqual(notifier.sent, 5)
+
+    def test_digest_coalesces_alerts_per_recipient(self):
+        """Alerts within the digest window become one email per recipient."""
+        with QueuedEmailNotifier(self.config, self.details, digest_window=0.5) as notifier:
+            notifier.notify("Alert A", "body A")
+            notifier.notify("Alert B", "body B")
+            notifier.notify("Alert C", "body C", recipient="dev@example.com")
+
+        recipients = sorted(c[0][1][0] for c in self.smtp.sendmail.call_args_list)
+        self.assertEqual(recipients, ["dev@example.com", "ops@example.com"])
+        digest = next(c[0][2] for c in self.smtp.sendmail.call_args_list
+                      if c[0][1] == ["ops@example.com"])
+        self.assertIn("Alert A", digest)
+        self.assertIn("Alert B", digest)
+        self.assertEqual(notifier.sent, 3)
+
+    def test_reconnects_after_disconnect(self):
+        """A dropped connection is re-opened and the email retried."""
+        self.smtp.sendmail.side_effect = [smtplib.SMTPServerDisconnected("gone"), {}]
+        with QueuedEmailNotifier(self.config, self.details) as notifier:
+            notifier.notify("Alert", "body")
+
+        self.assertEqual(self.mock_smtp.call_count, 2)
+        self.assertEqual(notifier.sent, 1)
+        self.assertEqual(notifier.failed, 0)
+
+    def test_notify_does_not_block_on_smtp(self):
+        """notify() returns while the mail server is still busy."""
+        release = threading.Event()
+        self.smtp.sendmail.side_effect = lambda *args: release.wait(5)
+        notifier = QueuedEmailNotifier(self.config, self.details)
+        started = time.monotonic()
+        notifier.notify("Alert", "body")
+        self.assertLess(time.monotonic() - started, 1)
+        release.set()
+        notifier.close()
+        self.assertEqual(notifier.sent, 1)
+
+
+class TestLoadTargetsFromFile(unittest.TestCase):
+    """Tests for the targets-file loader."""
+
+    def _write(self, name, content):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / name
+        path.write_text(content)
+        return path
+
+    def test_yaml_targets(self):
+        """YAML entries are turned into CheckTargets with scheme/port defaults."""
+        path = self._write("targets.yaml", (
+            "targets:\n"
+            "  - host: a.example.com\n"
+            "  - host: b.example.com\n"
+            "    port: 443\n"
+            "    path: /health\n"
+            "    headers: {X-Env: prod}\n"
+        ))
+        targets = load_targets_from_file(path, default_headers={"X-Team": "ops"})
+
+        self.assertEqual(targets[0].get_url(), "http://a.example.com:80/")
+        self.assertEqual(targets[1].get_url(), "https://b.example.com:443/health")
+        self.assertEqual(targets[1].headers, {"X-Team": "ops", "X-Env": "prod"})
+
+    def test_csv_targets(self):
+        """CSV rows use the same field names as YAML entries."""
+        path = self._write("targets.csv", (
+            "host,port,scheme,path,headers\n"
+            "a.example.com,8080,,/status,X-A: 1; X-B: 2\n"
+            "b.example.com,,https,,\n"
+        ))
+        targets = load_targets_from_file(path)
+
+        self.assertEqual(targets[0].get_url(), "http://a.example.com:8080/status")
+        self.assertEqual(targets[0].headers, {"X-A": "1", "X-B": "2"})
+        self.assertEqual(targets[1].get_url(), "https://b.example.com:443/")
+
+    def test_invalid_entry(self):
+        """Entries without a host are rejected."""
+        path = self._write("targets.yaml", "- port: 80\n")
+        with self.assertRaises(ConfigurationError):
+            load_targets_from_file(path)
+
+
+
+class TestMain(unittest.TestCase):
+    """Tests for the one-shot plugin entry point."""
+
+    def test_status_is_the_first_line_of_stdout(self):
+        """Logging goes to stderr, so Nagios reads the status line first."""
+        root = logging.getLogger()
+        self.addCleanup(root.setLevel, root.level)
+        self.addCleanup(shutdown_logging)
+        with StandInServer() as server, \
+                contextlib.redirect_stdout(io.StringIO()) as out, contextlib.redirect_stderr(io.StringIO()) as err:
+            exit_code = main(["--email", "ops@example.com", "--host", "127.0.0.1",
+                              "--port", str(server.port), "--scheme", "http"])
+        self.assertEqual(exit_code, 0)
+        self.assertTrue(out.getvalue().startswith("HTTP500 OK - 0/1 targets returned alert codes |"), out.getvalue())
+        self.assertIn("Monitoring check completed.", err.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
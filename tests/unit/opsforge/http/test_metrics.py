@@ -0,0 +1,112 @@
+"""
+Unit tests for check latency histograms and metrics output.
+"""
+
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from opsforge.http.http500 import CheckResult, CheckTarget, ServerMonitor
+from opsforge.http.metrics import CheckMetrics, LatencyHistogram, MetricsServer
+
+from tests.unit.helpers import FakeClock
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Tests for LatencyHistogram."""
+
+    def test_percentiles_within_precision(self):
+        """Percentiles of a uniform spread are within the bucket precision."""
+        histogram = LatencyHistogram()
+        for millis in range(1, 1001):
+            histogram.record(millis / 1000)
+
+        for quantile, expected in ((0.5, 0.5), (0.95, 0.95), (0.99, 0.99)):
+            value = histogram.percentile(quantile)
+            self.assertAlmostEqual(value, expected, delta=expected * 0.035)
+        self.assertEqual(histogram.total, 1000)
+
+    def test_memory_is_fixed(self):
+        """Recording any value, however large, never grows the buckets."""
+        histogram = LatencyHistogram(max_seconds=10)
+        size = len(histogram.counts)
+        for seconds in (0, 0.000001, 0.5, 9.99, 10, 500, -1):
+            histogram.record(seconds)
+        self.assertEqual(len(histogram.counts), size)
+        self.assertEqual(histogram.total, 7)
+
+    def test_empty(self):
+        """An empty histogram has no percentiles."""
+        self.assertIsNone(LatencyHistogram().percentile(0.99))
+
+
+class TestCheckMetrics(unittest.TestCase):
+    """Tests for CheckMetrics."""
+
+    def setUp(self):
+        self.clock = FakeClock(100.0)
+        self.metrics = CheckMetrics(clock=self.clock)
+        for _ in range(8):
+            self.metrics.record("http://a:80/", success=True, response_time=0.1)
+        self.metrics.record("http://a:80/", success=True, response_time=0.2, alerting=True)
+        self.metrics.record("http://a:80/", success=False)
+        self.clock.now += 60
+
+    def test_snapshot(self):
+        """The snapshot reports counts, error rate and percentiles."""
+        entry = self.metrics.snapshot()["http://a:80/"]
+        self.assertEqual(entry["checks"], 10)
+        self.assertEqual(entry["errors"], 1)
+        self.assertEqual(entry["alerts"], 1)
+        self.assertAlmostEqual(entry["error_rate"], 0.1)
+        self.assertAlmostEqual(entry["p50"], 0.1, delta=0.004)
+        self.assertAlmostEqual(entry["p99"], 0.2, delta=0.007)
+        self.assertAlmostEqual(self.metrics.checks_per_minute(), 10.0)
+
+    def test_prometheus_text(self):
+        """The exposition text contains counters and summary quantiles."""
+        text = self.metrics.render_prometheus()
+        self.assertIn('opsforge_http_checks_total{target="http://a:80/"} 10', text)
+        self.assertIn('opsforge_http_check_errors_total{target="http://a:80/"} 1', text)
+        self.assertIn('opsforge_http_response_seconds{target="http://a:80/",quantile="0.95"}', text)
+        self.assertIn('opsforge_http_response_seconds_count{target="http://a:80/"} 9', text)
+        self.assertIn("opsforge_http_checks_per_minute 10.000", text)
+
+    def test_write_textfile(self):
+        """The text file is written in full under its final name."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "http500.prom"
+            self.metrics.write_textfile(path)
+            self.assertEqual(path.read_text(), self.metrics.render_prometheus())
+            self.assertEqual([p.name for p in Path(directory).iterdir()], ["http500.prom"])
+
+    def test_metrics_server(self):
+        """The endpoint serves the exposition text on /metrics."""
+        with MetricsServer(self.metrics, port=0) as server:
+            url = f"http://127.0.0.1:{server.port}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode("utf-8")
+        self.assertIn("opsforge_http_checks_total", body)
+
+
+class TestServerMonitorMetrics(unittest.TestCase):
+    """Tests for metrics recording in ServerMonitor."""
+
+    def test_process_result_records_metrics(self):
+        """Every processed result is counted, failed or not."""
+        metrics = CheckMetrics()
+        monitor = ServerMonitor(MagicMock(), MagicMock(), [500], metrics=metrics)
+        target = CheckTarget(host="example.com", port=80, scheme="http")
+
+        monitor.process_result(CheckResult(target=target, success=True, status_code=500, response_time=0.3))
+        monitor.process_result(CheckResult(target=target, success=True, status_code=200, response_time=0.1))
+        monitor.process_result(CheckResult(target=target, success=False, error_message="timeout"))
+
+        entry = metrics.snapshot()[target.get_url()]
+        self.assertEqual((entry["checks"], entry["errors"], entry["alerts"]), (3, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Unit tests for the http500 serve-mode scheduler.
+"""
+
+import random
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from opsforge.common.exceptions import ValidationError
+from opsforge.http.http500 import CheckTarget
+from opsforge.http.scheduler import CheckScheduler
+
+from tests.unit.helpers import FakeClock
+
+
+def _target(host, interval=None):
+    return CheckTarget(host=host, port=80, scheme="http", interval=interval)
+
+
+class TestCheckScheduler(unittest.TestCase):
+    """Tests for CheckScheduler."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.monitor = MagicMock()
+
+    def _scheduler(self, targets, **kwargs):
+        scheduler = CheckScheduler(
+            self.monitor, targets, clock=self.clock, rng=random.Random(1), **kwargs
+        )
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def _drain(self, scheduler):
+        scheduler._executor.shutdown(wait=True)
+        scheduler._executor = None
+
+    def test_first_runs_are_spread_over_the_interval(self):
+        """Targets loaded together do not all start at the same moment."""
+        scheduler = self._scheduler([_target(f"h{i}") for i in range(20)], interval=60)
+        slots = {round(c.next_slot - self.clock.now, 3) for c in scheduler.checks}
+
+        self.assertGreater(len(slots), 15)
+        self.assertTrue(all(0 <= s < 60 for s in slots))
+
+    def test_per_target_interval(self):
+        """A target's own interval overrides the scheduler default."""
+        scheduler = self._scheduler([_target("a", interval=5)], interval=60)
+        self.assertEqual(scheduler.checks[0].interval, 5)
+
+    def test_runs_each_target_once_per_interval(self):
+        """Due checks are dispatched once and rescheduled one interval later."""
+        scheduler = self._scheduler([_target("a"), _target("b")], interval=10, jitter=0)
+        self.clock.now += 10
+        self.assertEqual(scheduler.run_pending(), 2)
+        self.assertEqual(scheduler.run_pending(), 0)
+        self._drain(scheduler)
+
+        self.clock.now += 10
+        self.assertEqual(scheduler.run_pending(), 2)
+        self._drain(scheduler)
+        self.assertEqual(self.monitor.run_check_and_notify.call_count, 4)
+
+    def test_overlapping_tick_is_skipped(self):
+        """A tick is missed, not queued, while the previous check still runs."""
+        release = threading.Event()
+        self.monitor.run_check_and_notify.side_effect = lambda target: release.wait(5)
+        scheduler = self._scheduler([_target("slow")], interval=10, jitter=0)
+
+        self.clock.now += 10
+        self.assertEqual(scheduler.run_pending(), 1)
+        self.clock.now += 10
+        self.assertEqual(scheduler.run_pending(), 0)
+        release.set()
+        self._drain(scheduler)
+
+        self.assertEqual(scheduler.checks[0].missed_ticks, 1)
+        self.assertEqual(self.monitor.run_check_and_notify.call_count, 1)
+
+    def test_missed_ticks_are_not_replayed(self):
+        """After a long stall, the check runs once and skips the missed slots."""
+        scheduler = self._scheduler([_target("a")], interval=10, jitter=0)
+        self.clock.now += 55
+        self.assertEqual(scheduler.run_pending(), 1)
+        self.assertEqual(scheduler.run_pending(), 0)
+        self._drain(scheduler)
+
+        check = scheduler.checks[0]
+        self.assertGreater(check.next_slot, self.clock.now)
+        self.assertGreaterEqual(check.missed_ticks, 4)
+
+    def test_invalid_jitter(self):
+        """Jitter outside 0-1 is rejected."""
+        with self.assertRaises(ValidationError):
+            self._scheduler([_target("a")], jitter=2)
+
+    def test_run_stops(self):
+        """run() returns once stop() is called."""
+        scheduler = CheckScheduler(self.monitor, [_target("a")], interval=0.01)
+        thread = threading.Thread(target=scheduler.run)
+        thread.start()
+        scheduler.stop()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Unit tests for alert deduplication and the alert state store.
+"""
+
+import smtplib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from opsforge.http.http500 import (
+    CheckResult,
+    CheckTarget,
+    NotificationDetails,
+    NotificationError,
+    QueuedEmailNotifier,
+    ServerMonitor,
+    SmtpConfig,
+)
+from opsforge.http.state import AlertStateStore, TargetState
+
+from tests.unit.helpers import FakeClock
+
+
+class TestAlertStateStore(unittest.TestCase):
+    """Tests for AlertStateStore."""
+
+    def test_state_persists_between_instances(self):
+        """State written to SQLite is loaded by the next store."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "state.db"
+            with AlertStateStore(path) as store:
+                store.put(TargetState(key="http://a:80/", last_status=500,
+                                      alerting=True, first_failure=1.0, last_notified=2.0))
+            with AlertStateStore(path) as store:
+                state = store.get("http://a:80/")
+
+        self.assertEqual(state.last_status, 500)
+        self.assertTrue(state.alerting)
+        self.assertEqual(state.last_notified, 2.0)
+
+    def test_memory_only(self):
+        """Without a path, state is kept in memory."""
+        store = AlertStateStore()
+        self.assertIsNone(store.get("missing"))
+        store.put(TargetState(key="k", last_status=200))
+        self.assertEqual(store.get("k").last_status, 200)
+
+
+class TestServerMonitorDeduplication(unittest.TestCase):
+    """Tests for once-per-incident alerting in ServerMonitor."""
+
+    def setUp(self):
+        self.clock = FakeClock(1_700_000_000.0)
+        self.notifier = MagicMock()
+        self.target = CheckTarget(host="example.com", port=80, scheme="http")
+        self.monitor = ServerMonitor(
+            checker=MagicMock(),
+            notifier=self.notifier,
+            alert_codes=[500],
+            state_store=AlertStateStore(),
+            renotify_interval=600,
+            clock=self.clock,
+        )
+
+    def _process(self, status, advance=60):
+        self.clock.now += advance
+        self.monitor.process_result(
+            CheckResult(target=self.target, success=True, status_code=status, content="")
+        )
+
+    def _subjects(self):
+        return [c[0][0] for c in self.notifier.notify.call_args_list]
+
+    def test_flapping_target_alerts_once_per_incident(self):
+        """Repeated 500s notify once, then again after the re-notify interval."""
+        for _ in range(5):
+            self._process(500)
+        self.assertEqual(len(self._subjects()), 1)
+
+        self._process(500, advance=600)
+        self.assertEqual(len(self._subjects()), 2)
+
+    def test_recovery_notification(self):
+        """A recovered target sends one recovery notice."""
+        self._process(500)
+        self._process(200)
+        self._process(200)
+
+        subjects = self._subjects()
+        self.assertEqual(len(subjects), 2)
+        self.assertIn("Recovered", subjects[1])
+
+    def test_new_incident_after_recovery(self):
+        """Failing again after recovery is a new incident."""
+        self._process(500)
+        self._process(200)
+        self._process(500)
+        self.assertEqual(len(self._subjects()), 3)
+
+    def test_failed_notification_is_retried(self):
+        """If the notifier fails, the next check tries again."""
+        self.notifier.notify.side_effect = [NotificationError("down"), None]
+        self._process(500)
+        self._process(500)
+        self.assertEqual(self.notifier.notify.call_count, 2)
+
+    def test_no_store_alerts_every_time(self):
+        """Without a state store, every alerting check notifies."""
+        monitor = ServerMonitor(checker=MagicMock(), notifier=self.notifier, alert_codes=[500])
+        for _ in range(3):
+            monitor.process_result(
+                CheckResult(target=self.target, success=True, status_code=500, content="")
+            )
+        self.assertEqual(self.notifier.notify.call_count, 3)
+
+
+class TestQueuedNotificationRollback(unittest.TestCase):
+    """Tests for retrying alerts the queued notifier failed to deliver."""
+
+    def setUp(self):
+        patcher = patch("opsforge.http.http500.smtplib.SMTP")
+        self.smtp = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.smtp.noop.return_value = (250, b"OK")
+        self.clock = FakeClock(1_700_000_000.0)
+        self.store = AlertStateStore()
+        self.target = CheckTarget(host="example.com", port=80, scheme="http")
+        config = SmtpConfig(server="smtp.example.com", port=25, use_tls=False,
+                            sender_address="sender@example.com", username=None, password=None)
+        self.notifier = QueuedEmailNotifier(config, NotificationDetails(recipient_email="ops@example.com"))
+        self.monitor = ServerMonitor(checker=MagicMock(), notifier=self.notifier, alert_codes=[500],
+                                     state_store=self.store, renotify_interval=600, clock=self.clock)
+
+    def _process(self, status):
+        self.clock.now += 60
+        self.monitor.process_result(
+            CheckResult(target=self.target, success=True, status_code=status, content="")
+        )
+
+    def test_failed_delivery_is_retried(self):
+        """An alert lost to an SMTP failure is sent again on the next check."""
+        self.smtp.sendmail.side_effect = smtplib.SMTPException("relay denied")
+        self._process(500)
+        self.notifier.close()
+        self.assertEqual(self.notifier.failed, 1)
+        self.assertIsNone(self.store.get(self.target.get_url()).last_notified)
+
+        self.smtp.sendmail.side_effect = None
+        self._process(500)
+        self.notifier.close()
+        self.assertEqual(self.notifier.sent, 1)
+        self.assertEqual(self.store.get(self.target.get_url()).last_notified, self.clock.now)
+
+        # Delivered, so the incident stays quiet until the re-notify interval
+        calls = self.smtp.sendmail.call_count
+        self._process(500)
+        self.notifier.close()
+        self.assertEqual(self.smtp.sendmail.call_count, calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
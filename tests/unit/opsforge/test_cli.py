@@ -0,0 +1,144 @@
+"""
+Unit tests for the opsforge command-line interface.
+"""
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import types
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from opsforge import cli
+from opsforge.cli import COMMANDS, Command, build_parser, register_command
+
+SRC_DIR = Path(__file__).resolve().parents[3] / "src"
+
+
+def _imported_modules(code):
+    """Runs code in a fresh interpreter and returns the top-level modules it imported."""
+    script = textwrap.dedent(code) + "\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))\n"
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                            env=env, check=True)
+    return {name.split(".")[0] for name in json.loads(result.stdout.splitlines()[-1])}
+
+
+class TestStartup(unittest.TestCase):
+    """Tests that parsing arguments does not load command modules."""
+
+    HEAVY = {"requests", "paramiko", "dns", "yaml", "dotenv", "aiohttp"}
+
+    def test_help_imports_no_command_modules(self):
+        """'opsforge --help' only imports the CLI and the standard library."""
+        modules = _imported_modules("""
+            import contextlib, io
+            from opsforge import cli
+            with contextlib.suppress(SystemExit), contextlib.redirect_stdout(io.StringIO()):
+                cli.main(["--help"])
+        """)
+        self.assertFalse(modules & self.HEAVY)
+        self.assertNotIn("utility_scripts", modules)
+
+    def test_command_help_and_errors_import_no_command_modules(self):
+        """A command's --help and argument errors are answered before its module is loaded."""
+        for argv in (["http500", "--help"], ["http500", "serve", "--help"], ["http500", "--bogus"],
+                     ["readonly", "--help"], ["readonly", "--port", "x"],
+                     ["dns", "--help"], ["dns", "get"], ["agent", "--help"]):
+            with self.subTest(argv=argv):
+                modules = _imported_modules(f"""
+                    import contextlib, io
+                    from opsforge import cli
+                    with contextlib.suppress(SystemExit), contextlib.redirect_stdout(io.StringIO()), \\
+                            contextlib.redirect_stderr(io.StringIO()):
+                        cli.main({argv!r})
+                """)
+                self.assertFalse(modules & self.HEAVY)
+
+    def test_common_exceptions_do_not_load_config(self):
+        """opsforge.common loads its submodules on first use."""
+        modules = _imported_modules("import opsforge.common.exceptions")
+        self.assertFalse(modules & {"yaml", "dotenv"})
+
+        import opsforge.common
+        self.assertIs(opsforge.common.OpsForgeError, opsforge.common.exceptions.OpsForgeError)
+        with self.assertRaises(AttributeError):
+            opsforge.common.missing
+
+
+class TestCommandRegistry(unittest.TestCase):
+    """Tests for registering and dispatching commands."""
+
+    def setUp(self):
+        self.module = types.ModuleType("opsforge_test_command")
+        self.module.calls = []
+        self.module.main = lambda value: self.module.calls.append(value) or 3
+        patcher = patch.dict(sys.modules, {"opsforge_test_command": self.module})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        registry = patch.dict(COMMANDS)
+        registry.start()
+        self.addCleanup(registry.stop)
+
+    def test_builtin_commands(self):
+        """The built-in commands are registered with importable targets."""
+        self.assertEqual(list(COMMANDS)[:3], ["http500", "readonly", "dns"])
+        self.assertTrue(callable(COMMANDS["dns"].load()))
+
+    def test_forwarded_arguments(self):
+        """Forwarding commands receive everything after their name."""
+        register_command(Command("probe", "Test command", "opsforge_test_command:main"))
+        self.assertEqual(cli.main(["probe", "serve", "--url", "http://x", "-h"]), 3)
+        self.assertEqual(self.module.calls, [["serve", "--url", "http://x", "-h"]])
+
+    def test_arguments_are_checked_before_loading(self):
+        """A command's argument parser runs first; bad arguments never load the target."""
+        self.module.parse_args = lambda argv: self.module.calls.append(("parsed", argv))
+        register_command(Command("probe", "Test command", "opsforge_test_command:main",
+                                 arguments="opsforge_test_command:parse_args"))
+        self.assertEqual(cli.main(["probe", "-x"]), 3)
+        self.assertEqual(self.module.calls, [("parsed", ["-x"]), ["-x"]])
+
+        def reject(argv):
+            raise SystemExit(2)
+
+        self.module.parse_args = reject
+        register_command(Command("broken", "Broken command", "opsforge_missing_module:main",
+                                 arguments="opsforge_test_command:parse_args"))
+        with self.assertRaises(SystemExit):
+            cli.main(["broken", "--bogus"])
+
+    def test_parsed_arguments(self):
+        """Other commands receive the namespace built from their arguments."""
+        register_command(Command(
+            "probe", "Test command", "opsforge_test_command:main",
+            configure=lambda parser: parser.add_argument("--count", type=int),
+            forward_args=False))
+        self.assertEqual(cli.main(["probe", "--count", "2"]), 3)
+        self.assertEqual(self.module.calls[0].count, 2)
+
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            cli.main(["probe", "--unknown"])
+
+    def test_errors(self):
+        """Import and runtime errors of a command give exit code 1."""
+        register_command(Command("broken", "Broken command", "opsforge_missing_module:main"))
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            self.assertEqual(cli.main(["broken"]), 1)
+        self.assertIn("opsforge_missing_module", stderr.getvalue())
+
+    def test_no_command_prints_help(self):
+        """Without a command the usage is printed."""
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            self.assertEqual(cli.main([]), 0)
+        self.assertIn("http500", stdout.getvalue())
+        self.assertEqual(stdout.getvalue(), build_parser().format_help())
+
+
+if __name__ == "__main__":
+    unittest.main()